@@ -13,6 +13,8 @@ from app.common import error
 from app.common.errors import BusinessError
 from app.common.serializers import dict_keys_to_snake, dict_keys_to_camel
 from app.common.redis_client import redis_client
+from app.common.cpu_pool import cpu_pool
+from app.common.http_client import http_client
 from app.constants import ErrorCode
 from app.openapi import OPENAPI_SPEC
 
@@ -132,13 +134,139 @@ def _auto_upgrade_order_phase_schema(app: Flask) -> None:
         logger.exception(f'orders.phase_id 自动升级失败: {exc}')
 
 
-def create_app(config_name=None):
-    """Application factory."""
+def _auto_upgrade_order_sim_types_schema(app: Flask) -> None:
+    """应用启动时自动创建并回填 order_sim_types 关联表。"""
+    if os.getenv('AUTO_ORDER_SIM_TYPES_UPGRADE', 'true').lower() not in ('1', 'true', 'yes', 'on'):
+        logger.info('已禁用 AUTO_ORDER_SIM_TYPES_UPGRADE，跳过 order_sim_types 升级')
+        return
+
+    db_url = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not db_url or str(db_url).startswith('sqlite:'):
+        return
+
+    try:
+        from database.migrations.order_sim_types_upgrade import upgrade_order_sim_types_schema
+        upgrade_order_sim_types_schema(str(db_url), verbose=False)
+        logger.info('order_sim_types 自动升级检查完成')
+    except Exception as exc:
+        logger.exception(f'order_sim_types 自动升级失败: {exc}')
+
+
+def _auto_upgrade_order_search_schema(app: Flask) -> None:
+    """应用启动时自动补齐 orders.search_text 与全文索引。"""
+    if os.getenv('AUTO_ORDER_SEARCH_UPGRADE', 'true').lower() not in ('1', 'true', 'yes', 'on'):
+        logger.info('已禁用 AUTO_ORDER_SEARCH_UPGRADE，跳过 orders 检索升级')
+        return
+
+    db_url = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not db_url or str(db_url).startswith('sqlite:'):
+        return
+
+    try:
+        from database.migrations.order_search_upgrade import upgrade_order_search_schema
+        upgrade_order_search_schema(str(db_url), verbose=False)
+        logger.info('orders 检索字段自动升级检查完成')
+    except Exception as exc:
+        logger.exception(f'orders 检索字段自动升级失败: {exc}')
+
+
+def _auto_upgrade_user_round_usage_schema(app: Flask) -> None:
+    """应用启动时自动创建 user_daily_round_usage 表。"""
+    if os.getenv('AUTO_USER_ROUND_USAGE_UPGRADE', 'true').lower() not in ('1', 'true', 'yes', 'on'):
+        logger.info('已禁用 AUTO_USER_ROUND_USAGE_UPGRADE，跳过 user_daily_round_usage 升级')
+        return
+
+    db_url = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not db_url or str(db_url).startswith('sqlite:'):
+        return
+
+    try:
+        from database.migrations.user_round_usage_upgrade import upgrade_user_round_usage_schema
+        upgrade_user_round_usage_schema(str(db_url), verbose=False)
+        logger.info('user_daily_round_usage 自动升级检查完成')
+    except Exception as exc:
+        logger.exception(f'user_daily_round_usage 自动升级失败: {exc}')
+
+
+def _auto_upgrade_automation_outbox_schema(app: Flask) -> None:
+    """应用启动时自动创建 automation_outbox 表。"""
+    if os.getenv('AUTO_AUTOMATION_OUTBOX_UPGRADE', 'true').lower() not in ('1', 'true', 'yes', 'on'):
+        logger.info('已禁用 AUTO_AUTOMATION_OUTBOX_UPGRADE，跳过 automation_outbox 升级')
+        return
+
+    db_url = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not db_url or str(db_url).startswith('sqlite:'):
+        return
+
+    try:
+        from database.migrations.automation_outbox_upgrade import upgrade_automation_outbox_schema
+        upgrade_automation_outbox_schema(str(db_url), verbose=False)
+        logger.info('automation_outbox 表自动升级检查完成')
+    except Exception as exc:
+        logger.exception(f'automation_outbox 表自动升级失败: {exc}')
+
+
+def _auto_upgrade_snapshot_blobs_schema(app: Flask) -> None:
+    """应用启动时自动创建 snapshot_blobs 表（历史快照由 --backfill 手动外置）。"""
+    if os.getenv('AUTO_SNAPSHOT_BLOBS_UPGRADE', 'true').lower() not in ('1', 'true', 'yes', 'on'):
+        logger.info('已禁用 AUTO_SNAPSHOT_BLOBS_UPGRADE，跳过 snapshot_blobs 升级')
+        return
+
+    db_url = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not db_url or str(db_url).startswith('sqlite:'):
+        return
+
+    try:
+        from database.migrations.snapshot_blobs_upgrade import upgrade_snapshot_blobs_schema
+        upgrade_snapshot_blobs_schema(str(db_url), verbose=False)
+        logger.info('snapshot_blobs 表自动升级检查完成')
+    except Exception as exc:
+        logger.exception(f'snapshot_blobs 表自动升级失败: {exc}')
+
+
+def _is_serving(app: Flask) -> bool:
+    """是否为对外服务进程（wsgi / run.py 启动服务）；CLI 脚本、测试中创建的应用不启动后台线程与进程池预热。"""
+    return bool(app.config.get('SERVING')) and not app.config.get('TESTING')
+
+
+def _start_automation_outbox_worker(app: Flask) -> None:
+    """启动自动化提交 outbox 后台投递线程（仅服务进程）。"""
+    if not _is_serving(app) or not app.config.get('AUTOMATION_OUTBOX_WORKER_ENABLED', True):
+        return
+
+    from app.api.v1.orders.service import orders_service
+    from app.services.automation import automation_outbox_worker
+    automation_outbox_worker.start(app, orders_service.dispatch_automation_outbox)
+
+
+def _start_upload_janitor(app: Flask) -> None:
+    """按配置启动过期上传清理线程（默认关闭，可改用 scripts/purge_expired_uploads.py 定时执行）。"""
+    if not _is_serving(app) or not app.config.get('UPLOAD_JANITOR_ENABLED', False):
+        return
+
+    from app.api.v1.upload.janitor import upload_janitor
+    from app.api.v1.upload.service import upload_service
+
+    def purge():
+        return upload_service.purge_expired(
+            batch_size=int(app.config.get('UPLOAD_JANITOR_BATCH_SIZE', 200)),
+            orphan_grace_seconds=int(app.config.get('UPLOAD_ORPHAN_GRACE_SECONDS', 3600)),
+        )
+
+    upload_janitor.start(app, purge)
+
+
+def create_app(config_name=None, serving=False):
+    """Application factory.
+
+    serving 仅由对外服务入口（wsgi.py、run.py 启动服务时）传 True，决定是否启动后台投递/清理线程。
+    """
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'development')
 
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.config['SERVING'] = serving
 
     # 初始化扩展
     init_extensions(app)
@@ -150,6 +278,11 @@ def create_app(config_name=None):
     _auto_upgrade_user_department_schema(app)
     _auto_upgrade_platform_features_schema(app)
     _auto_upgrade_order_phase_schema(app)
+    _auto_upgrade_order_sim_types_schema(app)
+    _auto_upgrade_order_search_schema(app)
+    _auto_upgrade_user_round_usage_schema(app)
+    _auto_upgrade_automation_outbox_schema(app)
+    _auto_upgrade_snapshot_blobs_schema(app)
 
     # 初始化 Redis（可选，如果配置了 Redis）
     try:
@@ -158,6 +291,11 @@ def create_app(config_name=None):
     except Exception as e:
         logger.warning(f"Redis 初始化失败，将使用数据库直接查询: {e}")
 
+    # 出站 HTTP 连接池（公司认证、资源池、自动化分发共用）
+    http_client.init_app(app)
+    # CPU 密集解析进程池（Excel/CSV、INP set 提取），服务进程在此拉起子进程预热
+    cpu_pool.init_app(app)
+
     def build_request_context():
         payload = {
             'trace_id': getattr(g, 'trace_id', 'unknown'),
@@ -259,7 +397,15 @@ def create_app(config_name=None):
     # Health check endpoint
     @app.route('/health')
     def health():
-        return {'status': 'healthy', 'trace_id': getattr(g, 'trace_id', None)}
+        return {
+            'status': 'healthy',
+            'trace_id': getattr(g, 'trace_id', None),
+            'cpu_pool': cpu_pool.snapshot(),
+            'http_client': http_client.snapshot(),
+        }
+
+    _start_automation_outbox_worker(app)
+    _start_upload_janitor(app)
 
     logger.info(f"App created with config: {config_name}")
     return app
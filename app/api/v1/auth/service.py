@@ -11,6 +11,7 @@ from flask import current_app
 from flask_jwt_extended import create_access_token
 
 from app.common.errors import BusinessError, NotFoundError
+from app.common.http_client import http_client
 from app.constants import ErrorCode
 from app.models.auth import Menu, Permission, Role, User
 from app.models.config import Department
@@ -260,9 +261,9 @@ class AuthService:
 
         try:
             if method == "GET":
-                response = requests.get(verify_url, params=payload, headers=headers, timeout=timeout)
+                response = http_client.get('auth', verify_url, params=payload, headers=headers, timeout=timeout)
             else:
-                response = requests.post(verify_url, json=payload, headers=headers, timeout=timeout)
+                response = http_client.post('auth', verify_url, json=payload, headers=headers, timeout=timeout)
         except requests.RequestException as exc:
             raise BusinessError(ErrorCode.INTERNAL_ERROR, f"公司认证服务不可用: {exc}") from exc
 
@@ -347,7 +348,8 @@ class AuthService:
 
         try:
             if method == "POST":
-                response = requests.post(
+                response = http_client.post(
+                    'auth',
                     info_url,
                     json=payload,
                     headers=headers,
@@ -355,7 +357,8 @@ class AuthService:
                     cookies=cookies,
                 )
             else:
-                response = requests.get(
+                response = http_client.get(
+                    'auth',
                     info_url,
                     params=payload,
                     headers=headers,
@@ -390,7 +393,8 @@ class AuthService:
         timeout = float(current_app.config.get("AUTH_COMPANY_PASSWORD_VERIFY_TIMEOUT", 8.0))
 
         try:
-            response = requests.get(
+            response = http_client.get(
+                'auth',
                 info_url,
                 params={"uid": uid},
                 headers=headers,
@@ -491,7 +495,8 @@ class AuthService:
 
         try:
             if method == "POST":
-                response = requests.post(
+                response = http_client.post(
+                    'auth',
                     info_url,
                     json=payload,
                     headers=headers,
@@ -499,7 +504,8 @@ class AuthService:
                     cookies=cookies,
                 )
             else:
-                response = requests.get(
+                response = http_client.get(
+                    'auth',
                     info_url,
                     params=payload,
                     headers=headers,
@@ -2,9 +2,10 @@
 参数组合管理 - Routes层
 职责：路由定义、参数校验、HTTP响应
 """
-from flask import Blueprint, request, send_file
+from flask import Blueprint, request
 from pydantic import ValidationError
 from app.common.response import success, error
+from app.common.file_response import send_stored_file
 from app.common.errors import NotFoundError, BusinessError, ValidationError as AppValidationError
 from app.common.serializers import get_snake_json
 from app.constants.error_codes import ErrorCode
@@ -108,10 +109,9 @@ def download_group_doe_file(group_id: int):
     """下载参数组合DOE文件"""
     try:
         file_info = service.get_group_doe_download_info(group_id)
-        return send_file(
+        return send_stored_file(
             file_info['path'],
-            as_attachment=True,
-            download_name=file_info['download_name'],
+            file_info['download_name'],
             mimetype='text/csv; charset=utf-8'
         )
     except NotFoundError as e:
@@ -122,6 +122,24 @@ def download_group_doe_file(group_id: int):
         return error(code=ErrorCode.INTERNAL_ERROR, msg=str(e), http_status=500)
 
 
+@param_groups_bp.route('/doe-matrices/<matrix_id>', methods=['GET'])
+def get_doe_matrix_rows(matrix_id: str):
+    """分页读取外置DOE矩阵，查询参数: offset(默认0), limit(默认500，最大5000)"""
+    try:
+        result = service.get_doe_matrix_rows(
+            matrix_id,
+            offset=request.args.get('offset', 0, type=int),
+            limit=request.args.get('limit', 500, type=int),
+        )
+        return success(data=result)
+    except NotFoundError as e:
+        return error(code=ErrorCode.NOT_FOUND, msg=str(e), http_status=404)
+    except BusinessError as e:
+        return error(code=ErrorCode.BUSINESS_ERROR, msg=str(e), http_status=400)
+    except Exception as e:
+        return error(code=ErrorCode.INTERNAL_ERROR, msg=str(e), http_status=500)
+
+
 @param_groups_bp.route('/doe-template/download', methods=['GET'])
 def download_doe_template_file():
     """下载参数组合DOE模板文件（固定模板）"""
@@ -129,10 +147,9 @@ def download_doe_template_file():
         template_path = Path(__file__).resolve().parents[5] / 'database' / 'doe' / '目标DOE.csv'
         if not template_path.exists():
             return error(code=ErrorCode.NOT_FOUND, msg='DOE模板文件不存在', http_status=404)
-        return send_file(
+        return send_stored_file(
             template_path,
-            as_attachment=True,
-            download_name='目标DOE.csv',
+            '目标DOE.csv',
             mimetype='text/csv; charset=utf-8'
         )
     except Exception as e:
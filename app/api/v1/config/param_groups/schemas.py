@@ -41,6 +41,9 @@ class ParamGroupResponse(BaseModel):
     doe_file_name: Optional[str] = None
     doe_file_heads: Optional[List[str]] = None
     doe_file_data: Optional[List[Dict[str, Any]]] = None
+    doe_matrix_id: Optional[str] = None
+    doe_row_count: Optional[int] = None
+    doe_columns: Optional[List[str]] = None
     valid: int
     sort: int
     created_at: int
@@ -88,6 +91,9 @@ class ParamGroupDetailResponse(BaseModel):
     doe_file_name: Optional[str] = None
     doe_file_heads: Optional[List[str]] = None
     doe_file_data: Optional[List[Dict[str, Any]]] = None
+    doe_matrix_id: Optional[str] = None
+    doe_row_count: Optional[int] = None
+    doe_columns: Optional[List[str]] = None
     valid: int
     sort: int
     created_at: int
@@ -8,10 +8,12 @@ import re
 import time
 from pathlib import Path
 from typing import Optional, List, Dict, Any
+from flask import current_app
 from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.common.errors import NotFoundError, BusinessError
 from app.constants.error_codes import ErrorCode
+from app.services.doe_matrix import doe_matrix_store
 from .repository import ParamGroupRepository, ParamGroupParamRelRepository, ParamGroupProjectRelRepository
 
 
@@ -40,6 +42,8 @@ class ParamGroupService:
             data['doe_file_name'] = None
             data['doe_file_heads'] = None
             data['doe_file_data'] = None
+            data['doe_matrix_id'] = None
+            data['doe_row_count'] = None
 
     @staticmethod
     def _to_camel_key(key: str) -> str:
@@ -80,9 +84,63 @@ class ParamGroupService:
 
         return storage_path
 
+    @staticmethod
+    def _group_doe_rows(group) -> List[Dict[str, Any]]:
+        """DOE 行数据：外置矩阵从列式文件读取，历史行内数据直接返回"""
+        if group.doe_matrix_id:
+            return doe_matrix_store.load_rows(group.doe_matrix_id)
+        return group.doe_file_data or []
+
+    def _store_group_doe_matrix(self, group, rows: Optional[List[Dict[str, Any]]]) -> None:
+        """保存 DOE 数据：先在内存中校验取值范围（校验失败不落盘），
+        行数达到阈值且结构规整时外置为列式矩阵，否则保持行内"""
+        self._validate_doe_ranges(group.id, rows or [])
+        reference = None
+        if rows and len(rows) >= int(current_app.config.get('DOE_MATRIX_EXTERNAL_MIN_ROWS', 200)):
+            reference = doe_matrix_store.put(rows)
+        if reference is None:
+            group.doe_file_data = rows
+            group.doe_matrix_id = None
+            group.doe_row_count = len(rows) if rows else None
+            return
+        group.doe_file_data = None
+        group.doe_matrix_id = reference['doeMatrixId']
+        group.doe_row_count = reference['doeRowCount']
+
+    def _doe_bounds(self, group_id: int) -> Dict[str, tuple]:
+        """组合参数的上下限（关联覆盖值优先），按参数 key 索引"""
+        bounds = {}
+        for rel in self.rel_repo.find_by_group_id(group_id):
+            param_def = self.rel_repo.find_param_def_by_id(rel.param_def_id)
+            if not param_def or not param_def.key:
+                continue
+            low = rel.min_val if rel.min_val is not None else param_def.min_val
+            high = rel.max_val if rel.max_val is not None else param_def.max_val
+            if low is not None or high is not None:
+                bounds[param_def.key] = (low, high)
+        return bounds
+
+    def _validate_doe_ranges(self, group_id: int, rows: List[Dict[str, Any]]) -> None:
+        """按组合参数的上下限校验 DOE 中同名列（参数 key），只检查可转为数值的取值"""
+        bounds = self._doe_bounds(group_id) if rows else {}
+        for column, (low, high) in bounds.items():
+            for row_index, row in enumerate(rows):
+                value = row.get(column) if isinstance(row, dict) else None
+                if value is None or isinstance(value, bool):
+                    continue
+                try:
+                    number = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if (low is not None and number < low) or (high is not None and number > high):
+                    raise BusinessError(
+                        ErrorCode.VALIDATION_ERROR,
+                        f"DOE 第 {row_index + 1} 行参数 {column} 的取值 {value} 超出范围 [{low}, {high}]"
+                    )
+
     def _ensure_group_doe_file(self, group) -> Path:
         heads = group.doe_file_heads or []
-        data = group.doe_file_data or []
+        data = self._group_doe_rows(group)
         if not heads or not data:
             raise BusinessError(ErrorCode.BUSINESS_ERROR, '当前参数组没有可下载的DOE文件内容')
 
@@ -96,6 +154,15 @@ class ParamGroupService:
         group_dict['project_ids'] = self.proj_repo.find_project_ids_by_group(group_dict['id'])
         return group_dict
 
+    @staticmethod
+    def _attach_doe_reference(group_dict: dict, group) -> dict:
+        """外置 DOE 只返回矩阵引用（列名取自文件头），行数据通过 /doe-matrices/<id> 分页读取"""
+        if group.doe_matrix_id:
+            reference = doe_matrix_store.reference(group.doe_matrix_id)
+            group_dict['doe_row_count'] = reference['doeRowCount']
+            group_dict['doe_columns'] = reference['doeColumns']
+        return group_dict
+
     def get_all_groups(self, valid: Optional[int] = None,
                        project_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """获取所有参数组合，支持按项目过滤"""
@@ -107,7 +174,7 @@ class ParamGroupService:
         group = self.repo.find_by_id(group_id)
         if not group:
             raise NotFoundError(f"参数组合 {group_id} 不存在")
-        return self._enrich_group(group.to_dict())
+        return self._attach_doe_reference(self._enrich_group(group.to_dict()), group)
     
     def get_group_detail(self, group_id: int) -> Dict[str, Any]:
         """获取参数组合详情（包含参数列表）"""
@@ -131,7 +198,7 @@ class ParamGroupService:
                 param_data['def_default_val'] = param_def.default_val
             params.append(param_data)
 
-        result = self._enrich_group(group.to_dict())
+        result = self._attach_doe_reference(self._enrich_group(group.to_dict()), group)
         result['params'] = params
         return result
 
@@ -147,6 +214,7 @@ class ParamGroupService:
         # 提取 project_ids（不传给 ORM）
         project_ids = data.pop('project_ids', [])
         self._normalize_group_algorithm_fields(data)
+        doe_rows = data.pop('doe_file_data', None)
 
         now = int(time.time())
         data['created_at'] = now
@@ -160,17 +228,18 @@ class ParamGroupService:
                 self.proj_repo.replace_projects(group.id, project_ids)
 
             if group.alg_type == 5:
+                self._store_group_doe_matrix(group, doe_rows)
                 normalized_name = self._ensure_csv_name(group.doe_file_name, group.id)
                 group.doe_file_name = normalized_name
                 self._persist_group_doe_file(
                     group.id,
                     normalized_name,
                     group.doe_file_heads or [],
-                    group.doe_file_data or [],
+                    doe_rows or [],
                 )
 
             db.session.commit()
-            return self._enrich_group(group.to_dict())
+            return self._attach_doe_reference(self._enrich_group(group.to_dict()), group)
         except Exception as e:
             db.session.rollback()
             raise BusinessError(ErrorCode.BUSINESS_ERROR, f"创建参数组合失败: {str(e)}")
@@ -190,6 +259,7 @@ class ParamGroupService:
         # 提取 project_ids（不传给 ORM）
         project_ids = data.pop('project_ids', None)
         self._normalize_group_algorithm_fields(data)
+        doe_rows = data.pop('doe_file_data', None)
         data['updated_at'] = int(time.time())
 
         try:
@@ -199,17 +269,19 @@ class ParamGroupService:
                 self.proj_repo.replace_projects(group_id, project_ids)
 
             if updated_group.alg_type == 5:
+                if doe_rows is not None:
+                    self._store_group_doe_matrix(updated_group, doe_rows)
                 normalized_name = self._ensure_csv_name(updated_group.doe_file_name, updated_group.id)
                 updated_group.doe_file_name = normalized_name
                 self._persist_group_doe_file(
                     updated_group.id,
                     normalized_name,
                     updated_group.doe_file_heads or [],
-                    updated_group.doe_file_data or [],
+                    doe_rows if doe_rows is not None else self._group_doe_rows(updated_group),
                 )
 
             db.session.commit()
-            return self._enrich_group(updated_group.to_dict())
+            return self._attach_doe_reference(self._enrich_group(updated_group.to_dict()), updated_group)
         except Exception as e:
             db.session.rollback()
             raise BusinessError(ErrorCode.BUSINESS_ERROR, f"更新参数组合失败: {str(e)}")
@@ -249,6 +321,19 @@ class ParamGroupService:
             'download_name': download_name,
         }
     
+    def get_doe_matrix_rows(self, matrix_id: str, offset: int = 0, limit: int = 500) -> Dict[str, Any]:
+        """分页读取外置DOE矩阵（参数组合 doe_matrix_id / 订单 optParams.doeMatrixId）"""
+        offset = max(offset, 0)
+        limit = min(max(limit, 1), 5000)
+        with doe_matrix_store.open(matrix_id) as matrix:
+            return {
+                'doe_matrix_id': matrix_id,
+                'row_count': matrix.row_count,
+                'columns': matrix.columns,
+                'offset': offset,
+                'items': matrix.rows(offset, offset + limit),
+            }
+
     def get_group_params(self, group_id: int) -> List[Dict[str, Any]]:
         """获取组合包含的参数"""
         group = self.repo.find_by_id(group_id)
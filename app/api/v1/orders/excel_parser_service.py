@@ -3,11 +3,81 @@ Excel解析服务
 职责：解析用户上传的Excel模板文件
 注意：处理编码问题和去除前后空格
 """
+import codecs
+import csv
 import io
+import os
+import re
+import shutil
+import tempfile
 import chardet
-from typing import Dict, Any, List, Optional, BinaryIO
+from functools import lru_cache
+from typing import Dict, Any, Iterator, List, Optional, BinaryIO, Sequence, Tuple
 from openpyxl import load_workbook
 from openpyxl.utils.exceptions import InvalidFileException
+from werkzeug.datastructures import FileStorage
+
+from app.common.cpu_pool import cpu_pool
+
+
+# 流式解析每批行数
+PARSE_BATCH_SIZE = 1000
+# 返回给前端的警告条数上限（超出部分只计入 warningCount）
+MAX_REPORTED_WARNINGS = 200
+# CSV 编码检测只读取文件开头的样本
+CSV_ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# CSV 中按数值解析的单元格（与 xlsx 数值单元格对齐）；带前导零的编码类文本（如 007）保持字符串
+CSV_NUMBER_PATTERN = re.compile(r'[+-]?(?:0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?')
+
+GARBLED_PATTERNS = ('锟斤拷', '烫烫烫', '屯屯屯', '\ufffd')
+FIX_ENCODINGS = ('utf-8', 'gbk', 'gb2312', 'gb18030', 'big5')
+
+
+def _has_encoding_issue(text: str) -> bool:
+    """检查是否包含常见的乱码特征"""
+    return any(pattern in text for pattern in GARBLED_PATTERNS)
+
+
+def _fix_encoding(text: str) -> str:
+    """按常见编码组合重新编解码，返回第一个不含乱码特征的结果"""
+    for src_enc in FIX_ENCODINGS:
+        for dst_enc in FIX_ENCODINGS:
+            if src_enc == dst_enc:
+                continue
+            try:
+                fixed = text.encode(src_enc).decode(dst_enc)
+                if not _has_encoding_issue(fixed):
+                    return fixed
+            except (UnicodeDecodeError, UnicodeEncodeError):
+                continue
+    return text  # 无法修复，返回原值
+
+
+@lru_cache(maxsize=8192)
+def _coerce_csv_cell(value: str) -> Any:
+    """数值样式的 CSV 单元格转为 int/float，与 openpyxl 读取 xlsx 数值单元格的结果一致"""
+    match = CSV_NUMBER_PATTERN.fullmatch(value.strip())
+    if not match:
+        return value
+    if match.group(1) or match.group(2):
+        return float(value)
+    return int(value)
+
+
+@lru_cache(maxsize=8192)
+def _clean_text(value: str) -> Optional[str]:
+    """字符串单元格清洗：去除前后空格（含全角空格）、不可见字符，并尝试修复乱码"""
+    cleaned = value.strip().strip('\u3000')
+    # 绝大多数文本整体可打印，只有不满足时才逐字符过滤
+    if not cleaned.isprintable():
+        cleaned = ''.join(char for char in cleaned if char.isprintable() or char in '\n\r\t')
+    try:
+        if _has_encoding_issue(cleaned):
+            cleaned = _fix_encoding(cleaned)
+    except Exception:
+        pass  # 保持原值
+    return cleaned if cleaned else None
 
 
 class ExcelParserService:
@@ -63,171 +133,264 @@ class ExcelParserService:
     def parse_param_excel(
         self,
         file_content: BinaryIO,
-        sheet_name: Optional[str] = None
+        sheet_name: Optional[str] = None,
+        file_name: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        解析参数Excel文件
+        解析参数Excel/CSV文件
 
         Args:
             file_content: 文件内容（二进制流）
             sheet_name: 工作表名称，默认第一个
+            file_name: 原始文件名，.csv 结尾时走 CSV 解析（默认取 file_content.filename）
 
         Returns:
             {
                 'success': bool,
-                'params': [...],
+                'items': [...],
                 'errors': [...],
                 'warnings': [...]
             }
         """
-        try:
-            wb = load_workbook(filename=file_content, read_only=True, data_only=True)
-            ws = wb[sheet_name] if sheet_name and sheet_name in wb.sheetnames else wb.active
-
-            return self._parse_sheet(ws, self.PARAM_COLUMN_MAPPING, 'paramKey')
-
-        except InvalidFileException:
-            return {
-                'success': False,
-                'params': [],
-                'errors': [{'type': 'invalid_file', 'message': '无效的Excel文件格式'}],
-                'warnings': []
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'params': [],
-                'errors': [{'type': 'parse_error', 'message': f'解析失败: {str(e)}'}],
-                'warnings': []
-            }
+        return self._parse_file(file_content, sheet_name, file_name, self.PARAM_COLUMN_MAPPING, 'paramKey', 'params')
 
     def parse_output_excel(
         self,
         file_content: BinaryIO,
-        sheet_name: Optional[str] = None
+        sheet_name: Optional[str] = None,
+        file_name: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        解析输出Excel文件
+        解析输出Excel/CSV文件
 
         Args:
             file_content: 文件内容
             sheet_name: 工作表名称
+            file_name: 原始文件名
 
         Returns:
             解析结果
         """
+        return self._parse_file(file_content, sheet_name, file_name, self.OUTPUT_COLUMN_MAPPING, 'outputKey', 'outputs')
+
+    def parse_param_upload(self, file: FileStorage, sheet_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        解析上传的参数文件：内容先落临时文件，再交给 CPU 进程池解析，不占用请求线程所在进程的 GIL
+
+        Raises:
+            BusinessError: 进程池繁忙或解析超时
+        """
+        suffix = os.path.splitext(file.filename or '')[1]
+        fd, path = tempfile.mkstemp(prefix='param_', suffix=suffix)
         try:
-            wb = load_workbook(filename=file_content, read_only=True, data_only=True)
-            ws = wb[sheet_name] if sheet_name and sheet_name in wb.sheetnames else wb.active
+            with os.fdopen(fd, 'wb') as fp:
+                shutil.copyfileobj(file.stream, fp, 1024 * 1024)
+            return cpu_pool.run(parse_param_file, path, file.filename, sheet_name)
+        finally:
+            os.unlink(path)
+
+    def iter_param_batches(
+        self,
+        file_content: BinaryIO,
+        sheet_name: Optional[str] = None,
+        batch_size: int = PARSE_BATCH_SIZE,
+        report: Optional[Dict[str, Any]] = None,
+        file_name: Optional[str] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        流式解析参数文件，按批产出已校验的行，内存占用与批大小相关而与总行数无关
 
-            return self._parse_sheet(ws, self.OUTPUT_COLUMN_MAPPING, 'outputKey')
+        Args:
+            file_content: 文件内容
+            sheet_name: 工作表名称
+            batch_size: 每批行数
+            report: 传入时收集 errors / warnings / warningCount / rowCount
+            file_name: 原始文件名
+        """
+        report = report if report is not None else self._new_report()
+        rows = self._iter_file_rows(file_content, sheet_name, file_name)
+        return self._iter_item_batches(rows, self.PARAM_COLUMN_MAPPING, 'paramKey', report, batch_size)
 
+    def _parse_file(
+        self,
+        file_content: BinaryIO,
+        sheet_name: Optional[str],
+        file_name: Optional[str],
+        column_mapping: Dict[str, str],
+        key_field: str,
+        failure_key: str
+    ) -> Dict[str, Any]:
+        report = self._new_report()
+        items: List[Dict[str, Any]] = []
+        try:
+            rows = self._iter_file_rows(file_content, sheet_name, file_name)
+            for batch in self._iter_item_batches(rows, column_mapping, key_field, report, PARSE_BATCH_SIZE):
+                items.extend(batch)
         except InvalidFileException:
             return {
                 'success': False,
-                'outputs': [],
+                failure_key: [],
                 'errors': [{'type': 'invalid_file', 'message': '无效的Excel文件格式'}],
                 'warnings': []
             }
         except Exception as e:
             return {
                 'success': False,
-                'outputs': [],
+                failure_key: [],
                 'errors': [{'type': 'parse_error', 'message': f'解析失败: {str(e)}'}],
                 'warnings': []
             }
 
-    def _parse_sheet(
+        if report['errors']:
+            return {'success': False, 'items': [], 'errors': report['errors'], 'warnings': report['warnings']}
+        return {
+            'success': True,
+            'items': items,
+            'errors': report['errors'],
+            'warnings': report['warnings'],
+            'warningCount': report['warningCount'],
+            'rowCount': len(items)
+        }
+
+    @staticmethod
+    def _new_report() -> Dict[str, Any]:
+        return {'errors': [], 'warnings': [], 'warningCount': 0, 'rowCount': 0}
+
+    @staticmethod
+    def _add_warning(report: Dict[str, Any], warning: Dict[str, Any]) -> None:
+        """记录警告；超过 MAX_REPORTED_WARNINGS 条后只计数"""
+        report['warningCount'] += 1
+        if len(report['warnings']) < MAX_REPORTED_WARNINGS:
+            report['warnings'].append(warning)
+
+    def _iter_file_rows(
+        self,
+        file_content: BinaryIO,
+        sheet_name: Optional[str],
+        file_name: Optional[str] = None
+    ) -> Iterator[Sequence[Any]]:
+        """按行产出单元格值元组；.csv 走原生 CSV 解析，其余按 xlsx 只读模式读取"""
+        file_name = file_name or getattr(file_content, 'filename', None) or ''
+        if file_name.lower().endswith('.csv'):
+            yield from self._iter_csv_rows(getattr(file_content, 'stream', file_content))
+            return
+
+        wb = load_workbook(filename=file_content, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet_name] if sheet_name and sheet_name in wb.sheetnames else wb.active
+            yield from ws.iter_rows(values_only=True)
+        finally:
+            wb.close()
+
+    def _iter_csv_rows(self, stream: BinaryIO) -> Iterator[List[Any]]:
+        """CSV 按行读取，编码只根据文件开头的样本检测；数值样式的单元格转为数值"""
+        sample = stream.read(CSV_ENCODING_SAMPLE_BYTES)
+        if sample.startswith(codecs.BOM_UTF8):
+            encoding = 'utf-8-sig'
+        else:
+            encoding = self.detect_file_encoding(sample) or 'utf-8'
+            if encoding.lower() == 'ascii':
+                encoding = 'utf-8'
+        stream.seek(0)
+        text = io.TextIOWrapper(stream, encoding=encoding, errors='replace', newline='')
+        try:
+            for row in csv.reader(text):
+                yield [_coerce_csv_cell(cell) for cell in row]
+        finally:
+            text.detach()
+
+    def _build_header_plan(
         self,
-        ws,
+        header_row: Sequence[Any],
         column_mapping: Dict[str, str],
-        key_field: str
-    ) -> Dict[str, Any]:
+        report: Dict[str, Any]
+    ) -> List[Tuple[int, str]]:
+        """表头 -> [(列下标, 标准字段名)]，数据行按该计划取值"""
+        plan: List[Tuple[int, str]] = []
+        for col_idx, header_value in enumerate(header_row):
+            raw_header = self._clean_cell_value(header_value)
+            if not raw_header:
+                continue
+            raw_header = str(raw_header)
+            normalized = raw_header.lower().strip()
+            if normalized in column_mapping:
+                plan.append((col_idx, column_mapping[normalized]))
+            else:
+                # 未识别的列，保留原名
+                plan.append((col_idx, raw_header))
+                self._add_warning(report, {
+                    'type': 'unknown_column',
+                    'column': raw_header,
+                    'message': f'未识别的列名: {raw_header}'
+                })
+        return plan
+
+    def _iter_item_batches(
+        self,
+        rows: Iterator[Sequence[Any]],
+        column_mapping: Dict[str, str],
+        key_field: str,
+        report: Dict[str, Any],
+        batch_size: int
+    ) -> Iterator[List[Dict[str, Any]]]:
         """
-        解析工作表
+        解析数据行并按批产出
 
         Args:
-            ws: 工作表对象
+            rows: 行迭代器（第一行为表头）
             column_mapping: 列名映射
             key_field: 主键字段名
-
-        Returns:
-            解析结果
+            report: 错误/警告收集
+            batch_size: 每批行数
         """
-        errors = []
-        warnings = []
-        items = []
-
-        # 读取表头（第一行）
-        headers = []
-        header_mapping = {}  # 列索引 -> 标准字段名
-
-        for col_idx, cell in enumerate(ws[1], start=1):
-            raw_header = self._clean_cell_value(cell.value)
-            if raw_header:
-                headers.append(raw_header)
-                # 查找映射
-                normalized = raw_header.lower().strip()
-                if normalized in column_mapping:
-                    header_mapping[col_idx] = column_mapping[normalized]
-                else:
-                    # 未识别的列，保留原名
-                    header_mapping[col_idx] = raw_header
-                    warnings.append({
-                        'type': 'unknown_column',
-                        'column': raw_header,
-                        'message': f'未识别的列名: {raw_header}'
-                    })
-
-        if not header_mapping:
-            errors.append({'type': 'no_headers', 'message': '未找到有效的表头'})
-            return {'success': False, 'items': [], 'errors': errors, 'warnings': warnings}
+        header_row = next(rows, None)
+        plan = self._build_header_plan(header_row or (), column_mapping, report)
+        if not plan:
+            report['errors'].append({'type': 'no_headers', 'message': '未找到有效的表头'})
+            return
 
         # 检查是否有主键列
-        has_key_field = key_field in header_mapping.values()
-        if not has_key_field:
-            errors.append({
+        if key_field not in {field for _, field in plan}:
+            report['errors'].append({
                 'type': 'missing_key_column',
                 'message': f'缺少必需的列: {key_field}'
             })
-            return {'success': False, 'items': [], 'errors': errors, 'warnings': warnings}
+            return
 
+        clean = self._clean_cell_value
+        batch: List[Dict[str, Any]] = []
         # 读取数据行（从第2行开始）
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2), start=2):
+        for row_idx, row in enumerate(rows, start=2):
             item = {}
             has_data = False
-
-            for col_idx, cell in enumerate(row, start=1):
-                if col_idx in header_mapping:
-                    field_name = header_mapping[col_idx]
-                    value = self._clean_cell_value(cell.value)
-                    if value is not None and value != '':
-                        has_data = True
-                    item[field_name] = value
+            width = len(row)
+            for col_idx, field_name in plan:
+                value = clean(row[col_idx]) if col_idx < width else None
+                if value is not None and value != '':
+                    has_data = True
+                item[field_name] = value
 
             # 跳过空行
             if not has_data:
                 continue
 
             # 验证主键
-            key_value = item.get(key_field)
-            if not key_value:
-                warnings.append({
+            if not item.get(key_field):
+                self._add_warning(report, {
                     'type': 'missing_key',
                     'row': row_idx,
                     'message': f'第{row_idx}行缺少{key_field}'
                 })
                 continue
 
-            items.append(item)
+            batch.append(item)
+            report['rowCount'] += 1
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
 
-        return {
-            'success': len(errors) == 0,
-            'items': items,
-            'errors': errors,
-            'warnings': warnings,
-            'rowCount': len(items)
-        }
+        if batch:
+            yield batch
 
     def _clean_cell_value(self, value: Any) -> Any:
         """
@@ -247,23 +410,9 @@ class ExcelParserService:
         if value is None:
             return None
 
-        # 字符串处理
+        # 字符串处理（相同文本命中缓存，不重复清洗）
         if isinstance(value, str):
-            # 去除前后空格（包括全角空格）
-            cleaned = value.strip().strip('\u3000')
-
-            # 去除不可见字符
-            cleaned = ''.join(char for char in cleaned if char.isprintable() or char in '\n\r\t')
-
-            # 处理可能的编码问题
-            try:
-                # 尝试检测并修复编码
-                if self._has_encoding_issue(cleaned):
-                    cleaned = self._fix_encoding(cleaned)
-            except Exception:
-                pass  # 保持原值
-
-            return cleaned if cleaned else None
+            return _clean_text(value)
 
         # 数值类型保持原样
         if isinstance(value, (int, float)):
@@ -274,27 +423,11 @@ class ExcelParserService:
 
     def _has_encoding_issue(self, text: str) -> bool:
         """检查是否有编码问题"""
-        # 检查是否包含常见的乱码特征
-        garbled_patterns = ['锟斤拷', '烫烫烫', '屯屯屯', '�']
-        return any(p in text for p in garbled_patterns)
+        return _has_encoding_issue(text)
 
     def _fix_encoding(self, text: str) -> str:
         """尝试修复编码问题"""
-        # 常见的编码修复尝试
-        encodings = ['utf-8', 'gbk', 'gb2312', 'gb18030', 'big5']
-
-        for src_enc in encodings:
-            for dst_enc in encodings:
-                if src_enc == dst_enc:
-                    continue
-                try:
-                    fixed = text.encode(src_enc).decode(dst_enc)
-                    if not self._has_encoding_issue(fixed):
-                        return fixed
-                except (UnicodeDecodeError, UnicodeEncodeError):
-                    continue
-
-        return text  # 无法修复，返回原值
+        return _fix_encoding(text)
 
     def detect_file_encoding(self, file_content: bytes) -> str:
         """
@@ -322,3 +455,15 @@ class ExcelParserService:
 
 # 单例
 excel_parser_service = ExcelParserService()
+
+
+def parse_param_file(path: str, file_name: str, sheet_name: Optional[str] = None) -> Dict[str, Any]:
+    """进程池任务：按路径解析参数文件（上传内容先落临时文件，避免整文件经 pickle 传给子进程）"""
+    with open(path, 'rb') as fp:
+        return excel_parser_service.parse_param_excel(fp, sheet_name, file_name=file_name)
+
+
+def parse_output_file(path: str, file_name: str, sheet_name: Optional[str] = None) -> Dict[str, Any]:
+    """进程池任务：按路径解析输出文件"""
+    with open(path, 'rb') as fp:
+        return excel_parser_service.parse_output_excel(fp, sheet_name, file_name=file_name)
@@ -0,0 +1,208 @@
+"""
+INP set 提取
+mmap 打开 INP 文件，用一个以换行开头的组合关键字正则直接扫描字节（字面量前缀走快速查找，不逐行解码）；
+大文件按行边界切分为若干段提交到进程池并行扫描，结果按 (真实路径, 大小, mtime) 缓存到 Redis 与磁盘，
+同一模型重复校验时不再解析。
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+from app.common.cache_service import CacheKeys, ConfigCache
+from app.common.cpu_pool import cpu_pool
+from app.common.errors import BusinessError
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本（提取规则变化时递增，旧缓存自然失效）
+INP_SETS_CACHE_VERSION = 1
+
+# 关键字行：*ELSET, ELSET=name / *NSET, NSET=name / *PART, NAME=name / *INSTANCE, NAME=name
+# 以 \n 开头便于正则引擎按字面量快速定位；文件首行单独用不带换行的版本匹配
+_KEYWORD_BODY = (
+    rb'[ \t]*\*(?:(ELSET)\b[^\n]*?ELSET|(NSET)\b[^\n]*?NSET|(?:PART|INSTANCE)\b[^\n]*?NAME)'
+    rb'[ \t]*=[ \t]*([^\s,]+)'
+)
+_KEYWORD_PATTERN = re.compile(rb'\n' + _KEYWORD_BODY, re.IGNORECASE)
+_FIRST_LINE_PATTERN = re.compile(_KEYWORD_BODY, re.IGNORECASE)
+
+InpSetKey = Tuple[str, str]
+
+
+def _set_type(match: re.Match) -> str:
+    if match.group(1):
+        return 'eleset'
+    if match.group(2):
+        return 'nodeset'
+    return 'component'
+
+
+def _open_mmap(fp) -> Optional[mmap.mmap]:
+    if os.fstat(fp.fileno()).st_size == 0:
+        return None
+    return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def scan_inp_segment(file_path: str, start: int, end: int) -> List[InpSetKey]:
+    """扫描 [start, end) 内起始的关键字行，返回段内去重后的 (type, name)
+
+    start/end 须位于行首（0、文件末尾或紧跟 \\n 的位置）；关键字行不跨行，因此不会被相邻两段重复统计。
+    """
+    keys: List[InpSetKey] = []
+    seen: set = set()
+
+    def add(match) -> None:
+        key = (_set_type(match), match.group(3).decode('utf-8', errors='ignore').strip())
+        if key[1] and key not in seen:
+            seen.add(key)
+            keys.append(key)
+
+    with open(file_path, 'rb') as fp:
+        mm = _open_mmap(fp)
+        if mm is None:
+            return keys
+        with mm:
+            end = min(end, len(mm))
+            if start == 0:
+                first = _FIRST_LINE_PATTERN.match(mm, 0, end)
+                if first:
+                    add(first)
+            for match in _KEYWORD_PATTERN.finditer(mm, max(start - 1, 0), end):
+                add(match)
+    return keys
+
+
+def split_inp_segments(file_path: str, parts: int) -> List[Tuple[int, int]]:
+    """按行边界把文件切成至多 parts 段"""
+    size = os.path.getsize(file_path)
+    if parts <= 1 or size == 0:
+        return [(0, size)]
+    bounds = [0]
+    with open(file_path, 'rb') as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for index in range(1, parts):
+            newline = mm.find(b'\n', max(size * index // parts, bounds[-1]))
+            if newline < 0 or newline + 1 >= size:
+                break
+            bounds.append(newline + 1)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def merge_inp_sets(segments: List[List[InpSetKey]]) -> List[Dict]:
+    """按段顺序合并，跨段去重（保留首次出现的位置）"""
+    sets: List[Dict] = []
+    seen: set = set()
+    for keys in segments:
+        for key in keys:
+            if key not in seen:
+                seen.add(key)
+                sets.append({'type': key[0], 'name': key[1]})
+    return sets
+
+
+def scan_inp_sets(file_path: str) -> List[Dict]:
+    """单进程扫描整个文件"""
+    return merge_inp_sets([scan_inp_segment(file_path, 0, os.path.getsize(file_path))])
+
+
+class InpSetIndex:
+    """INP set 提取结果缓存
+
+    缓存 key 为 sha1(真实路径:大小:mtime_ns)，文件被覆盖或修改后自然失效；
+    Redis 不可用时读写 {UPLOAD_FOLDER}/.cache/inp_sets 下的 JSON 文件。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None) -> None:
+        self._cache_dir = cache_dir
+
+    @property
+    def cache_dir(self) -> Path:
+        if self._cache_dir:
+            return Path(self._cache_dir)
+        upload_folder = current_app.config.get('UPLOAD_FOLDER', './storage') if has_app_context() else './storage'
+        return Path(upload_folder) / '.cache' / 'inp_sets'
+
+    @staticmethod
+    def _config(name: str, default: int) -> int:
+        return int(current_app.config.get(name, default)) if has_app_context() else default
+
+    @staticmethod
+    def fingerprint(file_path: str) -> str:
+        real_path = os.path.realpath(file_path)
+        stat = os.stat(real_path)
+        raw = f'v{INP_SETS_CACHE_VERSION}:{real_path}:{stat.st_size}:{stat.st_mtime_ns}'
+        return hashlib.sha1(raw.encode('utf-8', errors='surrogateescape')).hexdigest()
+
+    def get(self, file_path: str) -> List[Dict]:
+        """返回文件中的 set 列表，命中缓存时不读取文件内容；读取失败时返回空列表且不写缓存
+
+        Raises:
+            BusinessError: 进程池繁忙或解析超时
+        """
+        digest = self.fingerprint(file_path)
+        cached = self._load(digest)
+        if cached is not None:
+            return cached
+        try:
+            sets = self.scan(file_path)
+        except BusinessError:
+            raise
+        except Exception as e:
+            logger.warning(f"解析 INP 文件失败: {file_path}, {e}")
+            return []
+        self._store(digest, sets)
+        return sets
+
+    def scan(self, file_path: str) -> List[Dict]:
+        """大于 INP_SCAN_PARALLEL_MIN_BYTES 且进程池可用时分段并行扫描，否则整文件提交一个任务"""
+        size = os.path.getsize(file_path)
+        min_bytes = self._config('INP_SCAN_PARALLEL_MIN_BYTES', 64 * 1024 * 1024)
+        parts = min(cpu_pool.parallelism, size // min_bytes if min_bytes > 0 else 1)
+        if parts <= 1:
+            return cpu_pool.run(scan_inp_sets, file_path)
+        segments = split_inp_segments(file_path, parts)
+        return merge_inp_sets(cpu_pool.run_many(
+            scan_inp_segment, [(file_path, start, end) for start, end in segments]
+        ))
+
+    def _load(self, digest: str) -> Optional[List[Dict]]:
+        cached = ConfigCache.get(CacheKeys.inp_sets(digest))
+        if isinstance(cached, list):
+            return cached
+        path = self.cache_dir / digest[:2] / f'{digest}.json'
+        try:
+            with open(path, 'r', encoding='utf-8') as fp:
+                sets = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(sets, list):
+            return None
+        ConfigCache.set(CacheKeys.inp_sets(digest), sets, self._config('INP_SETS_CACHE_TTL', 7 * 24 * 3600))
+        return sets
+
+    def _store(self, digest: str, sets: List[Dict]) -> None:
+        ConfigCache.set(CacheKeys.inp_sets(digest), sets, self._config('INP_SETS_CACHE_TTL', 7 * 24 * 3600))
+        path = self.cache_dir / digest[:2] / f'{digest}.json'
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+                json.dump(sets, fp, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入 INP set 缓存失败: {path}, {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+# 全局实例
+inp_set_index = InpSetIndex()
@@ -1,18 +1,36 @@
 from typing import Dict, List, Optional, Tuple
 import time
 
-from sqlalchemy import desc, func, inspect
-from sqlalchemy.orm import defer
+from sqlalchemy import and_, case, desc, func, insert, inspect, or_, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import defer, load_only
 from sqlalchemy.orm.attributes import set_committed_value
 
 from app.extensions import db
-from app.models.case_opti import CaseConditionOpti, OrderCaseOpti
-from app.models.order import Order, OrderResult
+from app.models.case_opti import AutomationOutbox, CaseConditionOpti, OrderCaseOpti
+from app.models.order import Order, OrderResult, OrderSimType, UserDailyRoundUsage
+
+
+ORDER_NO_PREFIX = 'ORD'
+ORDER_SEARCH_FULLTEXT_INDEX = 'ft_orders_search_text'
+FULLTEXT_MIN_TERM_LENGTH = 2
+# 差量同步时保留的自动化运行字段（提交结果、进度、统计）
+CASE_CONDITION_RUNTIME_COLUMNS = frozenset({
+    'opt_issue_id', 'opt_job_id', 'opt_condition_config_id', 'running_module', 'process', 'status',
+    'statistics_json', 'result_summary_json', 'external_meta', 'created_at', 'updated_at',
+})
 
 
 class OrdersRepository:
     """订单模块数据访问层。"""
 
+    _fulltext_available: Optional[bool] = None
+    # orders 表实际列名（按数据库 URL 缓存，每个进程只反射一次）
+    _order_columns_cache: Dict[str, frozenset] = {}
+    # 已确认存在的表名（按数据库 URL 缓存；不存在的表每次重新检查，迁移后无需重启即可生效）
+    _present_tables_cache: Dict[str, set] = {}
+
     @staticmethod
     def _is_memory_sqlite() -> bool:
         try:
@@ -20,29 +38,77 @@ class OrdersRepository:
         except Exception:
             return False
 
-    @staticmethod
-    def _order_column_names() -> set[str]:
-        if OrdersRepository._is_memory_sqlite():
-            return {column.name for column in Order.__table__.columns}
+    @classmethod
+    def _order_column_names(cls) -> frozenset:
+        if cls._is_memory_sqlite():
+            return frozenset(column.name for column in Order.__table__.columns)
         try:
-            return {col.get('name') for col in inspect(db.engine).get_columns('orders')}
+            url = str(db.engine.url)
+            columns = cls._order_columns_cache.get(url)
+            if columns is None:
+                columns = frozenset(col.get('name') for col in inspect(db.engine).get_columns('orders'))
+                cls._order_columns_cache[url] = columns
+            return columns
         except Exception:
-            return set()
+            return frozenset()
 
     @classmethod
     def _has_order_column(cls, column_name: str) -> bool:
         columns = cls._order_column_names()
         return not columns or column_name in columns
 
-    @staticmethod
-    def _has_case_opti_tables() -> bool:
-        if OrdersRepository._is_memory_sqlite():
+    @classmethod
+    def _has_tables(cls, *table_names: str) -> Optional[bool]:
+        """表是否都存在；已确认存在的表按数据库 URL 缓存，只有尚未确认时才反射（反射失败返回 None）"""
+        if cls._is_memory_sqlite():
             return True
         try:
-            table_names = set(inspect(db.engine).get_table_names())
-            return {'order_case_opti', 'case_condition_opti'}.issubset(table_names)
+            url = str(db.engine.url)
+            present = cls._present_tables_cache.setdefault(url, set())
+            if present.issuperset(table_names):
+                return True
+            existing = set(inspect(db.engine).get_table_names())
         except Exception:
-            return True
+            return None
+        present.update(name for name in table_names if name in existing)
+        return present.issuperset(table_names)
+
+    @classmethod
+    def _has_case_opti_tables(cls) -> bool:
+        available = cls._has_tables('order_case_opti', 'case_condition_opti')
+        return True if available is None else available
+
+    @classmethod
+    def _has_order_sim_types_table(cls) -> bool:
+        return bool(cls._has_tables('order_sim_types'))
+
+    @classmethod
+    def _has_automation_outbox_table(cls) -> bool:
+        return bool(cls._has_tables('automation_outbox'))
+
+    @staticmethod
+    def _normalize_sim_type_ids(sim_type_ids) -> List[int]:
+        normalized: List[int] = []
+        for value in sim_type_ids or []:
+            try:
+                sim_type_id = int(value)
+            except (TypeError, ValueError):
+                continue
+            if sim_type_id > 0 and sim_type_id not in normalized:
+                normalized.append(sim_type_id)
+        return normalized
+
+    @classmethod
+    def _sync_order_sim_types(cls, order_id: int, sim_type_ids) -> None:
+        """按 orders.sim_type_ids 重写关联表，和订单写入同一事务。"""
+        if not cls._has_order_sim_types_table():
+            return
+        normalized = cls._normalize_sim_type_ids(sim_type_ids)
+        OrderSimType.query.filter_by(order_id=order_id).delete(synchronize_session=False)
+        if normalized:
+            db.session.add_all(
+                OrderSimType(order_id=order_id, sim_type_id=sim_type_id) for sim_type_id in normalized
+            )
 
     @classmethod
     def _base_query(cls):
@@ -57,6 +123,99 @@ class OrdersRepository:
             query = query.options(defer(Order.base_dir))
         if not cls._has_order_column('phase_id'):
             query = query.options(defer(Order.phase_id))
+        return query.options(defer(Order.search_text))
+
+    @classmethod
+    def _project(cls, query, columns: Optional[List[str]]):
+        """字段投影：只 SELECT 需要的列（主键总会带上）。"""
+        if not columns:
+            return query
+        existing = cls._order_column_names()
+        loadable = [getattr(Order, name) for name in columns if not existing or name in existing]
+        return query.options(load_only(*loadable)) if loadable else query
+
+    @staticmethod
+    def _fulltext_uses_ngram(create_table_sql: str) -> bool:
+        """SHOW CREATE TABLE 中检索全文索引是否使用 ngram 解析器（默认分词匹配不到中文与子串）。"""
+        return any(
+            f'`{ORDER_SEARCH_FULLTEXT_INDEX}`' in line and 'WITH PARSER `ngram`' in line
+            for line in create_table_sql.splitlines()
+        )
+
+    @classmethod
+    def _has_search_fulltext(cls) -> bool:
+        if cls._fulltext_available is None:
+            try:
+                available = db.engine.dialect.name == 'mysql' and cls._fulltext_uses_ngram(
+                    db.session.execute(text('SHOW CREATE TABLE orders')).fetchone()[1]
+                )
+            except Exception:
+                return False
+            cls._fulltext_available = available
+        return cls._fulltext_available
+
+    @staticmethod
+    def build_search_text(remark, condition_summary) -> str:
+        """检索文本 = 备注 + 工况概览中的姿态名/仿真类型名。"""
+        parts = [str(remark or '').strip()]
+        if isinstance(condition_summary, dict):
+            for fold_name, sim_names in condition_summary.items():
+                parts.append(str(fold_name))
+                if isinstance(sim_names, list):
+                    parts.extend(str(name) for name in sim_names)
+        return ' '.join(part for part in parts if part)
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    @classmethod
+    def _order_no_clause(cls, term: str):
+        """订单号以 ORD 开头时走唯一索引前缀匹配，否则保留包含匹配。"""
+        if term.upper().startswith(ORDER_NO_PREFIX):
+            return Order.order_no.like(f'{cls._escape_like(term)}%', escape='\\')
+        return Order.order_no.ilike(f'%{cls._escape_like(term)}%', escape='\\')
+
+    @classmethod
+    def _search_text_clause(cls, term: str):
+        """全文索引可用且词长满足 ngram 要求时用 MATCH，否则退回 LIKE。"""
+        pattern = f'%{cls._escape_like(term)}%'
+        if cls._has_search_fulltext() and len(term) >= FULLTEXT_MIN_TERM_LENGTH:
+            # 全文索引缩小范围，再按包含语义复核
+            phrase = '"' + term.replace('"', ' ') + '"'
+            return and_(
+                match(Order.search_text, against=phrase).in_boolean_mode(),
+                Order.search_text.ilike(pattern, escape='\\'),
+            )
+        if cls._has_order_column('search_text'):
+            return Order.search_text.ilike(pattern, escape='\\')
+        return Order.remark.ilike(pattern, escape='\\')
+
+    @classmethod
+    def _apply_text_search(
+        cls,
+        query,
+        order_no: Optional[str] = None,
+        remark: Optional[str] = None,
+        keyword: Optional[str] = None,
+    ):
+        """订单号/备注/关键字检索的查询规划，尽量落到索引路径上。"""
+        order_no = (order_no or '').strip()
+        remark = (remark or '').strip()
+        keyword = (keyword or '').strip()
+
+        if order_no:
+            query = query.filter(cls._order_no_clause(order_no))
+        if remark:
+            if cls._has_search_fulltext() and len(remark) >= FULLTEXT_MIN_TERM_LENGTH:
+                # 全文索引先缩小范围，再按备注原语义复核
+                query = query.filter(cls._search_text_clause(remark))
+            query = query.filter(Order.remark.ilike(f'%{cls._escape_like(remark)}%', escape='\\'))
+        if keyword:
+            if keyword.upper().startswith(ORDER_NO_PREFIX):
+                query = query.filter(cls._order_no_clause(keyword))
+            else:
+                query = query.filter(cls._search_text_clause(keyword))
         return query
 
     @classmethod
@@ -73,7 +232,38 @@ class OrdersRepository:
         remark: Optional[str] = None,
         start_date: Optional[int] = None,
         end_date: Optional[int] = None,
+        keyword: Optional[str] = None,
     ) -> Tuple[List[Order], int]:
+        filters = dict(
+            status=status,
+            project_id=project_id,
+            sim_type_id=sim_type_id,
+            order_no=order_no,
+            domain_account=domain_account,
+            created_by=created_by,
+            remark=remark,
+            start_date=start_date,
+            end_date=end_date,
+            keyword=keyword,
+        )
+        total = cls.count_orders(**filters)
+        orders, _has_more = cls.list_orders(limit=page_size, offset=(page - 1) * page_size, **filters)
+        return orders, total
+
+    @classmethod
+    def _filtered_query(
+        cls,
+        status: Optional[int] = None,
+        project_id: Optional[int] = None,
+        sim_type_id: Optional[int] = None,
+        order_no: Optional[str] = None,
+        domain_account: Optional[str] = None,
+        created_by: Optional[str] = None,
+        remark: Optional[str] = None,
+        start_date: Optional[int] = None,
+        end_date: Optional[int] = None,
+        keyword: Optional[str] = None,
+    ):
         query = cls._base_query()
 
         if status is not None:
@@ -87,31 +277,64 @@ class OrdersRepository:
                 query = query.filter_by(created_by=domain_account)
         if created_by is not None:
             query = query.filter_by(created_by=created_by)
-        if order_no is not None:
-            query = query.filter(Order.order_no.ilike(f'%{order_no}%'))
-        if remark is not None:
-            query = query.filter(Order.remark.ilike(f'%{remark}%'))
+        query = cls._apply_text_search(query, order_no=order_no, remark=remark, keyword=keyword)
         if sim_type_id is not None:
-            query = query.filter(Order.sim_type_ids.contains([sim_type_id]))
+            if cls._has_order_sim_types_table():
+                query = query.filter(
+                    Order.id.in_(
+                        db.session.query(OrderSimType.order_id).filter(OrderSimType.sim_type_id == sim_type_id)
+                    )
+                )
+            else:
+                query = query.filter(Order.sim_type_ids.contains([sim_type_id]))
         if start_date is not None:
             query = query.filter(Order.created_at >= start_date)
         if end_date is not None:
             query = query.filter(Order.created_at <= end_date)
+        return query
 
-        total = query.order_by(None).with_entities(func.count(Order.id)).scalar() or 0
-        orders = query.order_by(desc(Order.created_at)).offset(
-            (page - 1) * page_size
-        ).limit(page_size).all()
-        return orders, total
+    @classmethod
+    def count_orders(cls, **filters) -> int:
+        query = cls._filtered_query(**filters)
+        return query.order_by(None).with_entities(func.count(Order.id)).scalar() or 0
 
     @classmethod
-    def get_order_by_id(cls, order_id: int) -> Optional[Order]:
-        return cls._base_query().filter(Order.id == order_id).first()
+    def list_orders(
+        cls,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[int, int]] = None,
+        columns: Optional[List[str]] = None,
+        **filters,
+    ) -> Tuple[List[Order], bool]:
+        """按 (created_at DESC, id DESC) 取一页订单，after 为上一页最后一行的排序键。"""
+        query = cls._project(cls._filtered_query(**filters), columns)
+        if after is not None:
+            after_created_at, after_id = after
+            query = query.filter(
+                or_(
+                    Order.created_at < after_created_at,
+                    and_(Order.created_at == after_created_at, Order.id < after_id),
+                )
+            )
+        query = query.order_by(desc(Order.created_at), desc(Order.id))
+        if offset > 0:
+            query = query.offset(offset)
+        rows = query.limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    @classmethod
+    def get_order_by_id(cls, order_id: int, columns: Optional[List[str]] = None) -> Optional[Order]:
+        return cls._project(cls._base_query(), columns).filter(Order.id == order_id).first()
 
     @classmethod
     def create_order(cls, order_data: dict) -> Order:
+        order_data = {
+            **order_data,
+            'search_text': cls.build_search_text(order_data.get('remark'), order_data.get('condition_summary')),
+        }
         missing_columns = {
-            name for name in ('condition_summary', 'opt_issue_id', 'domain_account', 'base_dir', 'phase_id')
+            name for name in ('condition_summary', 'opt_issue_id', 'domain_account', 'base_dir', 'phase_id', 'search_text')
             if name in order_data and not cls._has_order_column(name)
         }
         if missing_columns:
@@ -119,8 +342,88 @@ class OrdersRepository:
         order = Order(**order_data)
         db.session.add(order)
         db.session.flush()
+        cls._sync_order_sim_types(order.id, order.sim_type_ids)
         return order
 
+    @classmethod
+    def bulk_create_orders(cls, orders_data: List[dict]) -> Dict[str, int]:
+        """批量插入订单（executemany），按唯一 order_no 回查主键，返回 {order_no: id}。"""
+        missing_columns = {
+            name for name in ('condition_summary', 'opt_issue_id', 'domain_account', 'base_dir', 'phase_id', 'search_text')
+            if not cls._has_order_column(name)
+        }
+        rows = []
+        for order_data in orders_data:
+            row = {
+                **order_data,
+                'search_text': cls.build_search_text(order_data.get('remark'), order_data.get('condition_summary')),
+            }
+            rows.append({key: value for key, value in row.items() if key not in missing_columns})
+        db.session.execute(insert(Order), rows)
+
+        order_nos = [row['order_no'] for row in rows]
+        order_ids = {
+            order_no: order_id
+            for order_id, order_no in db.session.query(Order.id, Order.order_no).filter(Order.order_no.in_(order_nos))
+        }
+        if cls._has_order_sim_types_table():
+            junction_rows = [
+                {'order_id': order_ids[row['order_no']], 'sim_type_id': sim_type_id}
+                for row in rows
+                for sim_type_id in cls._normalize_sim_type_ids(row.get('sim_type_ids'))
+            ]
+            if junction_rows:
+                db.session.execute(insert(OrderSimType), junction_rows)
+        return order_ids
+
+    @classmethod
+    def bulk_insert_case_conditions(cls, rows: List[dict]) -> Dict[int, List[int]]:
+        """为新订单批量插入 case/condition（各一次 executemany），返回 {order_id: [order_case_id, ...]}。"""
+        if not cls._has_case_opti_tables() or not rows:
+            return {}
+
+        first_rows: Dict[Tuple[int, int], dict] = {}
+        for row in rows:
+            first_rows.setdefault((int(row['order_id']), int(row.get('case_index') or 1)), row)
+        db.session.execute(insert(OrderCaseOpti), [
+            {
+                'order_id': order_id,
+                'order_no': first_row.get('order_no'),
+                'case_index': case_index,
+                'case_name': first_row.get('case_name') or f'Case-{case_index}',
+                'opt_issue_id': first_row.get('opt_issue_id') or 0,
+                'opt_job_id': first_row.get('opt_job_id'),
+                'parameter_scope': first_row.get('parameter_scope') or 'per_condition',
+                'case_snapshot': first_row.get('case_snapshot'),
+                'external_meta': first_row.get('external_meta'),
+                'status': first_row.get('status') or 0,
+                'process': first_row.get('process') or 0,
+                'created_at': first_row.get('created_at'),
+                'updated_at': first_row.get('updated_at'),
+            }
+            for (order_id, case_index), first_row in first_rows.items()
+        ])
+
+        order_ids = sorted({order_id for order_id, _case_index in first_rows})
+        case_ids = {
+            (int(order_id), int(case_index)): case_id
+            for case_id, order_id, case_index in db.session.query(
+                OrderCaseOpti.id, OrderCaseOpti.order_id, OrderCaseOpti.case_index
+            ).filter(OrderCaseOpti.order_id.in_(order_ids))
+        }
+        db.session.execute(insert(CaseConditionOpti), [
+            CaseConditionOpti.storage_values({
+                **{key: value for key, value in row.items() if key not in ('case_name', 'case_snapshot')},
+                'order_case_id': case_ids[(int(row['order_id']), int(row.get('case_index') or 1))],
+            })
+            for row in rows
+        ])
+
+        cases_by_order: Dict[int, List[int]] = {}
+        for (order_id, _case_index), case_id in sorted(case_ids.items()):
+            cases_by_order.setdefault(order_id, []).append(case_id)
+        return cases_by_order
+
     @classmethod
     def get_orders_by_creator_between(cls, created_by: str, start_ts: int, end_ts: int) -> List[Order]:
         return cls._base_query().filter(
@@ -129,6 +432,65 @@ class OrdersRepository:
             Order.created_at <= end_ts,
         ).all()
 
+    @staticmethod
+    def get_daily_round_usage(domain_account: str, usage_date: int) -> Optional[int]:
+        row = UserDailyRoundUsage.query.filter_by(
+            domain_account=domain_account,
+            usage_date=usage_date,
+        ).first()
+        return int(row.used_rounds or 0) if row else None
+
+    @staticmethod
+    def ensure_daily_round_usage(domain_account: str, usage_date: int, initial_rounds: int) -> None:
+        """当日计数行不存在时插入；并发插入冲突由唯一键兜底。"""
+        exists = db.session.query(UserDailyRoundUsage.id).filter_by(
+            domain_account=domain_account,
+            usage_date=usage_date,
+        ).first()
+        if exists:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(UserDailyRoundUsage(
+                    domain_account=domain_account,
+                    usage_date=usage_date,
+                    used_rounds=max(int(initial_rounds), 0),
+                ))
+        except IntegrityError:
+            pass
+
+    @staticmethod
+    def try_reserve_daily_rounds(domain_account: str, usage_date: int, rounds: int, limit: int) -> bool:
+        """条件原子累加：累加后不超过上限才成功，行锁持有到事务提交。"""
+        updated = db.session.query(UserDailyRoundUsage).filter(
+            UserDailyRoundUsage.domain_account == domain_account,
+            UserDailyRoundUsage.usage_date == usage_date,
+            UserDailyRoundUsage.used_rounds + rounds <= limit,
+        ).update(
+            {
+                UserDailyRoundUsage.used_rounds: UserDailyRoundUsage.used_rounds + rounds,
+                UserDailyRoundUsage.updated_at: int(time.time()),
+            },
+            synchronize_session=False,
+        )
+        return updated > 0
+
+    @staticmethod
+    def adjust_daily_round_usage(domain_account: str, usage_date: int, delta: int) -> None:
+        if not delta:
+            return
+        next_value = UserDailyRoundUsage.used_rounds + delta
+        db.session.query(UserDailyRoundUsage).filter(
+            UserDailyRoundUsage.domain_account == domain_account,
+            UserDailyRoundUsage.usage_date == usage_date,
+        ).update(
+            {
+                UserDailyRoundUsage.used_rounds: case((next_value < 0, 0), else_=next_value),
+                UserDailyRoundUsage.updated_at: int(time.time()),
+            },
+            synchronize_session=False,
+        )
+
     @classmethod
     def get_recent_orders_by_project(cls, project_id: int, limit: int = 100) -> List[Order]:
         return (
@@ -141,8 +503,16 @@ class OrdersRepository:
 
     @classmethod
     def update_order(cls, order: Order, update_data: dict) -> Order:
+        if 'remark' in update_data or 'condition_summary' in update_data:
+            update_data = {
+                **update_data,
+                'search_text': cls.build_search_text(
+                    update_data.get('remark', order.remark),
+                    update_data.get('condition_summary', order.__dict__.get('condition_summary')),
+                ),
+            }
         missing_columns = {
-            name for name in ('condition_summary', 'opt_issue_id', 'domain_account', 'base_dir', 'phase_id')
+            name for name in ('condition_summary', 'opt_issue_id', 'domain_account', 'base_dir', 'phase_id', 'search_text')
             if name in update_data and not cls._has_order_column(name)
         }
         if missing_columns:
@@ -155,6 +525,8 @@ class OrdersRepository:
         for key, value in update_data.items():
             if hasattr(order, key):
                 set_committed_value(order, key, value)
+        if 'sim_type_ids' in update_data and getattr(order, 'id', None):
+            cls._sync_order_sim_types(order.id, update_data['sim_type_ids'])
         db.session.flush()
         return order
 
@@ -209,6 +581,124 @@ class OrdersRepository:
         db.session.flush()
         return condition_entities
 
+    @staticmethod
+    def _case_condition_key(case_index, condition_id, fold_type_id, sim_type_id) -> Tuple[int, int, int, int]:
+        return int(case_index or 1), int(condition_id or 0), int(fold_type_id or 0), int(sim_type_id or 0)
+
+    @classmethod
+    def upsert_case_conditions(cls, order_id: int, rows: List[dict]) -> List[CaseConditionOpti]:
+        """按 (case_index, condition_id, fold_type_id, sim_type_id) 差量同步 case/condition。
+
+        只插入新增、删除消失、更新内容有变化的行；已提交的 opt_job_id、
+        状态与统计等运行字段保持不变。
+        """
+        if not cls._has_case_opti_tables():
+            return []
+
+        now = int(time.time())
+        existing_cases = {
+            int(item.case_index or 1): item
+            for item in OrderCaseOpti.query.filter_by(order_id=order_id).all()
+        }
+        existing_conditions = {
+            cls._case_condition_key(item.case_index, item.condition_id, item.fold_type_id, item.sim_type_id): item
+            for item in CaseConditionOpti.query.filter_by(order_id=order_id).all()
+        }
+
+        desired_cases: Dict[int, dict] = {}
+        desired_conditions: Dict[Tuple[int, int, int, int], dict] = {}
+        for row in rows:
+            case_index = int(row.get('case_index') or 1)
+            desired_cases.setdefault(case_index, row)
+            key = cls._case_condition_key(
+                case_index, row.get('condition_id'), row.get('fold_type_id'), row.get('sim_type_id')
+            )
+            desired_conditions[key] = row
+
+        stale_condition_ids = [
+            item.id for key, item in existing_conditions.items() if key not in desired_conditions
+        ]
+        stale_case_ids = [
+            item.id for case_index, item in existing_cases.items() if case_index not in desired_cases
+        ]
+        if stale_condition_ids:
+            CaseConditionOpti.query.filter(CaseConditionOpti.id.in_(stale_condition_ids)).delete(
+                synchronize_session=False
+            )
+        if stale_case_ids:
+            OrderCaseOpti.query.filter(OrderCaseOpti.id.in_(stale_case_ids)).delete(synchronize_session=False)
+
+        case_updates: List[dict] = []
+        new_cases: List[OrderCaseOpti] = []
+        for case_index, first_row in sorted(desired_cases.items()):
+            values = {
+                'order_no': first_row.get('order_no'),
+                'case_name': first_row.get('case_name') or f'Case-{case_index}',
+                'parameter_scope': first_row.get('parameter_scope') or 'per_condition',
+                'case_snapshot': first_row.get('case_snapshot'),
+            }
+            case_entity = existing_cases.get(case_index)
+            if case_entity is None:
+                new_cases.append(OrderCaseOpti(
+                    order_id=order_id,
+                    case_index=case_index,
+                    opt_issue_id=first_row.get('opt_issue_id') or 0,
+                    opt_job_id=first_row.get('opt_job_id'),
+                    external_meta=first_row.get('external_meta'),
+                    status=first_row.get('status') or 0,
+                    process=first_row.get('process') or 0,
+                    created_at=first_row.get('created_at'),
+                    updated_at=first_row.get('updated_at'),
+                    **values,
+                ))
+                continue
+            changed = {key: value for key, value in values.items() if getattr(case_entity, key) != value}
+            if changed:
+                case_updates.append({'id': case_entity.id, 'updated_at': now, **changed})
+        if new_cases:
+            db.session.add_all(new_cases)
+            db.session.flush()
+        case_ids = {item.case_index: item.id for item in new_cases}
+        case_ids.update({index: item.id for index, item in existing_cases.items() if index in desired_cases})
+
+        condition_updates: List[dict] = []
+        condition_inserts: List[dict] = []
+        for key, row in desired_conditions.items():
+            values = {
+                column: value for column, value in row.items()
+                if column not in CASE_CONDITION_RUNTIME_COLUMNS and column not in ('case_name', 'case_snapshot')
+            }
+            values['order_case_id'] = case_ids[key[0]]
+            condition = existing_conditions.get(key)
+            if condition is None:
+                condition_inserts.append(CaseConditionOpti.storage_values({
+                    **{column: value for column, value in row.items() if column not in ('case_name', 'case_snapshot')},
+                    'order_case_id': values['order_case_id'],
+                }))
+                continue
+            changed = {column: value for column, value in values.items() if getattr(condition, column) != value}
+            new_issue_id = int(row.get('opt_issue_id') or 0)
+            if new_issue_id > 0 and new_issue_id != int(condition.opt_issue_id or 0):
+                changed['opt_issue_id'] = new_issue_id
+            if changed:
+                condition_updates.append(
+                    CaseConditionOpti.storage_values({'id': condition.id, 'updated_at': now, **changed})
+                )
+
+        if case_updates:
+            db.session.execute(update(OrderCaseOpti), case_updates)
+        if condition_updates:
+            db.session.execute(update(CaseConditionOpti), condition_updates)
+        if condition_inserts:
+            db.session.execute(insert(CaseConditionOpti), condition_inserts)
+        db.session.flush()
+        return (
+            CaseConditionOpti.query.filter_by(order_id=order_id)
+            .order_by(CaseConditionOpti.case_index.asc(), CaseConditionOpti.id.asc())
+            .execution_options(populate_existing=True)
+            .all()
+        )
+
     @staticmethod
     def get_case_conditions(order_id: int) -> List[CaseConditionOpti]:
         if not OrdersRepository._has_case_opti_tables():
@@ -270,6 +760,109 @@ class OrdersRepository:
         db.session.flush()
         return condition
 
+    @staticmethod
+    def enqueue_automation_outbox(order_id: int, order_case_ids: List[int]) -> bool:
+        """与订单同事务写入待提交记录；outbox 表不存在时返回 False 由调用方同步提交。"""
+        return OrdersRepository.bulk_enqueue_automation_outbox({order_id: order_case_ids})
+
+    @staticmethod
+    def bulk_enqueue_automation_outbox(cases_by_order: Dict[int, List[int]]) -> bool:
+        if not OrdersRepository._has_automation_outbox_table():
+            return False
+        now = int(time.time())
+        rows = [
+            {
+                'order_id': order_id,
+                'order_case_id': order_case_id,
+                'status': AutomationOutbox.STATUS_PENDING,
+                'attempts': 0,
+                'next_attempt_at': now,
+                'locked_until': 0,
+            }
+            for order_id, order_case_ids in cases_by_order.items()
+            for order_case_id in order_case_ids
+        ]
+        if rows:
+            db.session.execute(insert(AutomationOutbox), rows)
+        return True
+
+    @staticmethod
+    def claim_automation_outbox(limit: int, lease_seconds: int) -> List[AutomationOutbox]:
+        """认领到期记录（含租约过期的 processing），逐行条件更新保证多进程不重复投递。"""
+        if not OrdersRepository._has_automation_outbox_table():
+            return []
+        now = int(time.time())
+        due = or_(
+            and_(AutomationOutbox.status == AutomationOutbox.STATUS_PENDING, AutomationOutbox.next_attempt_at <= now),
+            and_(AutomationOutbox.status == AutomationOutbox.STATUS_PROCESSING, AutomationOutbox.locked_until < now),
+        )
+        candidate_ids = [
+            row[0]
+            for row in db.session.query(AutomationOutbox.id).filter(due).order_by(AutomationOutbox.id.asc()).limit(limit)
+        ]
+        claimed_ids = []
+        for entry_id in candidate_ids:
+            updated = db.session.query(AutomationOutbox).filter(AutomationOutbox.id == entry_id, due).update(
+                {
+                    AutomationOutbox.status: AutomationOutbox.STATUS_PROCESSING,
+                    AutomationOutbox.locked_until: now + lease_seconds,
+                    AutomationOutbox.attempts: AutomationOutbox.attempts + 1,
+                    AutomationOutbox.updated_at: now,
+                },
+                synchronize_session=False,
+            )
+            if updated:
+                claimed_ids.append(entry_id)
+        if not claimed_ids:
+            return []
+        return (
+            AutomationOutbox.query.filter(AutomationOutbox.id.in_(claimed_ids))
+            .order_by(AutomationOutbox.id.asc())
+            .populate_existing()
+            .all()
+        )
+
+    @staticmethod
+    def _claimed_outbox(entry_id: int, attempts: int):
+        """本轮认领仍有效：processing 且 attempts 未变（租约过期被他处重新认领时 attempts 会再加一）。"""
+        return AutomationOutbox.query.filter(
+            AutomationOutbox.id == entry_id,
+            AutomationOutbox.status == AutomationOutbox.STATUS_PROCESSING,
+            AutomationOutbox.attempts == attempts,
+        )
+
+    @staticmethod
+    def owns_automation_outbox(entry_id: int, attempts: int) -> bool:
+        return OrdersRepository._claimed_outbox(entry_id, attempts).count() > 0
+
+    @staticmethod
+    def update_automation_outbox(entry_id: int, attempts: int, update_data: dict) -> bool:
+        """按认领时的 attempts 条件回写，返回 False 表示认领已失效（被重新认领或已删除），调用方应丢弃本次结果。"""
+        updated = OrdersRepository._claimed_outbox(entry_id, attempts).update(
+            update_data, synchronize_session=False
+        )
+        return bool(updated)
+
+    @staticmethod
+    def discard_automation_outbox(order_id: int) -> int:
+        """丢弃订单尚未认领的记录，返回丢弃条数；processing 记录由 dispatcher 正常回写。"""
+        if not OrdersRepository._has_automation_outbox_table():
+            return 0
+        return AutomationOutbox.query.filter(
+            AutomationOutbox.order_id == order_id,
+            AutomationOutbox.status == AutomationOutbox.STATUS_PENDING,
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def get_in_flight_outbox_case_ids(order_id: int) -> set:
+        if not OrdersRepository._has_automation_outbox_table():
+            return set()
+        rows = db.session.query(AutomationOutbox.order_case_id).filter(
+            AutomationOutbox.order_id == order_id,
+            AutomationOutbox.status == AutomationOutbox.STATUS_PROCESSING,
+        )
+        return {int(row[0]) for row in rows}
+
     @staticmethod
     def commit() -> None:
         db.session.commit()
@@ -283,6 +876,10 @@ class OrdersRepository:
         if OrdersRepository._has_case_opti_tables():
             CaseConditionOpti.query.filter_by(order_id=order.id).delete(synchronize_session=False)
             OrderCaseOpti.query.filter_by(order_id=order.id).delete(synchronize_session=False)
+        if OrdersRepository._has_order_sim_types_table():
+            OrderSimType.query.filter_by(order_id=order.id).delete(synchronize_session=False)
+        if OrdersRepository._has_automation_outbox_table():
+            AutomationOutbox.query.filter_by(order_id=order.id).delete(synchronize_session=False)
         db.session.delete(order)
         db.session.commit()
 
@@ -11,7 +11,7 @@ from app.common import success, error
 from app.constants import ErrorCode
 from app.common.errors import NotFoundError, BusinessError
 from app.common.serializers import get_snake_json
-from .schemas import OrderCreate, OrderUpdate, OrderQuery, VerifyFileRequest
+from .schemas import OrderCreate, OrderBulkCreate, OrderUpdate, OrderQuery, OrderDetailQuery, VerifyFileRequest
 from .service import orders_service
 from app.services.automation.distribution_client import AutomationSubmissionError
 from .excel_parser_service import excel_parser_service
@@ -38,6 +38,10 @@ def get_orders():
             'remark': request.args.get('remark'),
             'start_date': request.args.get('start_date') or request.args.get('startDate'),
             'end_date': request.args.get('end_date') or request.args.get('endDate'),
+            'keyword': request.args.get('keyword') or None,
+            'cursor': request.args.get('cursor') or None,
+            'fields': request.args.get('fields') or None,
+            'include': request.args.get('include') or None,
         }
         # 转换类型
         for key in ['project_id', 'sim_type_id', 'start_date', 'end_date']:
@@ -57,6 +61,10 @@ def get_orders():
             remark=validated.remark,
             start_date=validated.start_date,
             end_date=validated.end_date,
+            cursor=validated.cursor,
+            keyword=validated.keyword,
+            fields=validated.fields,
+            include=validated.include,
         )
         return success(result)
     except ValidationError as e:
@@ -66,10 +74,16 @@ def get_orders():
 @orders_bp.route('/<int:order_id>', methods=['GET'])
 @jwt_required()
 def get_order(order_id: int):
-    """获取订单详情"""
+    """获取订单详情（支持 fields/include 字段投影）"""
     try:
-        result = orders_service.get_order(order_id)
+        validated = OrderDetailQuery(
+            fields=request.args.get('fields') or None,
+            include=request.args.get('include') or None,
+        )
+        result = orders_service.get_order(order_id, fields=validated.fields, include=validated.include)
         return success(result)
+    except ValidationError as e:
+        return error(ErrorCode.VALIDATION_ERROR, str(e), http_status=400)
     except NotFoundError as e:
         return error(ErrorCode.RESOURCE_NOT_FOUND, e.msg, http_status=404)
 
@@ -117,6 +131,25 @@ def create_order():
         return error(ErrorCode.VALIDATION_ERROR, str(e), http_status=400)
 
 
+@orders_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def create_orders_bulk():
+    """批量创建订单（全部成功或全部失败）"""
+    try:
+        validated = OrderBulkCreate(**(get_snake_json() or {}))
+        identity = get_jwt_identity()
+        if isinstance(identity, dict):
+            user_identity = identity.get('domain_account') or identity.get('domainAccount') or identity.get('id')
+        else:
+            user_identity = identity
+        result = orders_service.create_orders_bulk(
+            [item.model_dump() for item in validated.orders], str(user_identity)
+        )
+        return success(result, "创建成功")
+    except ValidationError as e:
+        return error(ErrorCode.VALIDATION_ERROR, str(e), http_status=400)
+
+
 @orders_bp.route('/<int:order_id>', methods=['PUT'])
 @jwt_required()
 def update_order(order_id: int):
@@ -247,7 +280,7 @@ def verify_file():
 @jwt_required()
 def parse_param_excel():
     """
-    解析参数Excel文件
+    解析参数Excel/CSV文件
     返回解析后的参数列表，供前端预览和编辑
     """
     try:
@@ -259,15 +292,17 @@ def parse_param_excel():
             return error(ErrorCode.VALIDATION_ERROR, "文件名为空", http_status=400)
 
         # 检查文件扩展名
-        allowed_ext = {'.xlsx', '.xls'}
+        allowed_ext = {'.xlsx', '.xls', '.csv'}
         ext = '.' + file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
         if ext not in allowed_ext:
-            return error(ErrorCode.VALIDATION_ERROR, "仅支持xlsx/xls格式", http_status=400)
+            return error(ErrorCode.VALIDATION_ERROR, "仅支持xlsx/xls/csv格式", http_status=400)
 
         sheet_name = request.form.get('sheetName')
-        result = excel_parser_service.parse_param_excel(file, sheet_name)
+        result = excel_parser_service.parse_param_upload(file, sheet_name)
 
         return success(result)
+    except BusinessError as e:
+        return error(e.code, e.msg, http_status=400)
     except Exception as e:
         return error(ErrorCode.INTERNAL_ERROR, str(e), http_status=500)
 
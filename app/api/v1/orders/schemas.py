@@ -3,9 +3,30 @@
 职责：使用Pydantic定义请求/响应数据结构
 字段使用snake_case，由全局中间件自动转换camelCase
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
 
+from app.common.pagination import decode_cursor
+from app.common.serializers import to_snake_case
+from app.models.order import Order
+
+
+def _parse_projection(value: Any, allowed: tuple) -> Optional[List[str]]:
+    """解析 fields/include：逗号分隔或列表，兼容 camelCase，未知字段报错。"""
+    if value is None or value == '':
+        return None
+    items = value.split(',') if isinstance(value, str) else list(value)
+    parsed: List[str] = []
+    for item in items:
+        name = to_snake_case(str(item).strip())
+        if not name:
+            continue
+        if name not in allowed:
+            raise ValueError(f'不支持的字段: {item}')
+        if name not in parsed:
+            parsed.append(name)
+    return parsed or None
+
 
 class OrderCreate(BaseModel):
     """创建订单请求"""
@@ -27,6 +48,11 @@ class OrderCreate(BaseModel):
     base_dir: Optional[str] = Field(None, description="申请单工作目录")
 
 
+class OrderBulkCreate(BaseModel):
+    """批量创建订单请求"""
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=100, description="订单列表")
+
+
 class OrderUpdate(BaseModel):
     """更新订单请求"""
     remark: Optional[str] = Field(None, description="备注")
@@ -65,3 +91,40 @@ class OrderQuery(BaseModel):
     remark: Optional[str] = Field(None, description="备注(模糊搜索)")
     start_date: Optional[int] = Field(None, description="开始日期时间戳")
     end_date: Optional[int] = Field(None, description="结束日期时间戳")
+    keyword: Optional[str] = Field(None, max_length=100, description="搜索框关键字：ORD 开头按订单号前缀，否则检索备注与工况概览")
+    cursor: Optional[str] = Field(None, description="keyset 游标，传入时忽略 page")
+    fields: Optional[List[str]] = Field(None, description="只返回这些字段（逗号分隔）")
+    include: Optional[List[str]] = Field(None, description="在列表字段外追加的大字段（input_json/submit_check/client_meta）")
+
+    @field_validator('cursor')
+    @classmethod
+    def validate_cursor(cls, value: Optional[str]) -> Optional[str]:
+        if value:
+            decode_cursor(value, 2)
+        return value or None
+
+    @field_validator('fields', mode='before')
+    @classmethod
+    def validate_fields(cls, value: Any) -> Optional[List[str]]:
+        return _parse_projection(value, Order.DETAIL_FIELDS)
+
+    @field_validator('include', mode='before')
+    @classmethod
+    def validate_include(cls, value: Any) -> Optional[List[str]]:
+        return _parse_projection(value, Order.HEAVY_FIELDS)
+
+
+class OrderDetailQuery(BaseModel):
+    """订单详情字段投影参数；都不传时返回完整详情"""
+    fields: Optional[List[str]] = Field(None, description="只返回这些字段（逗号分隔，可含 conditions）")
+    include: Optional[List[str]] = Field(None, description="在基础字段外追加的大字段（input_json/submit_check/client_meta/conditions）")
+
+    @field_validator('fields', mode='before')
+    @classmethod
+    def validate_fields(cls, value: Any) -> Optional[List[str]]:
+        return _parse_projection(value, Order.DETAIL_FIELDS + ('conditions',))
+
+    @field_validator('include', mode='before')
+    @classmethod
+    def validate_include(cls, value: Any) -> Optional[List[str]]:
+        return _parse_projection(value, Order.HEAVY_FIELDS + ('conditions',))
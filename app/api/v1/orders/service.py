@@ -1,27 +1,43 @@
 """
 ???? - ????????????????? Repository????????????? HTTP ??/??????????
 """
+import logging
 import os
-import re
 import time
 import datetime
+import hashlib
+import json
+import uuid
 from typing import Any, Dict, List, Optional
 from math import ceil
+from concurrent.futures import ThreadPoolExecutor
 
 from flask import current_app
+from app.common.cache_service import CacheKeys
 from app.common.errors import NotFoundError, BusinessError
+from app.common.pagination import decode_cursor, encode_cursor
+from app.common.redis_client import redis_client
 from app.constants import ErrorCode
 from app.models.auth import User, Role
+from app.models.case_opti import AutomationOutbox
+from app.models.order import Order
+from .inp_scanner import inp_set_index, scan_inp_sets
 from .repository import orders_repository
-from app.services.automation import automation_distribution_client
+from app.services.automation import automation_distribution_client, automation_outbox_worker
 from app.services.automation.distribution_client import AutomationSubmissionError
+from app.services.doe_matrix import doe_matrix_store
 from app.services.external_data import user_resource_pool_repository
 
+logger = logging.getLogger(__name__)
+
+DAILY_ROUND_USAGE_CACHE_TTL = 2 * 24 * 3600
+OUTBOX_MAX_RETRY_DELAY_SECONDS = 600
+
 
 def generate_order_no() -> str:
-    """生成订单编号"""
+    """生成订单编号：日期 + 随机后缀（uuid4 的 48 位），批量与多进程并发提单不会撞上唯一约束"""
     now = datetime.datetime.now()
-    return f"ORD-{now.strftime('%Y%m%d')}-{int(time.time() * 1000) % 100000:05d}"
+    return f"ORD-{now.strftime('%Y%m%d')}-{uuid.uuid4().hex[:12].upper()}"
 
 
 class OrdersService:
@@ -71,7 +87,10 @@ class OrdersService:
 
         if alg_type in (2, 5):
             doe_data = opt_params.get('doe_param_data', opt_params.get('doeParamData'))
-            return len(doe_data) if isinstance(doe_data, list) else 0
+            if isinstance(doe_data, list):
+                return len(doe_data)
+            # 外置为列式矩阵时只保留行数
+            return self._to_int(opt_params.get('doeRowCount', opt_params.get('doe_row_count')), 0)
 
         if alg_type != 1:
             return 0
@@ -132,8 +151,24 @@ class OrdersService:
     def _sanitize_order_input_json(self, input_json: Optional[dict]) -> Dict[str, Any]:
         payload = dict(self._normalize_json_dict(input_json))
         payload.pop('opt_param', None)
+        if isinstance(payload.get('conditions'), list):
+            payload['conditions'] = [self._externalize_condition_doe(item) for item in payload['conditions']]
         return payload
 
+    def _externalize_condition_doe(self, condition: Any) -> Any:
+        """大 DOE 矩阵（optParams.doeParamData）外置为列式文件，input_json 只保留 doeMatrixId/行数/列名"""
+        if not isinstance(condition, dict) or not isinstance(condition.get('params'), dict):
+            return condition
+        params = condition['params']
+        opt_key = 'optParams' if 'optParams' in params else 'opt_params'
+        if not isinstance(params.get(opt_key), dict):
+            return condition
+        min_rows = int(current_app.config.get('DOE_MATRIX_EXTERNAL_MIN_ROWS', 200))
+        opt_params = doe_matrix_store.dehydrate_opt_params(params[opt_key], min_rows)
+        if opt_params is params[opt_key]:
+            return condition
+        return {**condition, 'params': {**params, opt_key: opt_params}}
+
     def _build_condition_summary(self, conditions: List[Dict[str, Any]]) -> Dict[str, List[str]]:
         summary: Dict[str, List[str]] = {}
         for condition in conditions:
@@ -369,18 +404,63 @@ class OrdersService:
             'submittedAt': int(datetime.datetime.utcnow().timestamp()),
         }
 
+    @staticmethod
+    def _group_conditions_by_case(conditions: List[Any]) -> Dict[int, List[Any]]:
+        grouped_conditions: Dict[int, List[Any]] = {}
+        for condition in conditions:
+            grouped_conditions.setdefault(
+                OrdersService._to_int(getattr(condition, 'order_case_id', None), 0), []
+            ).append(condition)
+        return grouped_conditions
+
+    def _apply_case_submit_success(self, order, case_conditions: List[Any], result, issue_id: int) -> int:
+        issue_id = self._to_int(result.issue_id, issue_id)
+        if issue_id > 0 and self._to_int(getattr(order, 'opt_issue_id', 0), 0) <= 0:
+            self.repository.update_order(order, {'opt_issue_id': issue_id})
+        for condition in case_conditions:
+            self.repository.update_case_condition(
+                condition,
+                {
+                    'opt_issue_id': issue_id,
+                    'opt_job_id': self._to_int(result.job_id, 0),
+                    'opt_condition_config_id': self._to_int(
+                        result.condition_config_ids.get(self._to_int(getattr(condition, 'id', None), 0)),
+                        0,
+                    ),
+                    'status': 1,
+                    'process': 0,
+                    'external_meta': self._merge_external_meta(
+                        getattr(condition, 'external_meta', None),
+                        self._automation_success_meta(result),
+                    ),
+                },
+            )
+        return issue_id
+
+    def _apply_case_submit_failure(self, case_conditions: List[Any], exc: Exception, issue_id: int) -> None:
+        for condition in case_conditions:
+            self.repository.update_case_condition(
+                condition,
+                {
+                    'opt_issue_id': issue_id or 0,
+                    'status': 3,
+                    'process': 100,
+                    'external_meta': self._merge_external_meta(
+                        getattr(condition, 'external_meta', None),
+                        self._automation_failure_meta(exc, issue_id),
+                    ),
+                },
+            )
+
     def _submit_order_conditions(self, order, conditions: List[Any]) -> None:
+        """同步逐 case 提交（outbox 表不可用时的兜底路径）。"""
         if not conditions:
             return
 
         issue_id = self._to_int(getattr(order, 'opt_issue_id', None), 0)
         has_failure = False
         has_success = False
-        grouped_conditions: Dict[int, List[Any]] = {}
-        for condition in conditions:
-            grouped_conditions.setdefault(self._to_int(getattr(condition, 'order_case_id', None), 0), []).append(condition)
-
-        for case_conditions in grouped_conditions.values():
+        for case_conditions in self._group_conditions_by_case(conditions).values():
             case_entity = getattr(case_conditions[0], 'order_case', None)
             try:
                 result = automation_distribution_client.submit_case(
@@ -389,49 +469,245 @@ class OrdersService:
                     conditions=case_conditions,
                     issue_id=issue_id or None,
                 )
-                issue_id = self._to_int(result.issue_id, issue_id)
-                if issue_id > 0 and self._to_int(getattr(order, 'opt_issue_id', 0), 0) <= 0:
-                    self.repository.update_order(order, {'opt_issue_id': issue_id})
-                for condition in case_conditions:
-                    self.repository.update_case_condition(
-                        condition,
-                        {
-                            'opt_issue_id': issue_id,
-                            'opt_job_id': self._to_int(result.job_id, 0),
-                            'opt_condition_config_id': self._to_int(
-                                result.condition_config_ids.get(self._to_int(getattr(condition, 'id', None), 0)),
-                                0,
-                            ),
-                            'status': 1,
-                            'process': 0,
-                            'external_meta': self._merge_external_meta(
-                                getattr(condition, 'external_meta', None),
-                                self._automation_success_meta(result),
-                            ),
-                        },
-                    )
+                issue_id = self._apply_case_submit_success(order, case_conditions, result, issue_id)
                 has_success = True
             except AutomationSubmissionError as exc:
                 has_failure = True
-                for condition in case_conditions:
-                    self.repository.update_case_condition(
-                        condition,
-                        {
-                            'opt_issue_id': issue_id or 0,
-                            'status': 3,
-                            'process': 100,
-                            'external_meta': self._merge_external_meta(
-                                getattr(condition, 'external_meta', None),
-                                self._automation_failure_meta(exc, issue_id),
-                            ),
-                        },
-                    )
+                self._apply_case_submit_failure(case_conditions, exc, issue_id)
 
         if has_failure:
             self.repository.update_order(order, {'status': 3, 'progress': 100})
         elif has_success:
             self.repository.update_order(order, {'status': 1, 'progress': 0})
 
+    def _enqueue_order_conditions(self, order, conditions: List[Any]) -> None:
+        """按 case 写入 outbox，由后台 dispatcher 异步提交；outbox 不可用时退回同步提交。"""
+        if not conditions:
+            return
+        order_case_ids = [case_id for case_id in self._group_conditions_by_case(conditions) if case_id > 0]
+        if not self.repository.enqueue_automation_outbox(order.id, order_case_ids):
+            self._submit_order_conditions(order, conditions)
+
+    def _outbox_retry_delay(self, attempts: int) -> int:
+        base_seconds = float(current_app.config.get('AUTOMATION_OUTBOX_RETRY_BASE_SECONDS', 5.0))
+        return int(min(base_seconds * (2 ** max(attempts - 1, 0)), OUTBOX_MAX_RETRY_DELAY_SECONDS))
+
+    def _outbox_lease_seconds(self, batch_size: int) -> int:
+        """认领租约覆盖一轮最坏耗时：每个 case 的分发调用（含连接重试与退避）× 串行轮数，再留一倍余量。"""
+        config = current_app.config
+        workers = max(int(config.get('AUTOMATION_OUTBOX_MAX_WORKERS', 4) or 1), 1)
+        attempts = max(int(config.get('OUTBOUND_HTTP_RETRIES', 2)), 0) + 1
+        call_seconds = float(config.get('OUTBOUND_HTTP_CONNECT_TIMEOUT', 3.0)) \
+            + float(config.get('AUTOMATION_DISTRIBUTION_TIMEOUT', 15.0))
+        backoff_seconds = float(config.get('OUTBOUND_HTTP_BACKOFF_FACTOR', 0.2)) * (2 ** attempts)
+        # 尚无 issue 的订单先提交首个 case，最多多出一轮
+        rounds = ceil(batch_size / workers) + 1
+        derived = int(ceil(rounds * (attempts * call_seconds + backoff_seconds) * 2))
+        return max(int(config.get('AUTOMATION_OUTBOX_LEASE_SECONDS', 120)), derived)
+
+    def _submit_outbox_case(self, job: tuple):
+        """提交单个 outbox case，只读本线程会话，返回 (结果, 异常)；两者都为空表示无需提交。
+
+        提交前确认认领仍有效，租约已被他处重新认领或记录已丢弃时不再提交。
+        """
+        entry_id, order_id, order_case_id, attempts = job
+        if not self.repository.owns_automation_outbox(entry_id, attempts):
+            return None, None
+        order = self.repository.get_order_by_id(order_id)
+        if not order:
+            return None, None
+        case_conditions = [
+            condition for condition in self.repository.get_case_conditions(order_id)
+            if self._to_int(condition.order_case_id, 0) == order_case_id
+        ]
+        if not case_conditions or all(self._to_int(item.opt_job_id, 0) > 0 for item in case_conditions):
+            return None, None
+        issue_id = self._to_int(getattr(order, 'opt_issue_id', None), 0)
+        try:
+            return automation_distribution_client.submit_case(
+                order=order,
+                case_entity=getattr(case_conditions[0], 'order_case', None),
+                conditions=case_conditions,
+                issue_id=issue_id or None,
+            ), None
+        except Exception as exc:
+            return None, exc
+
+    def _run_outbox_submissions(self, jobs: List[tuple]) -> List[tuple]:
+        max_workers = min(int(current_app.config.get('AUTOMATION_OUTBOX_MAX_WORKERS', 4) or 1), len(jobs))
+        if max_workers <= 1:
+            return [self._submit_outbox_case(job) for job in jobs]
+
+        app = current_app._get_current_object()
+
+        def run(job):
+            with app.app_context():
+                return self._submit_outbox_case(job)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='automation-submit') as executor:
+            return list(executor.map(run, jobs))
+
+    def _apply_outbox_outcome(self, job: tuple, result, exc: Optional[Exception]) -> None:
+        """回写单条 outbox 结果；先按认领条件更新 outbox，认领失效时丢弃结果不动业务数据。"""
+        entry_id, order_id, order_case_id, attempts = job
+        now = int(time.time())
+        order = self.repository.get_order_by_id(order_id)
+        case_conditions = [
+            condition for condition in (self.repository.get_case_conditions(order_id) if order else [])
+            if self._to_int(condition.order_case_id, 0) == order_case_id
+        ]
+        if (result is None and exc is None) or not case_conditions:
+            self.repository.update_automation_outbox(
+                entry_id, attempts, {'status': AutomationOutbox.STATUS_DONE, 'locked_until': 0, 'updated_at': now}
+            )
+            return
+
+        issue_id = self._to_int(getattr(order, 'opt_issue_id', None), 0)
+        if result is not None:
+            if not self.repository.update_automation_outbox(
+                entry_id, attempts,
+                {'status': AutomationOutbox.STATUS_DONE, 'locked_until': 0, 'last_error': None, 'updated_at': now},
+            ):
+                logger.warning(f"automation outbox {entry_id} claim lost, dropping submit result")
+                return
+            self._apply_case_submit_success(order, case_conditions, result, issue_id)
+            if self._to_int(order.status, 0) == 0:
+                self.repository.update_order(order, {'status': 1, 'progress': 0})
+            return
+
+        max_attempts = int(current_app.config.get('AUTOMATION_OUTBOX_MAX_ATTEMPTS', 5))
+        if attempts >= max_attempts:
+            if not self.repository.update_automation_outbox(
+                entry_id, attempts,
+                {'status': AutomationOutbox.STATUS_FAILED, 'locked_until': 0, 'last_error': str(exc), 'updated_at': now},
+            ):
+                return
+            self._apply_case_submit_failure(case_conditions, exc, issue_id)
+            self.repository.update_order(order, {'status': 3, 'progress': 100})
+            return
+
+        if not self.repository.update_automation_outbox(
+            entry_id, attempts,
+            {
+                'status': AutomationOutbox.STATUS_PENDING,
+                'locked_until': 0,
+                'next_attempt_at': now + self._outbox_retry_delay(attempts),
+                'last_error': str(exc),
+                'updated_at': now,
+            },
+        ):
+            return
+        for condition in case_conditions:
+            self.repository.update_case_condition(
+                condition,
+                {
+                    'external_meta': self._merge_external_meta(
+                        getattr(condition, 'external_meta', None),
+                        {'automationStatus': 'retrying', 'automationError': str(exc), 'automationAttempts': attempts},
+                    ),
+                },
+            )
+
+    def _commit_outbox_outcome(self, job: tuple, result, exc: Optional[Exception]) -> None:
+        """每条结果单独提交；回写失败时只回滚本条，并把记录移出 processing，
+        已提交成功的 case 记为 failed 待人工处理，避免租约到期后被重复提交。"""
+        try:
+            self._apply_outbox_outcome(job, result, exc)
+            self.repository.commit()
+            return
+        except Exception as write_exc:
+            self.repository.rollback()
+            logger.exception(f"automation outbox {job[0]} writeback failed")
+            error_text = f'回写失败: {write_exc}'
+        now = int(time.time())
+        fallback = (
+            {'status': AutomationOutbox.STATUS_FAILED, 'locked_until': 0, 'last_error': error_text, 'updated_at': now}
+            if result is not None else
+            {
+                'status': AutomationOutbox.STATUS_PENDING,
+                'locked_until': 0,
+                'next_attempt_at': now + self._outbox_retry_delay(job[3]),
+                'last_error': error_text,
+                'updated_at': now,
+            }
+        )
+        try:
+            self.repository.update_automation_outbox(job[0], job[3], fallback)
+            self.repository.commit()
+        except Exception:
+            self.repository.rollback()
+            logger.exception(f"automation outbox {job[0]} release failed")
+
+    def dispatch_automation_outbox(self, limit: Optional[int] = None) -> int:
+        """投递到期 outbox 记录，返回本轮认领条数。
+
+        分发接口调用并发执行，回写在当前线程逐条提交；
+        尚无 issue 的订单先提交首个 case 拿到 issue_id，其余 case 再并发提交；首个未成功时其余 case 放回下一轮。
+        认领时 attempts 加一作为本轮凭据，提交前与回写时都按凭据校验，避免租约过期后重复投递的结果被覆盖写入。
+        """
+        config = current_app.config
+        batch_size = limit or int(config.get('AUTOMATION_OUTBOX_BATCH_SIZE', 20))
+        lease_seconds = self._outbox_lease_seconds(batch_size)
+        try:
+            entries = self.repository.claim_automation_outbox(batch_size, lease_seconds)
+            jobs_by_order: Dict[int, List[tuple]] = {}
+            for entry in entries:
+                order_id = self._to_int(entry.order_id, 0)
+                jobs_by_order.setdefault(order_id, []).append(
+                    (entry.id, order_id, self._to_int(entry.order_case_id, 0), self._to_int(entry.attempts, 1))
+                )
+            self.repository.commit()
+        except Exception:
+            self.repository.rollback()
+            raise
+        if not entries:
+            return 0
+
+        leading, following, waiting = [], [], {}
+        for order_id, order_jobs in jobs_by_order.items():
+            order = self.repository.get_order_by_id(order_id)
+            if order and self._to_int(order.opt_issue_id, 0) <= 0:
+                leading.append(order_jobs[0])
+                if order_jobs[1:]:
+                    waiting[order_id] = order_jobs[1:]
+            else:
+                following.extend(order_jobs)
+
+        self._dispatch_outbox_jobs(leading)
+        # 首个 case 未拿到 issue_id 的订单，其余 case 放回下一轮，避免各自新建 issue
+        for order_id, order_jobs in waiting.items():
+            order = self.repository.get_order_by_id(order_id)
+            if order and self._to_int(order.opt_issue_id, 0) <= 0:
+                self._release_outbox_jobs(order_jobs)
+            else:
+                following.extend(order_jobs)
+        self._dispatch_outbox_jobs(following)
+        return len(entries)
+
+    def _dispatch_outbox_jobs(self, jobs: List[tuple]) -> None:
+        if not jobs:
+            return
+        outcomes = self._run_outbox_submissions(jobs)
+        for job, (result, exc) in zip(jobs, outcomes):
+            self._commit_outbox_outcome(job, result, exc)
+
+    def _release_outbox_jobs(self, jobs: List[tuple]) -> None:
+        """把未提交的认领放回 pending，退还本轮占用的 attempts（不计入重试次数）。"""
+        now = int(time.time())
+        for entry_id, _order_id, _order_case_id, attempts in jobs:
+            try:
+                self.repository.update_automation_outbox(entry_id, attempts, {
+                    'status': AutomationOutbox.STATUS_PENDING,
+                    'attempts': max(attempts - 1, 0),
+                    'locked_until': 0,
+                    'next_attempt_at': now,
+                    'updated_at': now,
+                })
+                self.repository.commit()
+            except Exception:
+                self.repository.rollback()
+                logger.exception(f"automation outbox {entry_id} release failed")
+
     def _submit_single_condition(self, order, condition) -> None:
         issue_id = self._to_int(getattr(order, 'opt_issue_id', None), 0)
         if issue_id <= 0:
@@ -520,6 +796,7 @@ class OrdersService:
         return merged
 
     def _sum_today_rounds(self, user_identity: str) -> int:
+        """按当日订单重新估算已用轮次，仅用于计数行首次回填。"""
         normalized_identity = self._normalize_domain_account(user_identity)
         now = datetime.datetime.now()
         start_ts = int(datetime.datetime(now.year, now.month, now.day, 0, 0, 0).timestamp())
@@ -530,11 +807,66 @@ class OrdersService:
             for order in orders
         )
 
+    @staticmethod
+    def _usage_date(timestamp: Optional[int] = None) -> int:
+        day = datetime.date.fromtimestamp(timestamp) if timestamp else datetime.date.today()
+        return day.year * 10000 + day.month * 100 + day.day
+
+    def _get_today_used_rounds(self, user_identity: str) -> int:
+        """当日已用轮次：Redis 镜像 -> 计数表 -> 按当日订单回填。"""
+        normalized_identity = self._normalize_domain_account(user_identity)
+        usage_date = self._usage_date()
+        cache_key = CacheKeys.daily_round_usage(normalized_identity, usage_date)
+        cached = redis_client.get(cache_key)
+        if cached is not None:
+            return self._to_int(cached, 0)
+
+        used = self.repository.get_daily_round_usage(normalized_identity, usage_date)
+        if used is None:
+            self.repository.ensure_daily_round_usage(
+                normalized_identity,
+                usage_date,
+                self._sum_today_rounds(normalized_identity),
+            )
+            self.repository.commit()
+            used = self.repository.get_daily_round_usage(normalized_identity, usage_date) or 0
+        redis_client.set(cache_key, str(used), ttl=DAILY_ROUND_USAGE_CACHE_TTL)
+        return used
+
+    def _reserve_daily_rounds(self, user_identity: str, order_rounds: int, daily_round_limit: int) -> None:
+        """在提单事务内占用当日轮次，并发提交由计数行的条件更新串行化。"""
+        usage_date = self._usage_date()
+        if self.repository.get_daily_round_usage(user_identity, usage_date) is None:
+            self.repository.ensure_daily_round_usage(user_identity, usage_date, self._sum_today_rounds(user_identity))
+        if not self.repository.try_reserve_daily_rounds(user_identity, usage_date, order_rounds, daily_round_limit):
+            used = self.repository.get_daily_round_usage(user_identity, usage_date) or 0
+            raise BusinessError(
+                ErrorCode.VALIDATION_ERROR,
+                f'\u4eca\u65e5\u7d2f\u8ba1\u8f6e\u6b21\u4e0a\u9650\u4e3a {daily_round_limit}\uff0c\u5f53\u524d\u5df2\u4f7f\u7528 {used}\uff0c\u672c\u6b21\u9700 {order_rounds}'
+            )
+
+    def _shift_order_round_usage(self, order, delta: int) -> Optional[tuple]:
+        """按订单创建日修正计数行（不做上限校验），返回需要刷新镜像的 (账号, 日期)。"""
+        account = self._normalize_domain_account(getattr(order, 'created_by', None))
+        if not account or not delta:
+            return None
+        usage_date = self._usage_date(getattr(order, 'created_at', None))
+        self.repository.adjust_daily_round_usage(account, usage_date, delta)
+        return account, usage_date
+
+    def _refresh_daily_round_mirror(self, user_identity: str, usage_date: int) -> None:
+        used = self.repository.get_daily_round_usage(user_identity, usage_date)
+        cache_key = CacheKeys.daily_round_usage(user_identity, usage_date)
+        if used is None:
+            redis_client.delete(cache_key)
+        else:
+            redis_client.set(cache_key, str(used), ttl=DAILY_ROUND_USAGE_CACHE_TTL)
+
     def get_submit_limits(self, user_identity: str) -> Dict[str, int]:
         user = self._get_submit_user_or_raise(user_identity)
         normalized_identity = self._normalize_domain_account(user.domain_account)
         limits = self._get_user_submit_limits(normalized_identity)
-        today_used_rounds = self._sum_today_rounds(normalized_identity)
+        today_used_rounds = self._get_today_used_rounds(normalized_identity)
         return {
             'max_batch_size': limits['max_batch_size'],
             'max_cpu_cores': limits['max_cpu_cores'],
@@ -566,64 +898,139 @@ class OrdersService:
         created_by: str = None,
         remark: str = None,
         start_date: int = None,
-        end_date: int = None
+        end_date: int = None,
+        cursor: str = None,
+        keyword: str = None,
+        fields: Optional[List[str]] = None,
+        include: Optional[List[str]] = None,
     ) -> Dict:
-        orders, total = self.repository.get_orders_paginated(
-            page=page,
-            page_size=page_size,
-            status=status,
-            project_id=project_id,
-            sim_type_id=sim_type_id,
-            order_no=order_no,
-            domain_account=domain_account,
-            created_by=created_by,
-            remark=remark,
-            start_date=start_date,
-            end_date=end_date
-        )
+        filters = {
+            'status': status,
+            'project_id': project_id,
+            'sim_type_id': sim_type_id,
+            'order_no': order_no,
+            'domain_account': domain_account,
+            'created_by': created_by,
+            'remark': remark,
+            'start_date': start_date,
+            'end_date': end_date,
+            'keyword': keyword,
+        }
+        total = self._count_orders_cached(filters)
+        selected = self._order_projection(fields, include, Order.LIST_FIELDS)
+        # 游标需要 created_at，即使未请求输出也要读取
+        columns = Order.columns_for_fields(selected + ['created_at'])
+        if cursor:
+            after_created_at, after_id = decode_cursor(cursor, 2)
+            orders, has_more = self.repository.list_orders(
+                limit=page_size,
+                after=(self._to_int(after_created_at, 0), self._to_int(after_id, 0)),
+                columns=columns,
+                **filters,
+            )
+        else:
+            orders, has_more = self.repository.list_orders(
+                limit=page_size,
+                offset=(page - 1) * page_size,
+                columns=columns,
+                **filters,
+            )
+
+        next_cursor = None
+        if has_more and orders:
+            next_cursor = encode_cursor(orders[-1].created_at or 0, orders[-1].id)
 
         return {
-            'items': [order.to_list_dict() for order in orders],
+            'items': [order.to_projected_dict(selected) for order in orders],
             'total': total,
             'page': page,
             'page_size': page_size,
-            'total_pages': ceil(total / page_size) if total > 0 else 0
+            'total_pages': ceil(total / page_size) if total > 0 else 0,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
         }
 
-    def get_order(self, order_id: int) -> Dict:
-        order = self.repository.get_order_by_id(order_id)
+    def _count_orders_cached(self, filters: Dict[str, Any]) -> int:
+        """订单总数按归一化筛选条件短 TTL 缓存；新建/删除订单时整体失效。"""
+        ttl = int(current_app.config.get('ORDERS_COUNT_CACHE_TTL', 30) or 0)
+        if ttl <= 0:
+            return self.repository.count_orders(**filters)
+
+        normalized = {key: value for key, value in filters.items() if value is not None}
+        digest = hashlib.sha1(
+            json.dumps(normalized, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        generation = redis_client.get(CacheKeys.ORDERS_COUNT_GENERATION) or '0'
+        key = CacheKeys.orders_count(generation, digest)
+        cached = redis_client.get(key)
+        if cached is not None:
+            return self._to_int(cached, 0)
+
+        total = self.repository.count_orders(**filters)
+        redis_client.set(key, str(total), ttl=ttl)
+        return total
+
+    @staticmethod
+    def _invalidate_order_counts() -> None:
+        redis_client.set(CacheKeys.ORDERS_COUNT_GENERATION, str(time.time_ns()), ttl=86400)
+
+    @staticmethod
+    def _order_projection(
+        fields: Optional[List[str]],
+        include: Optional[List[str]],
+        default_fields,
+    ) -> List[str]:
+        """fields 指定时只取这些字段（总带 id），否则取默认字段；include 追加在后。"""
+        selected = (['id'] + [field for field in fields if field != 'id']) if fields else list(default_fields)
+        for field in include or []:
+            if field not in selected:
+                selected.append(field)
+        return selected
+
+    def get_order(
+        self,
+        order_id: int,
+        fields: Optional[List[str]] = None,
+        include: Optional[List[str]] = None,
+    ) -> Dict:
+        if fields is None and include is None:
+            order = self.repository.get_order_by_id(order_id)
+            if not order:
+                raise NotFoundError("\u8ba2\u5355\u4e0d\u5b58\u5728")
+            payload = order.to_dict()
+            payload['conditions'] = [
+                item.to_list_dict() for item in self.repository.get_case_conditions(order_id)
+            ]
+            return payload
+
+        header_fields = [field for field in Order.DETAIL_FIELDS if field not in Order.HEAVY_FIELDS]
+        selected = self._order_projection(fields, include, header_fields)
+        order_fields = [field for field in selected if field != 'conditions']
+        order = self.repository.get_order_by_id(order_id, columns=Order.columns_for_fields(order_fields))
         if not order:
             raise NotFoundError("\u8ba2\u5355\u4e0d\u5b58\u5728")
-
-        payload = order.to_dict()
-        payload['conditions'] = [
-            item.to_list_dict() for item in self.repository.get_case_conditions(order_id)
-        ]
+        payload = order.to_projected_dict(order_fields)
+        if 'conditions' in selected:
+            payload['conditions'] = [
+                item.to_list_dict() for item in self.repository.get_case_conditions(order_id)
+            ]
         return payload
 
-    def create_order(self, order_data: dict, user_identity: str) -> Dict:
-        user = self._get_submit_user_or_raise(user_identity)
-        normalized_identity = self._normalize_domain_account(user.domain_account)
+    def _prepare_order_dict(
+        self, order_data: dict, normalized_identity: str, limits: Dict[str, int]
+    ) -> tuple:
+        """校验单个提单请求并构造订单字段，返回 (order_dict, 本单轮次)。"""
         derived_fields = self._derive_order_fields_from_input_json(order_data.get('input_json'))
         if not derived_fields['conditions']:
             raise BusinessError(ErrorCode.VALIDATION_ERROR, 'input_json.conditions \u4e0d\u80fd\u4e3a\u7a7a')
 
         order_rounds = self._estimate_order_rounds(derived_fields['input_json'])
-        limits = self._get_user_submit_limits(normalized_identity)
         if order_rounds > int(limits['max_batch_size']):
             raise BusinessError(
                 ErrorCode.VALIDATION_ERROR,
                 f'\u672c\u6b21\u63d0\u5355\u8f6e\u6b21 {order_rounds} \u8d85\u8fc7\u4e0a\u9650 {limits["max_batch_size"]}\uff0c\u8bf7\u51cf\u5c11\u8f6e\u6b21\u540e\u518d\u63d0\u4ea4'
             )
 
-        today_used_rounds = self._sum_today_rounds(normalized_identity)
-        daily_round_limit = int(limits['daily_round_limit'])
-        if today_used_rounds + order_rounds > daily_round_limit:
-            raise BusinessError(
-                ErrorCode.VALIDATION_ERROR,
-                f'\u4eca\u65e5\u7d2f\u8ba1\u8f6e\u6b21\u4e0a\u9650\u4e3a {daily_round_limit}\uff0c\u5f53\u524d\u5df2\u4f7f\u7528 {today_used_rounds}\uff0c\u672c\u6b21\u9700 {order_rounds}'
-            )
-
         origin_file = order_data.get('origin_file', {})
         project_info = self._normalize_json_dict(derived_fields['input_json'].get('projectInfo'))
         participant_ids = order_data.get('participant_ids')
@@ -663,19 +1070,86 @@ class OrdersService:
             'status': 0,
             'progress': 0
         }
+        return order_dict, order_rounds
+
+    def _check_daily_round_limit(self, normalized_identity: str, order_rounds: int, daily_round_limit: int) -> None:
+        today_used_rounds = self._get_today_used_rounds(normalized_identity)
+        if today_used_rounds + order_rounds > daily_round_limit:
+            raise BusinessError(
+                ErrorCode.VALIDATION_ERROR,
+                f'\u4eca\u65e5\u7d2f\u8ba1\u8f6e\u6b21\u4e0a\u9650\u4e3a {daily_round_limit}\uff0c\u5f53\u524d\u5df2\u4f7f\u7528 {today_used_rounds}\uff0c\u672c\u6b21\u9700 {order_rounds}'
+            )
+
+    def create_order(self, order_data: dict, user_identity: str) -> Dict:
+        user = self._get_submit_user_or_raise(user_identity)
+        normalized_identity = self._normalize_domain_account(user.domain_account)
+        limits = self._get_user_submit_limits(normalized_identity)
+        order_dict, order_rounds = self._prepare_order_dict(order_data, normalized_identity, limits)
+        daily_round_limit = int(limits['daily_round_limit'])
+        self._check_daily_round_limit(normalized_identity, order_rounds, daily_round_limit)
 
         try:
+            self._reserve_daily_rounds(normalized_identity, order_rounds, daily_round_limit)
             order = self.repository.create_order(order_dict)
             condition_rows = self._build_order_condition_rows(order_dict, order.id, order.order_no)
             condition_entities = self.repository.replace_case_conditions(order.id, condition_rows)
-            self._submit_order_conditions(order, condition_entities)
+            self._enqueue_order_conditions(order, condition_entities)
             payload = order.to_dict()
             payload['conditions'] = [row.to_list_dict() for row in self.repository.get_case_conditions(order.id)]
             self.repository.commit()
-            return payload
         except Exception:
             self.repository.rollback()
+            redis_client.delete(CacheKeys.daily_round_usage(normalized_identity, self._usage_date()))
             raise
+        self._invalidate_order_counts()
+        self._refresh_daily_round_mirror(normalized_identity, self._usage_date())
+        automation_outbox_worker.notify()
+        return payload
+
+    def create_orders_bulk(self, orders_data: List[dict], user_identity: str) -> Dict:
+        """批量提单：整体校验、一次占用轮次，订单/工况/outbox 各一次批量写入，同一事务提交。"""
+        user = self._get_submit_user_or_raise(user_identity)
+        normalized_identity = self._normalize_domain_account(user.domain_account)
+        limits = self._get_user_submit_limits(normalized_identity)
+
+        order_dicts: List[dict] = []
+        total_rounds = 0
+        for index, order_data in enumerate(orders_data):
+            try:
+                order_dict, order_rounds = self._prepare_order_dict(order_data, normalized_identity, limits)
+            except BusinessError as exc:
+                raise BusinessError(exc.code, f'\u7b2c {index + 1} \u4e2a\u8ba2\u5355\uff1a{exc.msg}', exc.data, exc.field)
+            order_dicts.append(order_dict)
+            total_rounds += order_rounds
+        daily_round_limit = int(limits['daily_round_limit'])
+        self._check_daily_round_limit(normalized_identity, total_rounds, daily_round_limit)
+
+        try:
+            self._reserve_daily_rounds(normalized_identity, total_rounds, daily_round_limit)
+            order_ids = self.repository.bulk_create_orders(order_dicts)
+            condition_rows: List[dict] = []
+            for order_dict in order_dicts:
+                condition_rows.extend(self._build_order_condition_rows(
+                    order_dict, order_ids[order_dict['order_no']], order_dict['order_no']
+                ))
+            cases_by_order = self.repository.bulk_insert_case_conditions(condition_rows)
+            if not self.repository.bulk_enqueue_automation_outbox(cases_by_order):
+                for order_id in cases_by_order:
+                    order = self.repository.get_order_by_id(order_id)
+                    self._submit_order_conditions(order, self.repository.get_case_conditions(order_id))
+            items = [
+                {'id': order_ids[order_dict['order_no']], 'order_no': order_dict['order_no']}
+                for order_dict in order_dicts
+            ]
+            self.repository.commit()
+        except Exception:
+            self.repository.rollback()
+            redis_client.delete(CacheKeys.daily_round_usage(normalized_identity, self._usage_date()))
+            raise
+        self._invalidate_order_counts()
+        self._refresh_daily_round_mirror(normalized_identity, self._usage_date())
+        automation_outbox_worker.notify()
+        return {'items': items, 'total': len(items), 'rounds': total_rounds}
 
     def update_order(self, order_id: int, update_data: dict) -> Dict:
         order = self.repository.get_order_by_id(order_id)
@@ -703,6 +1177,13 @@ class OrdersService:
             filtered_data['condition_summary'] = derived_fields['condition_summary']
 
         try:
+            usage = None
+            if 'input_json' in filtered_data:
+                rounds_delta = (
+                    self._estimate_order_rounds(filtered_data['input_json'])
+                    - self._estimate_order_rounds(order.input_json)
+                )
+                usage = self._shift_order_round_usage(order, rounds_delta)
             order = self.repository.update_order(order, filtered_data)
             rebuilt_source = {
                 'input_json': filtered_data.get('input_json', order.input_json),
@@ -710,16 +1191,24 @@ class OrdersService:
                 'remark': filtered_data.get('remark', order.remark),
             }
             condition_rows = self._build_order_condition_rows(rebuilt_source, order.id, order.order_no)
-            self.repository.replace_case_conditions(order.id, condition_rows)
+            condition_entities = self.repository.upsert_case_conditions(order.id, condition_rows)
+            if self.repository.discard_automation_outbox(order.id):
+                # 正在提交的 case 由 dispatcher 回写，不再重复入队
+                in_flight = self.repository.get_in_flight_outbox_case_ids(order.id)
+                self._enqueue_order_conditions(order, [
+                    item for item in condition_entities if self._to_int(item.order_case_id, 0) not in in_flight
+                ])
             self.repository.commit()
             payload = order.to_dict()
             payload['conditions'] = [
                 item.to_list_dict() for item in self.repository.get_case_conditions(order.id)
             ]
-            return payload
         except Exception:
             self.repository.rollback()
             raise
+        if usage:
+            self._refresh_daily_round_mirror(*usage)
+        return payload
 
     def get_order_conditions(self, order_id: int) -> List[Dict]:
         order = self.repository.get_order_by_id(order_id)
@@ -782,7 +1271,11 @@ class OrdersService:
                 "\u53ea\u6709\u672a\u5f00\u59cb\uff08\u6392\u961f\u4e2d\uff09\u72b6\u6001\u7684\u8ba2\u5355\u53ef\u4ee5\u5220\u9664"
             )
 
+        usage = self._shift_order_round_usage(order, -self._estimate_order_rounds(order.input_json))
         self.repository.delete_order(order)
+        self._invalidate_order_counts()
+        if usage:
+            self._refresh_daily_round_mirror(*usage)
 
     def verify_file(self, path: str, file_type: int = 1) -> Dict:
         if file_type == 2:
@@ -814,7 +1307,7 @@ class OrdersService:
         inp_sets: List[Dict] = []
         if os.path.isfile(abs_path):
             if file_name.lower().endswith('.inp'):
-                inp_sets = self._parse_inp_sets(abs_path)
+                inp_sets = inp_set_index.get(abs_path)
         else:
             current_app.logger.info(f"File is not local: {abs_path}; path format validation passed")
             if file_name.lower().endswith('.inp'):
@@ -831,7 +1324,7 @@ class OrdersService:
     @staticmethod
     def _parse_inp_sets(file_path: str) -> List[Dict]:
         """
-        ?? INP ???? set ???
+        解析 INP 文件中的 set 定义（不走缓存与进程池，规则见 inp_scanner）
         支持的关键字:
         - *ELSET, ELSET=name
         - *NSET, NSET=name
@@ -841,39 +1334,11 @@ class OrdersService:
         Returns:
             [{"type": "eleset"|"nodeset"|"component", "name": "SET-1"}, ...]
         """
-        sets: List[Dict] = []
-        seen: set = set()
-
-        # 正则：匹配 *KEYWORD, ... NAME=xxx 或 ELSET=xxx
-        pattern_elset = re.compile(r'\*ELSET\b.*?ELSET\s*=\s*([^\s,]+)', re.IGNORECASE)
-        pattern_nset = re.compile(r'\*NSET\b.*?NSET\s*=\s*([^\s,]+)', re.IGNORECASE)
-        pattern_part = re.compile(r'\*PART\b.*?NAME\s*=\s*([^\s,]+)', re.IGNORECASE)
-        pattern_instance = re.compile(r'\*INSTANCE\b.*?NAME\s*=\s*([^\s,]+)', re.IGNORECASE)
-
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    line = line.strip()
-                    if not line.startswith('*'):
-                        continue
-
-                    for pattern, set_type in [
-                        (pattern_elset, 'eleset'),
-                        (pattern_nset, 'nodeset'),
-                        (pattern_part, 'component'),
-                        (pattern_instance, 'component'),
-                    ]:
-                        m = pattern.match(line)
-                        if m:
-                            name = m.group(1).strip()
-                            key = (set_type, name)
-                            if key not in seen:
-                                seen.add(key)
-                                sets.append({'type': set_type, 'name': name})
+            return scan_inp_sets(file_path)
         except Exception as e:
-            current_app.logger.warning(f"解析 INP 文件失败: {file_path}, {e}")
-
-        return sets
+            logger.warning(f"解析 INP 文件失败: {file_path}, {e}")
+            return []
 
     def get_statistics(self) -> Dict:
         """获取订单统计数据"""
@@ -2,9 +2,9 @@
 Results module repository layer.
 Responsible for pure data access only.
 """
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import func, inspect
+from sqlalchemy import and_, func, inspect, or_
 
 from app.extensions import db
 from app.models.config import FoldType, SimType
@@ -13,6 +13,11 @@ from app.models.case_opti import CaseConditionOpti, OrderCaseOpti
 from app.models.result import Round, SimTypeResult
 
 
+ROUND_STATUS_COMPLETED = 2
+ROUND_STATUS_FAILED = 3
+ROUND_BATCH_QUERY_SIZE = 500
+
+
 class ResultsRepository:
     """Repository for results related queries."""
 
@@ -46,16 +51,54 @@ class ResultsRepository:
         page_size: int = 100,
         status: Optional[int] = None,
     ) -> Tuple[List[Round], int]:
-        query = self.session.query(Round).filter_by(sim_type_result_id=sim_type_result_id)
+        total = self.count_rounds(sim_type_result_id, status)
+        items, _has_more = self.list_rounds(
+            sim_type_result_id,
+            limit=page_size,
+            status=status,
+            offset=(page - 1) * page_size,
+        )
+        return items, total
 
+    def _rounds_query(self, sim_type_result_id: int, status: Optional[int] = None):
+        query = self.session.query(Round).filter(Round.sim_type_result_id == sim_type_result_id)
         if status is not None:
-            query = query.filter_by(status=status)
+            query = query.filter(Round.status == status)
+        return query
 
-        query = query.order_by(Round.round_index.asc())
-        total = query.count()
-        offset = (page - 1) * page_size
-        items = query.offset(offset).limit(page_size).all()
-        return items, total
+    def count_rounds(self, sim_type_result_id: int, status: Optional[int] = None) -> int:
+        query = self.session.query(func.count(Round.id)).filter(Round.sim_type_result_id == sim_type_result_id)
+        if status is not None:
+            query = query.filter(Round.status == status)
+        return int(query.scalar() or 0)
+
+    def list_rounds(
+        self,
+        sim_type_result_id: int,
+        limit: int,
+        status: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[Tuple[int, int]] = None,
+    ) -> Tuple[List[Round], bool]:
+        """按 (round_index, id) 顺序取一页轮次，after 为上一页最后一行的排序键。
+
+        过滤 + 排序列与 idx_simresult_status_round / idx_simresult_round 对齐，
+        keyset 模式下只扫描本页所需的索引区间。
+        """
+        query = self._rounds_query(sim_type_result_id, status)
+        if after is not None:
+            after_round_index, after_id = after
+            query = query.filter(
+                or_(
+                    Round.round_index > after_round_index,
+                    and_(Round.round_index == after_round_index, Round.id > after_id),
+                )
+            )
+        query = query.order_by(Round.round_index.asc(), Round.id.asc())
+        if offset > 0:
+            query = query.offset(offset)
+        rows = query.limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
 
     def get_round_by_id(self, round_id: int) -> Optional[Round]:
         return self.session.get(Round, round_id)
@@ -88,15 +131,130 @@ class ResultsRepository:
         if not round_obj:
             return False
 
+        result = self._lock_sim_type_result(round_obj.sim_type_result_id)
+        counts = self._ensure_status_counts(result) if result else None
+        if counts is not None:
+            self._shift_status_count(counts, round_obj.status, status)
         round_obj.status = status
         if progress is not None and hasattr(round_obj, "progress"):
             setattr(round_obj, "progress", progress)
         if error_msg is not None:
             round_obj.error_msg = error_msg
+        if result is not None and counts is not None:
+            self._write_status_counts(result, counts)
 
         self.session.commit()
         return True
 
+    def apply_round_status_batch(
+        self,
+        sim_type_result_id: int,
+        updates: List[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        """单事务批量写入轮次状态，并增量维护结果表上的轮次计数。
+
+        updates 每项包含 round_id 或 round_index，以及 status/progress/error_msg；
+        round_index 对应的轮次不存在时新建。
+        """
+        result = self._lock_sim_type_result(sim_type_result_id)
+        if not result:
+            return None
+        counts = self._ensure_status_counts(result)
+
+        round_ids = [item["round_id"] for item in updates if item.get("round_id")]
+        round_indexes = [item["round_index"] for item in updates if not item.get("round_id") and item.get("round_index")]
+        by_id: Dict[int, Round] = {}
+        by_index: Dict[int, Round] = {}
+        for start in range(0, len(round_ids), ROUND_BATCH_QUERY_SIZE):
+            chunk = round_ids[start:start + ROUND_BATCH_QUERY_SIZE]
+            for round_obj in self._rounds_query(sim_type_result_id).filter(Round.id.in_(chunk)).all():
+                by_id[round_obj.id] = round_obj
+        for start in range(0, len(round_indexes), ROUND_BATCH_QUERY_SIZE):
+            chunk = round_indexes[start:start + ROUND_BATCH_QUERY_SIZE]
+            for round_obj in self._rounds_query(sim_type_result_id).filter(Round.round_index.in_(chunk)).all():
+                by_index.setdefault(round_obj.round_index, round_obj)
+
+        updated = 0
+        created = 0
+        missing: List[int] = []
+        for item in updates:
+            status = item["status"]
+            round_id = item.get("round_id")
+            round_obj = by_id.get(round_id) if round_id else by_index.get(item.get("round_index"))
+            if round_obj is None:
+                if round_id:
+                    missing.append(round_id)
+                    continue
+                round_obj = Round(
+                    sim_type_result_id=result.id,
+                    order_id=result.order_id,
+                    sim_type_id=result.sim_type_id,
+                    round_index=item["round_index"],
+                    status=status,
+                )
+                self.session.add(round_obj)
+                by_index[round_obj.round_index] = round_obj
+                self._shift_status_count(counts, None, status, new_round=True)
+                created += 1
+            else:
+                self._shift_status_count(counts, round_obj.status, status)
+                round_obj.status = status
+                updated += 1
+            if item.get("progress") is not None and hasattr(round_obj, "progress"):
+                setattr(round_obj, "progress", item["progress"])
+            if item.get("error_msg") is not None:
+                round_obj.error_msg = item["error_msg"]
+
+        self._write_status_counts(result, counts)
+        self.session.commit()
+        return {"updated": updated, "created": created, "missing": missing}
+
+    def _lock_sim_type_result(self, result_id: int) -> Optional[SimTypeResult]:
+        return (
+            self.session.query(SimTypeResult)
+            .filter(SimTypeResult.id == result_id)
+            .with_for_update()
+            .first()
+        )
+
+    def _ensure_status_counts(self, result: SimTypeResult) -> Dict[str, int]:
+        """返回计数副本；历史数据未初始化时用一次 GROUP BY 回填。"""
+        if isinstance(result.round_status_counts, dict):
+            return {str(key): int(value or 0) for key, value in result.round_status_counts.items()}
+        status_counts = (
+            self.session.query(Round.status, func.count(Round.id))
+            .filter(Round.sim_type_result_id == result.id)
+            .group_by(Round.status)
+            .all()
+        )
+        counts = {str(status): int(count) for status, count in status_counts}
+        self._write_status_counts(result, counts)
+        return dict(counts)
+
+    @staticmethod
+    def _shift_status_count(
+        counts: Dict[str, int],
+        old_status: Optional[int],
+        new_status: int,
+        new_round: bool = False,
+    ) -> None:
+        if not new_round:
+            if old_status == new_status:
+                return
+            old_key = str(old_status)
+            counts[old_key] = max(counts.get(old_key, 0) - 1, 0)
+            if counts[old_key] == 0:
+                counts.pop(old_key)
+        new_key = str(new_status)
+        counts[new_key] = counts.get(new_key, 0) + 1
+
+    @staticmethod
+    def _write_status_counts(result: SimTypeResult, counts: Dict[str, int]) -> None:
+        result.round_status_counts = dict(counts)
+        result.total_rounds = sum(counts.values())
+        result.completed_rounds = counts.get(str(ROUND_STATUS_COMPLETED), 0)
+        result.failed_rounds = counts.get(str(ROUND_STATUS_FAILED), 0)
+
     def get_sim_type_name(self, sim_type_id: int) -> Optional[str]:
         sim_type = self.session.get(SimType, sim_type_id)
         return sim_type.name if sim_type else None
@@ -110,18 +268,15 @@ class ResultsRepository:
         if not result:
             return {}
 
-        status_counts = (
-            self.session.query(Round.status, func.count(Round.id))
-            .filter_by(sim_type_result_id=sim_type_result_id)
-            .group_by(Round.status)
-            .all()
-        )
+        if not isinstance(result.round_status_counts, dict):
+            self._ensure_status_counts(result)
+            self.session.commit()
 
         return {
             "totalRounds": result.total_rounds,
             "completedRounds": result.completed_rounds,
             "failedRounds": result.failed_rounds,
-            "statusDistribution": {str(status): count for status, count in status_counts},
+            "statusDistribution": dict(result.round_status_counts or {}),
         }
 
     def get_order_conditions(self, order_id: int) -> List[CaseConditionOpti]:
@@ -134,6 +289,11 @@ class ResultsRepository:
             .all()
         )
 
+    def get_case_condition_by_id(self, case_condition_id: int) -> Optional[CaseConditionOpti]:
+        if not self._has_case_condition_table():
+            return None
+        return self.session.get(CaseConditionOpti, case_condition_id)
+
     def get_order_cases(self, order_id: int) -> List[OrderCaseOpti]:
         if not self._has_case_table():
             return []
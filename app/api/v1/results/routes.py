@@ -9,7 +9,8 @@ from app.common import error, success
 from app.common.errors import NotFoundError
 from app.common.serializers import get_snake_json
 from app.constants import ErrorCode
-from .schemas import RoundsQueryParams, UpdateStatusRequest
+from app.services.external_data.mysql56_client import ExternalDataUnavailableError
+from .schemas import BatchRoundStatusRequest, RoundsQueryParams, UpdateStatusRequest
 from .service import results_service
 
 results_bp = Blueprint("results", __name__, url_prefix="/results")
@@ -41,6 +42,7 @@ def get_rounds(sim_type_result_id: int):
             page=request.args.get("page", 1, type=int),
             page_size=int(request.args.get("page_size") or request.args.get("pageSize") or 100),
             status=request.args.get("status", type=int),
+            cursor=request.args.get("cursor") or None,
         )
         return success(
             results_service.get_rounds(
@@ -48,6 +50,7 @@ def get_rounds(sim_type_result_id: int):
                 page=validated.page,
                 page_size=validated.page_size,
                 status=validated.status,
+                cursor=validated.cursor,
             )
         )
     except ValidationError as exc:
@@ -59,7 +62,30 @@ def get_rounds(sim_type_result_id: int):
 @results_bp.route("/order/<int:order_id>/cases", methods=["GET"])
 @jwt_required()
 def get_order_case_results(order_id: int):
-    return success(results_service.get_order_case_results(order_id))
+    try:
+        return success(results_service.get_order_case_results(order_id))
+    except ExternalDataUnavailableError as exc:
+        return error(ErrorCode.EXTERNAL_SERVICE_ERROR, exc.msg, http_status=503)
+
+
+@results_bp.route(
+    "/case-condition/<int:case_condition_id>/rounds/<int:circle_id>/attachments",
+    methods=["GET"],
+)
+@jwt_required()
+def get_round_output_attachments(case_condition_id: int, circle_id: int):
+    try:
+        return success(
+            results_service.get_round_output_attachments(
+                case_condition_id=case_condition_id,
+                circle_id=circle_id,
+                output_name=request.args.get("output") or None,
+            )
+        )
+    except NotFoundError as exc:
+        return error(ErrorCode.RESOURCE_NOT_FOUND, str(exc), http_status=404)
+    except ExternalDataUnavailableError as exc:
+        return error(ErrorCode.EXTERNAL_SERVICE_ERROR, exc.msg, http_status=503)
 
 
 @results_bp.route("/sim-type/<int:result_id>/status", methods=["PATCH"])
@@ -99,3 +125,21 @@ def update_round_status(round_id: int):
         return error(ErrorCode.VALIDATION_ERROR, str(exc), http_status=400)
     except NotFoundError as exc:
         return error(ErrorCode.RESOURCE_NOT_FOUND, str(exc), http_status=404)
+
+
+@results_bp.route("/sim-type/<int:result_id>/rounds/status", methods=["PATCH"])
+@jwt_required()
+def ingest_round_statuses(result_id: int):
+    try:
+        data = get_snake_json() or {}
+        validated = BatchRoundStatusRequest(**data)
+        return success(
+            results_service.ingest_round_statuses(
+                sim_type_result_id=result_id,
+                items=[item.model_dump() for item in validated.items],
+            )
+        )
+    except ValidationError as exc:
+        return error(ErrorCode.VALIDATION_ERROR, str(exc), http_status=400)
+    except NotFoundError as exc:
+        return error(ErrorCode.RESOURCE_NOT_FOUND, str(exc), http_status=404)
@@ -4,7 +4,9 @@
 字段使用snake_case，由全局中间件自动转换camelCase
 """
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from app.common.pagination import decode_cursor
 
 
 class RoundsQueryParams(BaseModel):
@@ -12,6 +14,14 @@ class RoundsQueryParams(BaseModel):
     page: int = Field(1, ge=1, description="页码")
     page_size: int = Field(100, ge=1, le=20000, description="每页数量，最大20000")
     status: Optional[int] = Field(None, description="状态筛选: 0=未开始,1=运行中,2=完成,3=失败")
+    cursor: Optional[str] = Field(None, description="keyset 游标，传入时忽略 page")
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, value: Optional[str]) -> Optional[str]:
+        if value:
+            decode_cursor(value, 2)
+        return value or None
 
 
 class SimTypeResultResponse(BaseModel):
@@ -60,6 +70,8 @@ class RoundsPaginatedResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 
 class UpdateStatusRequest(BaseModel):
@@ -67,3 +79,23 @@ class UpdateStatusRequest(BaseModel):
     status: int = Field(..., ge=0, le=7, description="状态: 0=未开始,1=运行中,2=完成,3=失败,4=草稿,5=取消,6=启动中,7=小模块完成")
     progress: Optional[int] = Field(None, ge=0, le=100, description="进度百分比")
     error_msg: Optional[str] = Field(None, description="错误信息")
+
+
+class RoundStatusItem(BaseModel):
+    """批量轮次状态项，round_id 与 round_index 至少传一个"""
+    round_id: Optional[int] = Field(None, ge=1, description="轮次ID")
+    round_index: Optional[int] = Field(None, ge=1, description="轮次索引，不存在时新建轮次")
+    status: int = Field(..., ge=0, le=7, description="状态")
+    progress: Optional[int] = Field(None, ge=0, le=100, description="进度百分比")
+    error_msg: Optional[str] = Field(None, description="错误信息")
+
+    @model_validator(mode="after")
+    def validate_locator(self):
+        if self.round_id is None and self.round_index is None:
+            raise ValueError("round_id 和 round_index 至少传一个")
+        return self
+
+
+class BatchRoundStatusRequest(BaseModel):
+    """批量更新轮次状态请求"""
+    items: List[RoundStatusItem] = Field(..., min_length=1, max_length=20000, description="状态列表")
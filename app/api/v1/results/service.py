@@ -5,7 +5,13 @@ import json
 from math import ceil
 from typing import Any, Dict, List, Optional, Tuple
 
+from flask import current_app
+
+from app.common.cache_service import CacheKeys
 from app.common.errors import NotFoundError
+from app.common.pagination import decode_cursor, encode_cursor
+from app.common.redis_client import redis_client
+from app.common.serializers import to_camel_case
 from app.services.external_data import optimization_repository
 from .repository import results_repository
 
@@ -57,17 +63,32 @@ class ResultsService:
         page: int = 1,
         page_size: int = 100,
         status: Optional[int] = None,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         result = self.repository.get_sim_type_result_by_id(sim_type_result_id)
         if not result:
             raise NotFoundError(f"仿真类型结果 {sim_type_result_id} 不存在")
 
-        rounds, total = self.repository.get_rounds_paginated(
-            sim_type_result_id=sim_type_result_id,
-            page=page,
-            page_size=page_size,
-            status=status,
-        )
+        total = self._get_round_total(sim_type_result_id, status)
+        if cursor:
+            after_round_index, after_id = decode_cursor(cursor, 2)
+            rounds, has_more = self.repository.list_rounds(
+                sim_type_result_id,
+                limit=page_size,
+                status=status,
+                after=(self._to_int(after_round_index, 0), self._to_int(after_id, 0)),
+            )
+        else:
+            rounds, has_more = self.repository.list_rounds(
+                sim_type_result_id,
+                limit=page_size,
+                status=status,
+                offset=(page - 1) * page_size,
+            )
+
+        next_cursor = None
+        if has_more and rounds:
+            next_cursor = encode_cursor(rounds[-1].round_index, rounds[-1].id)
 
         return {
             "items": [self._serialize_round(item) for item in rounds],
@@ -75,8 +96,30 @@ class ResultsService:
             "page": page,
             "pageSize": page_size,
             "totalPages": ceil(total / page_size) if total > 0 else 0,
+            "nextCursor": next_cursor,
+            "hasMore": has_more,
         }
 
+    def _get_round_total(self, sim_type_result_id: int, status: Optional[int]) -> int:
+        """轮次总数短 TTL 缓存，翻页时不再每页 COUNT 一次。"""
+        ttl = int(current_app.config.get("RESULTS_ROUND_TOTAL_CACHE_TTL", 60) or 0)
+        key = CacheKeys.round_totals(sim_type_result_id)
+        field = "all" if status is None else str(status)
+        totals: Dict[str, Any] = {}
+        if ttl > 0:
+            try:
+                totals = self._normalize_dict(json.loads(redis_client.get(key) or "{}"))
+            except ValueError:
+                totals = {}
+            if field in totals:
+                return self._to_int(totals[field], 0)
+
+        total = self.repository.count_rounds(sim_type_result_id, status)
+        if ttl > 0:
+            totals[field] = total
+            redis_client.set(key, json.dumps(totals), ttl=ttl)
+        return total
+
     def update_sim_type_result_status(
         self,
         result_id: int,
@@ -99,8 +142,53 @@ class ResultsService:
         if not success:
             raise NotFoundError(f"轮次 {round_id} 不存在")
         round_obj = self.repository.get_round_by_id(round_id)
+        redis_client.delete(CacheKeys.round_totals(round_obj.sim_type_result_id))
         return self._serialize_round(round_obj)
 
+    def ingest_round_statuses(self, sim_type_result_id: int, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """计算集群批量回传轮次状态：单事务写入并增量维护结果统计。"""
+        summary = self.repository.apply_round_status_batch(sim_type_result_id, items)
+        if summary is None:
+            raise NotFoundError(f"仿真类型结果 {sim_type_result_id} 不存在")
+        redis_client.delete(CacheKeys.round_totals(sim_type_result_id))
+        return {
+            **summary,
+            "statistics": self.repository.get_result_statistics(sim_type_result_id),
+        }
+
+    def get_round_output_attachments(
+        self,
+        case_condition_id: int,
+        circle_id: int,
+        output_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """懒加载单个外部轮次的输出附件（图片、动画、曲线 JSON、数据目录）。"""
+        condition = self.repository.get_case_condition_by_id(case_condition_id)
+        if not condition:
+            raise NotFoundError(f"订单工况 {case_condition_id} 不存在")
+
+        opt_job_id = self._to_int(getattr(condition, 'opt_job_id', None), 0)
+        attachments: List[Dict[str, Any]] = []
+        if opt_job_id > 0:
+            attachments = optimization_repository.get_round_output_attachments(
+                job_id=opt_job_id,
+                circle_id=circle_id,
+                condition_config_id=self._to_int(getattr(condition, 'opt_condition_config_id', None), 0),
+            )
+        if output_name:
+            attachments = [
+                item
+                for item in attachments
+                if output_name in (item.get('respName'), to_camel_case(str(item.get('respName') or '')))
+            ]
+
+        return {
+            'caseConditionId': case_condition_id,
+            'optJobId': opt_job_id or None,
+            'circleId': circle_id,
+            'attachments': attachments,
+        }
+
     def get_order_case_results(self, order_id: int) -> Dict[str, Any]:
         conditions = self.repository.get_order_conditions(order_id)
         cases = self.repository.get_order_cases(order_id)
@@ -245,6 +333,8 @@ class ResultsService:
 
         return {
             'orderId': order_id,
+            'stale': any(item.get('stale') for item in job_summaries)
+            or any(item.get('stale') for item in issue_map.values()),
             'cases': sorted(result_cases, key=lambda item: (item.get('caseIndex') or 0, item.get('id') or 0)),
             'conditions': [
                 self._serialize_order_condition(condition, include_mock_summary=False, include_snapshot=False)
@@ -369,7 +459,7 @@ class ResultsService:
             outputs = {}
             output_origins = {}
             output_finals = {}
-            output_attachments: Dict[str, Dict[str, Any]] = {}
+            attachment_outputs: List[str] = []
             params = {}
             for param in round_item.get('params') or []:
                 param_condition_config_id = self._to_int(param.get('n_condition_config_id'), 0)
@@ -397,16 +487,8 @@ class ResultsService:
                 output_origins[str(resp_name)] = origin_value
                 if final_value not in (None, ''):
                     output_finals[str(resp_name)] = final_value
-                output_attachments[str(resp_name)] = {
-                    'imagePaths': output.get('imagePaths') or [],
-                    'aviPaths': output.get('aviPaths') or [],
-                    'curveJsonPath': output.get('curveJsonPath'),
-                    'dataDir': output.get('dataDir'),
-                    'taskId': output.get('taskId'),
-                    'optDataId': output.get('optDataId'),
-                    'originValue': origin_value,
-                    'finalValue': final_value,
-                }
+                if output.get('hasAttachments') and str(resp_name) not in attachment_outputs:
+                    attachment_outputs.append(str(resp_name))
                 matched_outputs.append(output)
             first_output = matched_outputs[0] if matched_outputs else {}
             items.append(
@@ -425,7 +507,7 @@ class ResultsService:
                     'outputs': outputs,
                     'outputOrigins': output_origins,
                     'outputFinals': output_finals if is_bayesian else {},
-                    'outputAttachments': output_attachments,
+                    'attachmentOutputs': attachment_outputs,
                     'optDataId': first_output.get('optDataId'),
                     'taskId': first_output.get('taskId'),
                     'dataDir': first_output.get('dataDir'),
@@ -454,12 +536,13 @@ class ResultsService:
             opt_issue,
             [job_summary],
         )
-        condition_payload['roundSchema'] = self._build_round_schema(condition)
+        round_schema = self._build_round_schema(condition)
+        condition_payload['roundSchema'] = round_schema
         return {
             'orderCondition': condition_payload,
             'resultSource': 'external',
             'algorithmType': getattr(condition, 'algorithm_type', None),
-            'columns': self._build_round_schema(condition)['columns'],
+            'columns': round_schema['columns'],
             'items': items,
             'statistics': self._normalize_dict(condition_payload.get('statistics')),
             'page': 1,
@@ -638,7 +721,9 @@ class ResultsService:
         alg_type = self._to_int(opt_params.get("alg_type", opt_params.get("algType", 2)), 2)
         if alg_type in (2, 5):
             doe_data = opt_params.get("doe_param_data", opt_params.get("doeParamData"))
-            return len(doe_data) if isinstance(doe_data, list) else 0
+            if isinstance(doe_data, list):
+                return len(doe_data)
+            return self._to_int(opt_params.get("doeRowCount", opt_params.get("doe_row_count")), 0)
 
         if alg_type != 1:
             return 0
@@ -959,7 +1044,45 @@ class ResultsService:
 
         return max(index, 1), max(total, 1)
 
+    def _get_round_meta(self, condition) -> Dict[str, Any]:
+        """按工况 id + updated_at 缓存参数名、输出名和轮次表头，避免逐轮重复解析快照。
+
+        缓存挂在工况对象上，随会话/请求释放；快照对象被整体替换时同样失效。
+        """
+        snapshot = getattr(condition, "condition_snapshot", None)
+        version = (
+            getattr(condition, "id", None),
+            getattr(condition, "updated_at", None),
+            getattr(condition, "algorithm_type", None),
+            getattr(condition, "output_count", None),
+        )
+        cached = getattr(condition, "_round_meta_cache", None)
+        if cached is not None and cached[0] == version and cached[1] is snapshot:
+            return cached[2]
+
+        param_names = self._parse_param_names(condition)
+        output_names = self._parse_output_names(condition)
+        meta = {
+            "paramNames": param_names,
+            "outputNames": output_names,
+            "schema": self._compose_round_schema(condition, param_names, output_names),
+        }
+        try:
+            condition._round_meta_cache = (version, snapshot, meta)
+        except AttributeError:
+            pass
+        return meta
+
     def _extract_param_names(self, condition) -> List[str]:
+        return list(self._get_round_meta(condition)["paramNames"])
+
+    def _extract_output_names(self, condition) -> List[str]:
+        return list(self._get_round_meta(condition)["outputNames"])
+
+    def _build_round_schema(self, condition) -> Dict[str, Any]:
+        return dict(self._get_round_meta(condition)["schema"])
+
+    def _parse_param_names(self, condition) -> List[str]:
         snapshot = self._normalize_dict(getattr(condition, "condition_snapshot", None))
         params = self._normalize_dict(snapshot.get("params"))
         param_details = self._normalize_list(
@@ -993,7 +1116,7 @@ class ResultsService:
 
         return ["param1", "param2", "param3"]
 
-    def _extract_output_names(self, condition) -> List[str]:
+    def _parse_output_names(self, condition) -> List[str]:
         snapshot = self._normalize_dict(getattr(condition, "condition_snapshot", None))
         output = self._normalize_dict(snapshot.get("output"))
         resp_details = self._normalize_list(
@@ -1024,10 +1147,13 @@ class ResultsService:
 
         return ["output1", "output2", "output3"]
 
-    def _build_round_schema(self, condition) -> Dict[str, Any]:
+    def _compose_round_schema(
+        self,
+        condition,
+        param_names: List[str],
+        output_names: List[str],
+    ) -> Dict[str, Any]:
         algorithm_type = str(getattr(condition, "algorithm_type", "") or "").upper()
-        param_names = self._extract_param_names(condition)
-        output_names = self._extract_output_names(condition)
         is_bayesian = algorithm_type == "BAYESIAN"
 
         columns: List[Dict[str, Any]] = [{"key": "roundIndex", "label": "轮次", "type": "base"}]
@@ -0,0 +1,79 @@
+"""
+分片接收位图
+位序与 Redis SETBIT 一致（offset 0 为首字节最高位），Redis 与数据库中的位图字节可直接互换
+"""
+from typing import List, Optional
+
+
+def bitmap_size(total_chunks: int) -> int:
+    """容纳 total_chunks 个分片所需字节数"""
+    return (total_chunks + 7) // 8
+
+
+def set_bit(bitmap: Optional[bytes], index: int, total_chunks: int) -> bytes:
+    """置位并返回新位图（长度按 total_chunks 补齐）
+
+    Raises:
+        ValueError: index 不在 [0, total_chunks) 内
+    """
+    if not 0 <= index < total_chunks:
+        raise ValueError(f'chunk index {index} out of range [0, {total_chunks})')
+    data = bytearray(bitmap or b'')
+    if len(data) < bitmap_size(total_chunks):
+        data.extend(b'\x00' * (bitmap_size(total_chunks) - len(data)))
+    data[index // 8] |= 0x80 >> (index % 8)
+    return bytes(data)
+
+
+def has_bit(bitmap: Optional[bytes], index: int) -> bool:
+    if not bitmap or index < 0 or index // 8 >= len(bitmap):
+        return False
+    return bool(bitmap[index // 8] & (0x80 >> (index % 8)))
+
+
+def count_bits(bitmap: Optional[bytes]) -> int:
+    """已接收分片数"""
+    return int.from_bytes(bitmap, 'big').bit_count() if bitmap else 0
+
+
+def merge(left: Optional[bytes], right: Optional[bytes]) -> bytes:
+    """按位或合并两份位图（位只增不减，合并不会丢失任一侧的记录）"""
+    left, right = left or b'', right or b''
+    size = max(len(left), len(right))
+    if not size:
+        return b''
+    merged = int.from_bytes(left.ljust(size, b'\x00'), 'big') | int.from_bytes(right.ljust(size, b'\x00'), 'big')
+    return merged.to_bytes(size, 'big')
+
+
+def from_indexes(indexes: List[int], total_chunks: int) -> bytes:
+    """由分片索引列表构建位图（兼容历史逐行记录的上传会话）"""
+    data = bytearray(bitmap_size(total_chunks))
+    for index in indexes:
+        if 0 <= index < total_chunks:
+            data[index // 8] |= 0x80 >> (index % 8)
+    return bytes(data)
+
+
+def missing_ranges(bitmap: Optional[bytes], total_chunks: int) -> List[List[int]]:
+    """未接收分片的闭区间列表，如 [[0, 3], [7, 7]]；整字节全 1 时直接跳过"""
+    data = bitmap or b''
+    ranges: List[List[int]] = []
+    start = None
+    index = 0
+    while index < total_chunks:
+        byte_index = index // 8
+        if index % 8 == 0 and start is None and byte_index < len(data) and data[byte_index] == 0xFF \
+                and index + 8 <= total_chunks:
+            index += 8
+            continue
+        received = has_bit(data, index)
+        if not received and start is None:
+            start = index
+        elif received and start is not None:
+            ranges.append([start, index - 1])
+            start = None
+        index += 1
+    if start is not None:
+        ranges.append([start, total_chunks - 1])
+    return ranges
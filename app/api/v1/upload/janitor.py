@@ -0,0 +1,55 @@
+"""
+过期上传清理
+进程内定时线程（UPLOAD_JANITOR_ENABLED 开启，多实例部署只需在一个实例开启），
+也可由 scripts/purge_expired_uploads.py 通过 cron 执行
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UploadJanitor:
+    """按 UPLOAD_JANITOR_INTERVAL_SECONDS 周期执行清理的守护线程"""
+
+    def __init__(self) -> None:
+        self._app = None
+        self._purge: Optional[Callable[[], Dict]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app, purge: Callable[[], Dict]) -> None:
+        if self.running:
+            return
+        self._app = app
+        self._purge = purge
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='upload-janitor', daemon=True)
+        self._thread.start()
+        logger.info('[upload-janitor] started')
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        interval = float(self._app.config.get('UPLOAD_JANITOR_INTERVAL_SECONDS', 3600))
+        while not self._stopped.wait(interval):
+            try:
+                with self._app.app_context():
+                    stats = self._purge()
+                logger.info(f'[upload-janitor] purged: {stats}')
+            except Exception as exc:
+                logger.exception(f'[upload-janitor] purge failed: {exc}')
+
+
+upload_janitor = UploadJanitor()
@@ -3,10 +3,12 @@
 """
 import time
 from typing import Optional, List
-from sqlalchemy import inspect
-from app.models.upload import UploadFile
+from sqlalchemy import and_, inspect, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+from app.models.upload import UploadBlob, UploadFile
 from app.models.upload_chunk import UploadChunk
 from app import db
+from . import chunk_bitmap
 
 
 class UploadRepository:
@@ -25,6 +27,13 @@ class UploadRepository:
             UploadFile.__table__.create(bind=db.engine, checkfirst=True)
         if not inspector.has_table(UploadChunk.__tablename__):
             UploadChunk.__table__.create(bind=db.engine, checkfirst=True)
+        if not inspector.has_table(UploadBlob.__tablename__):
+            UploadBlob.__table__.create(bind=db.engine, checkfirst=True)
+        columns = {column['name'] for column in inspect(db.engine).get_columns(UploadFile.__tablename__)}
+        if 'chunk_bitmap' not in columns:
+            column_type = 'BLOB' if db.engine.dialect.name == 'sqlite' else 'VARBINARY(8192)'
+            with db.engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE upload_files ADD COLUMN chunk_bitmap {column_type} NULL'))
         cls._schema_checked = True
 
     @staticmethod
@@ -38,6 +47,12 @@ class UploadRepository:
             status='completed'
         ).first()
 
+    @staticmethod
+    def find_by_id(file_id: int) -> Optional[UploadFile]:
+        """根据文件ID查找"""
+        UploadRepository.ensure_upload_schema()
+        return db.session.get(UploadFile, file_id)
+
     @staticmethod
     def find_by_upload_id(upload_id: str) -> Optional[UploadFile]:
         """根据上传ID查找"""
@@ -53,29 +68,42 @@ class UploadRepository:
         db.session.commit()
         return upload
 
-    @staticmethod
-    def add_chunk(upload_id: str, chunk_index: int, chunk_hash: str) -> None:
-        """添加分片记录（使用INSERT IGNORE避免重复）"""
-        UploadRepository.ensure_upload_schema()
-        chunk = UploadChunk(
-            upload_id=upload_id,
-            chunk_index=chunk_index,
-            chunk_hash=chunk_hash,
-            uploaded_at=int(time.time())
-        )
-        db.session.add(chunk)
-        try:
-            db.session.commit()
-        except Exception:
-            db.session.rollback()  # 重复插入时忽略
-
     @staticmethod
     def get_uploaded_chunks(upload_id: str) -> List[int]:
-        """获取已上传的分片索引列表"""
+        """获取历史逐行记录的分片索引列表（位图上线前创建的会话）"""
         UploadRepository.ensure_upload_schema()
         chunks = UploadChunk.query.filter_by(upload_id=upload_id).all()
         return sorted([c.chunk_index for c in chunks])
 
+    @staticmethod
+    def get_chunk_bitmap(upload: UploadFile) -> bytes:
+        """读取持久化位图；历史会话没有位图时由分片行构建"""
+        if upload.chunk_bitmap is not None:
+            return upload.chunk_bitmap
+        indexes = UploadRepository.get_uploaded_chunks(upload.upload_id)
+        return chunk_bitmap.from_indexes(indexes, upload.total_chunks)
+
+    @staticmethod
+    def mark_chunk_received(upload: UploadFile, chunk_index: int) -> bytes:
+        """行锁内置位并持久化，返回新位图（Redis 不可用时的路径）"""
+        UploadRepository.ensure_upload_schema()
+        locked = UploadFile.query.filter_by(id=upload.id).with_for_update().populate_existing().one()
+        bitmap = chunk_bitmap.set_bit(
+            UploadRepository.get_chunk_bitmap(locked), chunk_index, locked.total_chunks
+        )
+        locked.chunk_bitmap = bitmap
+        locked.updated_at = int(time.time())
+        db.session.commit()
+        return bitmap
+
+    @staticmethod
+    def save_chunk_bitmap(upload: UploadFile, bitmap: bytes) -> None:
+        """把 Redis 中的位图落库（位只增不减，按位或合并避免覆盖并发写入）"""
+        locked = UploadFile.query.filter_by(id=upload.id).with_for_update().populate_existing().one()
+        locked.chunk_bitmap = chunk_bitmap.merge(UploadRepository.get_chunk_bitmap(locked), bitmap)
+        locked.updated_at = int(time.time())
+        db.session.commit()
+
     @staticmethod
     def mark_completed(upload: UploadFile, storage_path: str) -> None:
         """标记为已完成"""
@@ -85,6 +113,20 @@ class UploadRepository:
         upload.updated_at = int(time.time())
         db.session.commit()
 
+    @staticmethod
+    def try_mark_verifying(upload: UploadFile, stale_before: int) -> bool:
+        """uploading（或校验已超时的 verifying）条件更新为 verifying，多个合并请求只有一个能启动后台校验"""
+        now = int(time.time())
+        updated = UploadFile.query.filter(
+            UploadFile.id == upload.id,
+            or_(
+                UploadFile.status == 'uploading',
+                and_(UploadFile.status == 'verifying', UploadFile.updated_at < stale_before),
+            ),
+        ).update({'status': 'verifying', 'updated_at': now}, synchronize_session=False)
+        db.session.commit()
+        return bool(updated)
+
     @staticmethod
     def mark_failed(upload: UploadFile, error_msg: str) -> None:
         """标记为失败"""
@@ -93,6 +135,54 @@ class UploadRepository:
         upload.updated_at = int(time.time())
         db.session.commit()
 
+    @staticmethod
+    def find_blob(file_hash: str) -> Optional[UploadBlob]:
+        """按哈希查找跨用户共享的内容块"""
+        UploadRepository.ensure_upload_schema()
+        return db.session.get(UploadBlob, file_hash)
+
+    @staticmethod
+    def add_blob_ref(file_hash: str, storage_path: str, file_size: int) -> None:
+        """内容块引用数 +1，块不存在时登记（与上传记录同事务，由调用方提交）"""
+        UploadRepository.ensure_upload_schema()
+        now = int(time.time())
+        increment = (
+            update(UploadBlob)
+            .where(UploadBlob.file_hash == file_hash)
+            .values(ref_count=UploadBlob.ref_count + 1, updated_at=now)
+        )
+        if db.session.execute(increment).rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(UploadBlob(
+                    file_hash=file_hash,
+                    storage_path=storage_path,
+                    file_size=file_size,
+                    ref_count=1,
+                    created_at=now,
+                    updated_at=now,
+                ))
+        except IntegrityError:
+            db.session.execute(increment)
+
+    @staticmethod
+    def release_blob_ref(file_hash: str) -> Optional[int]:
+        """内容块引用数 -1 并返回剩余引用数，归零时删除登记；块未登记返回 None
+
+        不提交，与删除上传记录同事务；引用归零时调用方在提交后删除块文件。
+        """
+        UploadRepository.ensure_upload_schema()
+        blob = UploadBlob.query.filter_by(file_hash=file_hash).with_for_update().populate_existing().first()
+        if blob is None:
+            return None
+        blob.ref_count = max(int(blob.ref_count or 0) - 1, 0)
+        blob.updated_at = int(time.time())
+        if blob.ref_count == 0:
+            db.session.delete(blob)
+        db.session.flush()
+        return blob.ref_count
+
     @staticmethod
     def delete(upload: UploadFile) -> None:
         """删除上传记录（手动删除分片，避免外键依赖）"""
@@ -101,5 +191,57 @@ class UploadRepository:
         db.session.delete(upload)
         db.session.commit()
 
+    @staticmethod
+    def find_expired_upload_ids(now: int, limit: int) -> List[str]:
+        """未完成且已过期的上传会话"""
+        UploadRepository.ensure_upload_schema()
+        rows = (
+            db.session.query(UploadFile.upload_id)
+            .filter(UploadFile.status != 'completed', UploadFile.expires_at < now)
+            .order_by(UploadFile.id.asc())
+            .limit(limit)
+            .all()
+        )
+        return [row.upload_id for row in rows]
+
+    @staticmethod
+    def find_active_upload_ids(upload_ids: List[str]) -> set:
+        """在给定 upload_id 中筛出仍在上传或后台校验中的会话（其 partial 文件不能清理）"""
+        if not upload_ids:
+            return set()
+        UploadRepository.ensure_upload_schema()
+        rows = db.session.query(UploadFile.upload_id).filter(
+            UploadFile.upload_id.in_(upload_ids), UploadFile.status.in_(('uploading', 'verifying'))
+        ).all()
+        return {row.upload_id for row in rows}
+
+    @staticmethod
+    def delete_sessions(upload_ids: List[str]) -> int:
+        """批量删除上传会话及其分片行"""
+        if not upload_ids:
+            return 0
+        UploadRepository.ensure_upload_schema()
+        UploadChunk.query.filter(UploadChunk.upload_id.in_(upload_ids)).delete(synchronize_session=False)
+        deleted = UploadFile.query.filter(UploadFile.upload_id.in_(upload_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    @staticmethod
+    def delete_inactive_chunk_rows(limit: int) -> int:
+        """删除不再上传中的会话遗留的 upload_chunks 行（位图上线后只剩历史数据）"""
+        UploadRepository.ensure_upload_schema()
+        active = select(UploadFile.upload_id).where(UploadFile.status == 'uploading')
+        stale_ids = [
+            row.id for row in db.session.query(UploadChunk.id)
+            .filter(UploadChunk.upload_id.notin_(active))
+            .limit(limit)
+            .all()
+        ]
+        if not stale_ids:
+            return 0
+        UploadChunk.query.filter(UploadChunk.id.in_(stale_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        return len(stale_ids)
+
 
 upload_repository = UploadRepository()
@@ -8,6 +8,7 @@ from pydantic import ValidationError
 from app.common import success, error
 from app.constants import ErrorCode
 from app.common.errors import BusinessError, NotFoundError
+from app.common.file_response import send_stored_file
 from app.common.serializers import get_snake_json
 from .schemas import CheckFileRequest, InitUploadRequest, MergeChunksRequest
 from .service import upload_service
@@ -23,7 +24,8 @@ def check_file():
         user_identity = str(get_jwt_identity())
         validated = CheckFileRequest(**(get_snake_json() or {}))
         result = upload_service.check_file_exists(
-            validated.file_hash, user_identity
+            validated.file_hash, user_identity, validated.file_name, validated.file_size,
+            validated.challenge_token, validated.proof
         )
 
         return success(result)
@@ -98,6 +100,8 @@ def merge_chunks():
     try:
         validated = MergeChunksRequest(**(get_snake_json() or {}))
         result = upload_service.merge_chunks(validated.upload_id)
+        if result.get('status') == 'verifying':
+            return success(result, "文件校验中，请稍后查询上传状态")
         return success(result, "文件上传完成")
     except ValidationError as e:
         return error(ErrorCode.VALIDATION_ERROR, str(e), http_status=400)
@@ -107,6 +111,22 @@ def merge_chunks():
         return error(ErrorCode.RESOURCE_NOT_FOUND, e.msg, http_status=404)
 
 
+@upload_bp.route('/files/<int:file_id>/download', methods=['GET'])
+@jwt_required()
+def download_file(file_id: int):
+    """下载已上传文件（支持 Range 断点续传）"""
+    try:
+        file_info = upload_service.get_download_info(file_id, str(get_jwt_identity()))
+        return send_stored_file(
+            file_info['path'],
+            file_info['download_name'],
+            mimetype=file_info['mimetype'],
+            etag=file_info['etag'],
+        )
+    except NotFoundError as e:
+        return error(ErrorCode.RESOURCE_NOT_FOUND, e.msg, http_status=404)
+
+
 @upload_bp.route('/cancel/<upload_id>', methods=['DELETE'])
 @jwt_required()
 def cancel_upload(upload_id: str):
@@ -10,6 +10,9 @@ class CheckFileRequest(BaseModel):
     file_hash: str = Field(..., min_length=64, max_length=64)
     file_name: str = Field(..., max_length=255)
     file_size: int = Field(..., gt=0)
+    # 复用他人已上传内容时的持有证明：上一次 check 返回的 challenge.token 与 sha256(nonce + 指定区间字节)
+    challenge_token: Optional[str] = Field(None, max_length=1024)
+    proof: Optional[str] = Field(None, min_length=64, max_length=64)
 
 
 class InitUploadRequest(BaseModel):
@@ -1,24 +1,157 @@
 """
 文件上传业务逻辑层
 """
+import hashlib
+import hmac
+import secrets
 import time
 import uuid
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from werkzeug.datastructures import FileStorage
 
+from app.common.cache_service import CacheKeys
 from app.common.errors import BusinessError, NotFoundError
+from app.common.redis_client import redis_client
 from app.constants import ErrorCode
+from . import chunk_bitmap
 from .repository import upload_repository
-from .storage import storage_manager
+from .storage import storage_manager, WRITE_MODE_CHUNKED, WRITE_MODE_POSITIONAL
+from .verifier import file_hash_verifier
+
+# 秒传持有证明：挑战区间最大字节数与签名盐
+OWNERSHIP_PROOF_MAX_BYTES = 64 * 1024
+OWNERSHIP_CHALLENGE_SALT = 'upload-blob-claim'
 
 
 class UploadService:
     """上传服务"""
 
-    def check_file_exists(self, file_hash: str, user_identity: str) -> Dict:
-        """检查文件是否存在（秒传）"""
-        existing = upload_repository.find_by_hash(file_hash, user_identity)
+    @staticmethod
+    def _write_mode(upload) -> str:
+        return (upload.extra_data or {}).get('write_mode', WRITE_MODE_CHUNKED)
 
+    @staticmethod
+    def _expected_chunk_size(upload, chunk_index: int) -> int:
+        """分片应有字节数（最后一片可能不足 chunk_size）"""
+        return min(upload.chunk_size, upload.file_size - chunk_index * upload.chunk_size)
+
+    @staticmethod
+    def _bitmap_ttl(upload) -> int:
+        return max(int(upload.expires_at or 0) - int(time.time()), 60)
+
+    def _load_bitmap(self, upload) -> bytes:
+        """已接收分片位图：Redis 与数据库按位或（两边都只增不减）"""
+        return chunk_bitmap.merge(
+            redis_client.get_bytes(CacheKeys.upload_chunk_bitmap(upload.upload_id)),
+            upload_repository.get_chunk_bitmap(upload),
+        )
+
+    def _mark_chunk_received(self, upload, chunk_index: int) -> int:
+        """记录分片已接收并返回已接收数
+
+        Redis SETBIT/BITCOUNT 为主，每 UPLOAD_BITMAP_FLUSH_CHUNKS 个新分片及收齐时落库；
+        Redis 不可用时在数据库行锁内置位。
+        """
+        cache_key = CacheKeys.upload_chunk_bitmap(upload.upload_id)
+        ttl = self._bitmap_ttl(upload)
+        if not redis_client.exists(cache_key):
+            redis_client.set_bytes(cache_key, upload_repository.get_chunk_bitmap(upload), ttl=ttl, nx=True)
+        previous = redis_client.setbit(cache_key, chunk_index, ttl=ttl)
+        received = redis_client.bitcount(cache_key) if previous is not None else None
+        if received is None:
+            return chunk_bitmap.count_bits(upload_repository.mark_chunk_received(upload, chunk_index))
+
+        flush_every = max(int(current_app.config.get('UPLOAD_BITMAP_FLUSH_CHUNKS', 16)), 1)
+        if previous == 0 and (received % flush_every == 0 or received >= upload.total_chunks):
+            bitmap = redis_client.get_bytes(cache_key)
+            if bitmap is not None:
+                upload_repository.save_chunk_bitmap(upload, bitmap)
+        return received
+
+    @staticmethod
+    def _challenge_serializer() -> URLSafeTimedSerializer:
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=OWNERSHIP_CHALLENGE_SALT)
+
+    def _issue_ownership_challenge(self, blob, user_identity: str) -> Dict:
+        """随机选取块内一段区间，要求客户端返回 sha256(nonce + 区间字节)；挑战签名后下发，服务端不保存状态"""
+        file_size = int(blob.file_size)
+        length = min(file_size, OWNERSHIP_PROOF_MAX_BYTES)
+        offset = secrets.randbelow(file_size - length + 1)
+        nonce = secrets.token_hex(16)
+        token = self._challenge_serializer().dumps({
+            'hash': blob.file_hash, 'user': str(user_identity), 'offset': offset, 'length': length, 'nonce': nonce,
+        })
+        return {'offset': offset, 'length': length, 'nonce': nonce, 'token': token}
+
+    def _verify_ownership_proof(self, blob, user_identity: str, token: str, proof: str) -> bool:
+        try:
+            challenge = self._challenge_serializer().loads(
+                token, max_age=int(current_app.config.get('UPLOAD_CLAIM_CHALLENGE_TTL', 300))
+            )
+        except BadSignature:
+            return False
+        if challenge.get('hash') != blob.file_hash or challenge.get('user') != str(user_identity):
+            return False
+        expected = storage_manager.hash_blob_range(
+            blob.file_hash, challenge['nonce'], challenge['offset'], challenge['length']
+        )
+        return expected is not None and hmac.compare_digest(expected, proof.lower())
+
+    def _claim_blob(self, blob, file_hash: str, file_name: str, file_size: int, user_identity: str):
+        """持有证明通过后链接共享块，并为当前用户生成已完成的上传记录"""
+        upload_id = str(uuid.uuid4())
+        storage_path = storage_manager.link_blob(blob.file_hash, upload_id, file_name)
+        if storage_path is None:
+            return None
+
+        now = int(time.time())
+        upload_repository.add_blob_ref(blob.file_hash, blob.storage_path, blob.file_size)
+        return upload_repository.create({
+            'upload_id': upload_id,
+            'file_hash': file_hash,
+            'file_name': file_name,
+            'file_size': file_size,
+            'user_id': str(user_identity),
+            'total_chunks': 0,
+            'status': 'completed',
+            'storage_path': storage_path,
+            'extra_data': {'deduplicated': True},
+            'created_at': now,
+            'updated_at': now,
+            'completed_at': now,
+        })
+
+    def _release_blob(self, upload) -> Tuple[Optional[str], Optional[str]]:
+        """释放已完成上传记录的内容块引用（与记录删除同事务）
+
+        返回提交后需要删除的 (本记录的硬链接路径, 引用归零的块哈希)；块未登记的历史文件保持原样。
+        """
+        file_hash = upload.file_hash.lower()
+        remaining = upload_repository.release_blob_ref(file_hash)
+        if remaining is None:
+            return None, None
+        blob_path = str(storage_manager.get_blob_path(file_hash).relative_to(storage_manager.base_path))
+        link_path = upload.storage_path if upload.storage_path != blob_path else None
+        return link_path, file_hash if remaining == 0 else None
+
+    def check_file_exists(self, file_hash: str, user_identity: str,
+                          file_name: Optional[str] = None, file_size: Optional[int] = None,
+                          challenge_token: Optional[str] = None, proof: Optional[str] = None) -> Dict:
+        """检查文件是否存在（秒传）
+
+        本人已上传过时直接返回；他人已上传过相同内容时，只凭哈希与大小不能复用，
+        先返回 challenge，客户端带 challenge_token 与 proof 再次调用，校验通过后才链接共享块。
+        """
+        existing = upload_repository.find_by_hash(file_hash, user_identity)
+        if not existing and file_name and file_size:
+            blob = upload_repository.find_blob(file_hash.lower())
+            if blob is not None and int(blob.file_size) == int(file_size):
+                if challenge_token and proof and self._verify_ownership_proof(blob, user_identity, challenge_token, proof):
+                    existing = self._claim_blob(blob, file_hash, file_name, file_size, user_identity)
+                if not existing:
+                    return {'exists': False, 'challenge': self._issue_ownership_challenge(blob, user_identity)}
 
         if existing:
             return {
@@ -34,20 +167,29 @@ class UploadService:
 
         """初始化上传会话"""
 
-        # 检查是否已存在
-        existing = self.check_file_exists(file_hash, user_identity)
-
-        if existing['exists']:
+        # 只检查本人是否已上传过；跨用户复用共享块由 /upload/check 完成并返回新记录的 file_id
+        if upload_repository.find_by_hash(file_hash, user_identity):
             raise BusinessError(ErrorCode.VALIDATION_ERROR,
                               "文件已存在，无需重复上传")
 
         # 计算分片数
         total_chunks = (file_size + chunk_size - 1) // chunk_size
 
+        positional = (
+            current_app.config.get('UPLOAD_POSITIONAL_WRITES', True)
+            and storage_manager.supports_positional_writes()
+        )
+        upload_id = str(uuid.uuid4())
+        if positional:
+            storage_manager.allocate_file(upload_id, file_size)
+            file_hash_verifier.start(
+                upload_id, str(storage_manager.get_partial_path(upload_id)), total_chunks, chunk_size, file_size
+            )
+
         # 创建上传记录
         now = int(time.time())
         upload_data = {
-            'upload_id': str(uuid.uuid4()),
+            'upload_id': upload_id,
             'file_hash': file_hash,
             'file_name': file_name,
             'file_size': file_size,
@@ -57,6 +199,7 @@ class UploadService:
             'chunk_size': chunk_size,
             'total_chunks': total_chunks,
             'status': 'uploading',
+            'extra_data': {'write_mode': WRITE_MODE_POSITIONAL if positional else WRITE_MODE_CHUNKED},
             'created_at': now,
             'updated_at': now,
             'expires_at': now + 86400
@@ -83,24 +226,33 @@ class UploadService:
             raise BusinessError(ErrorCode.VALIDATION_ERROR,
                               f"上传状态异常: {upload.status}")
 
-        if chunk_index >= upload.total_chunks:
+        if chunk_index < 0 or chunk_index >= upload.total_chunks:
             raise BusinessError(ErrorCode.VALIDATION_ERROR,
                               f"分片索引超出范围: {chunk_index}")
 
         # 保存并校验分片
-        success = storage_manager.save_chunk(
-            upload_id, chunk_index, chunk_file.stream, chunk_hash
-        )
+        if self._write_mode(upload) == WRITE_MODE_POSITIONAL:
+            # 已落盘的分片不再重写，避免重传失败时破坏目标文件中已确认的区间
+            if chunk_bitmap.has_bit(self._load_bitmap(upload), chunk_index):
+                success = True
+            else:
+                success = storage_manager.write_chunk_at(
+                    upload_id, chunk_index, upload.chunk_size,
+                    self._expected_chunk_size(upload, chunk_index), chunk_file.stream, chunk_hash
+                )
+                if success:
+                    file_hash_verifier.chunk_received(upload_id, chunk_index, chunk_file.stream)
+        else:
+            success = storage_manager.save_chunk(
+                upload_id, chunk_index, chunk_file.stream, chunk_hash
+            )
 
         if not success:
             raise BusinessError(ErrorCode.VALIDATION_ERROR, "分片校验失败")
 
-        # 添加分片记录
-        upload_repository.add_chunk(upload_id, chunk_index, chunk_hash)
-
-        # 获取已上传数量
-        uploaded_chunks = upload_repository.get_uploaded_chunks(upload_id)
-        progress = len(uploaded_chunks) / upload.total_chunks
+        # 记录分片并获取已上传数量
+        received = self._mark_chunk_received(upload, chunk_index)
+        progress = received / upload.total_chunks
 
         return {
             'chunk_index': chunk_index,
@@ -114,52 +266,190 @@ class UploadService:
         if not upload:
             raise NotFoundError("上传会话")
 
-        uploaded_chunks = upload_repository.get_uploaded_chunks(upload_id)
-        progress = len(uploaded_chunks) / upload.total_chunks
+        bitmap = self._load_bitmap(upload)
+        received = chunk_bitmap.count_bits(bitmap)
+        progress = received / upload.total_chunks
 
         return {
             'upload_id': upload.upload_id,
             'status': upload.status,
             'total_chunks': upload.total_chunks,
-            'uploaded_chunks': uploaded_chunks,
+            'uploaded_count': received,
+            'missing_ranges': chunk_bitmap.missing_ranges(bitmap, upload.total_chunks),
             'progress': round(progress, 4),
-            'file_name': upload.file_name
+            'file_name': upload.file_name,
+            'file_id': upload.id if upload.status == 'completed' else None,
+            'storage_path': upload.storage_path if upload.status == 'completed' else None,
+            'error_message': upload.error_message if upload.status == 'failed' else None,
         }
 
     def merge_chunks(self, upload_id: str) -> Dict:
-        """合并分片为最终文件"""
+        """合并分片为最终文件
+
+        positional 模式下本进程剩余待补算字节超过 UPLOAD_INLINE_VERIFY_BYTES（分片落在其他 worker 时为整个文件）时，
+        会话转为 verifying 并在后台线程完成校验，接口立即返回，客户端轮询 /upload/status 获取结果。
+        """
         upload = upload_repository.find_by_upload_id(upload_id)
         if not upload:
             raise NotFoundError("上传会话")
 
         # 验证所有分片已上传
-        uploaded_chunks = upload_repository.get_uploaded_chunks(upload_id)
-        if len(uploaded_chunks) != upload.total_chunks:
+        received = chunk_bitmap.count_bits(self._load_bitmap(upload))
+        if received != upload.total_chunks:
             raise BusinessError(ErrorCode.VALIDATION_ERROR,
-                              f"分片未完整上传: {len(uploaded_chunks)}/{upload.total_chunks}")
+                              f"分片未完整上传: {received}/{upload.total_chunks}")
 
-        # 合并分片
-        try:
-            storage_path = storage_manager.merge_chunks(
-                upload_id, upload.total_chunks, upload.file_name
-            )
-            upload_repository.mark_completed(upload, storage_path)
+        if self._write_mode(upload) == WRITE_MODE_POSITIONAL:
+            pending = file_hash_verifier.pending_bytes(upload_id, upload.chunk_size, upload.file_size)
+            if upload.status == 'verifying' or pending > int(current_app.config.get('UPLOAD_INLINE_VERIFY_BYTES', 0)):
+                return self._start_background_merge(upload)
 
-            return {
-                'file_id': upload.id,
-                'storage_path': storage_path,
-                'file_url': f"/files/{storage_path}"
-            }
+        try:
+            return self._finish_merge(upload)
+        except BusinessError:
+            raise
         except Exception as e:
             upload_repository.mark_failed(upload, str(e))
             raise BusinessError(ErrorCode.INTERNAL_ERROR, "文件合并失败")
 
+    def _start_background_merge(self, upload) -> Dict:
+        stale_seconds = int(current_app.config.get('UPLOAD_VERIFY_STALE_SECONDS', 1800))
+        if upload_repository.try_mark_verifying(upload, int(time.time()) - stale_seconds):
+            app = current_app._get_current_object()
+            file_hash_verifier.submit_finalize(self._merge_in_background, app, upload.upload_id)
+        return {'upload_id': upload.upload_id, 'status': 'verifying'}
+
+    def _merge_in_background(self, app, upload_id: str) -> None:
+        with app.app_context():
+            upload = upload_repository.find_by_upload_id(upload_id)
+            if not upload or upload.status != 'verifying':
+                return
+            try:
+                self._finish_merge(upload)
+            except BusinessError:
+                pass
+            except Exception as e:
+                current_app.logger.exception(f"[upload] background merge failed: {upload_id}")
+                upload_repository.mark_failed(upload, str(e))
+
+    def _finish_merge(self, upload) -> Dict:
+        """校验整文件哈希并登记内容块（positional 模式下哈希已随分片到达增量计算）"""
+        upload_id = upload.upload_id
+        storage_path = None
+        if self._write_mode(upload) == WRITE_MODE_POSITIONAL:
+            file_digest = file_hash_verifier.finalize(
+                upload_id, str(storage_manager.get_partial_path(upload_id)),
+                upload.total_chunks, upload.chunk_size, upload.file_size
+            )
+            if file_digest == upload.file_hash.lower():
+                storage_path = storage_manager.commit_file(upload_id, upload.file_name)
+        else:
+            hasher = hashlib.sha256()
+            storage_path = storage_manager.merge_chunks(
+                upload_id, upload.total_chunks, upload.file_name, hasher=hasher
+            )
+            file_digest = hasher.hexdigest()
+
+        if file_digest != upload.file_hash.lower():
+            if storage_path:
+                storage_manager.discard_file(storage_path)
+            storage_manager.cleanup_chunks(upload_id)
+            redis_client.delete(CacheKeys.upload_chunk_bitmap(upload_id))
+            upload_repository.mark_failed(upload, f"整文件哈希不一致: {file_digest}")
+            raise BusinessError(ErrorCode.VALIDATION_ERROR, "文件完整性校验失败，请重新上传")
+
+        # 登记为跨用户共享的内容块（已有相同内容时本次文件改为硬链接，不多占磁盘）
+        file_hash = upload.file_hash.lower()
+        storage_path = storage_manager.store_blob(file_hash, storage_path)
+        upload_repository.add_blob_ref(
+            file_hash,
+            str(storage_manager.get_blob_path(file_hash).relative_to(storage_manager.base_path)),
+            upload.file_size,
+        )
+        upload_repository.mark_completed(upload, storage_path)
+        redis_client.delete(CacheKeys.upload_chunk_bitmap(upload_id))
+
+        return {
+            'file_id': upload.id,
+            'status': 'completed',
+            'storage_path': storage_path,
+            'file_url': f"/files/{storage_path}"
+        }
+
+    def get_download_info(self, file_id: int, user_id: str) -> Dict:
+        """已完成上传文件的下载信息，ETag 使用文件 SHA-256（合并时已校验）；非本人上传的文件按不存在处理"""
+        upload = upload_repository.find_by_id(file_id)
+        if not upload or str(upload.user_id) != str(user_id) or upload.status != 'completed' or not upload.storage_path:
+            raise NotFoundError("上传文件")
+        path = storage_manager.base_path / upload.storage_path
+        if not path.is_file():
+            raise NotFoundError("上传文件")
+        return {
+            'path': str(path),
+            'download_name': upload.file_name,
+            'mimetype': upload.mime_type,
+            'etag': upload.file_hash.lower(),
+        }
+
     def cancel_upload(self, upload_id: str) -> None:
         """取消上传"""
         upload = upload_repository.find_by_upload_id(upload_id)
         if upload:
             storage_manager.cleanup_chunks(upload_id)
+            file_hash_verifier.discard(upload_id)
+            redis_client.delete(CacheKeys.upload_chunk_bitmap(upload_id))
+            link_path, released_hash = (
+                self._release_blob(upload) if upload.status == 'completed' else (None, None)
+            )
             upload_repository.delete(upload)
+            if link_path:
+                storage_manager.discard_file(link_path)
+            if released_hash:
+                storage_manager.remove_blob(released_hash)
+
+    def purge_expired(self, batch_size: int = 200, orphan_grace_seconds: int = 3600,
+                      now: Optional[int] = None) -> Dict:
+        """清理过期上传会话、孤儿分片目录与遗留分片行，返回清理统计"""
+        now = int(now if now is not None else time.time())
+        expired_sessions = 0
+        reclaimed_bytes = 0
+
+        while True:
+            upload_ids = upload_repository.find_expired_upload_ids(now, batch_size)
+            if not upload_ids:
+                break
+            for upload_id in upload_ids:
+                reclaimed_bytes += storage_manager.cleanup_chunks(upload_id)
+                file_hash_verifier.discard(upload_id)
+                redis_client.delete(CacheKeys.upload_chunk_bitmap(upload_id))
+            expired_sessions += upload_repository.delete_sessions(upload_ids)
+            if len(upload_ids) < batch_size:
+                break
+
+        # 没有上传中会话的分片目录/预分配文件（会话已删除、已完成或已失败）
+        orphan_dirs = 0
+        candidates = storage_manager.list_session_upload_ids(now - orphan_grace_seconds)
+        for offset in range(0, len(candidates), batch_size):
+            batch = candidates[offset:offset + batch_size]
+            active = upload_repository.find_active_upload_ids(batch)
+            for upload_id in batch:
+                if upload_id not in active:
+                    reclaimed_bytes += storage_manager.cleanup_chunks(upload_id)
+                    orphan_dirs += 1
+
+        chunk_rows = 0
+        while True:
+            deleted = upload_repository.delete_inactive_chunk_rows(batch_size * 10)
+            chunk_rows += deleted
+            if deleted < batch_size * 10:
+                break
+
+        return {
+            'expired_sessions': expired_sessions,
+            'orphan_dirs': orphan_dirs,
+            'chunk_rows': chunk_rows,
+            'reclaimed_bytes': reclaimed_bytes,
+        }
 
 
 upload_service = UploadService()
@@ -4,25 +4,197 @@
 import os
 import hashlib
 import shutil
+import uuid
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, List, Optional
 from werkzeug.utils import secure_filename
 
 
+# 流式读写缓冲区大小
+IO_BUFFER_SIZE = 1024 * 1024
+# 分片直接写入目标文件的写入模式（upload_files.extra_data.write_mode）
+WRITE_MODE_POSITIONAL = 'positional'
+WRITE_MODE_CHUNKED = 'chunked'
+
+
 class StorageManager:
-    """文件存储管理器"""
+    """文件存储管理器
+
+    - chunked：分片各自落盘，合并时顺序拼接为最终文件；
+    - positional：初始化时预分配 partial 文件，分片按 chunk_index * chunk_size 偏移 pwrite，
+      合并只需把 partial 文件重命名到最终位置，大文件的磁盘写入量减半。
+    """
 
     def __init__(self, base_path: str = './storage'):
         self.base_path = Path(base_path)
         self.chunks_dir = self.base_path / 'chunks'
+        self.partial_dir = self.base_path / 'partial'
+        self.blobs_dir = self.base_path / 'blobs'
         self.files_dir = self.base_path / 'files'
         self._ensure_dirs()
 
     def _ensure_dirs(self):
         """确保目录存在"""
         self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
         self.files_dir.mkdir(parents=True, exist_ok=True)
 
+    @staticmethod
+    def supports_positional_writes() -> bool:
+        return hasattr(os, 'pwrite')
+
+    def _final_path(self, upload_id: str, file_name: str) -> Path:
+        """按年月生成最终文件路径"""
+        from datetime import datetime
+
+        now = datetime.now()
+        date_path = self.files_dir / str(now.year) / f"{now.month:02d}"
+        date_path.mkdir(parents=True, exist_ok=True)
+        return date_path / f"{upload_id[:8]}_{secure_filename(file_name)}"
+
+    def get_partial_path(self, upload_id: str) -> Path:
+        """获取预分配文件路径"""
+        return self.partial_dir / f"{upload_id}.part"
+
+    def allocate_file(self, upload_id: str, file_size: int) -> None:
+        """预分配目标文件（优先 posix_fallocate 真正占用磁盘，失败时退回稀疏文件）"""
+        fd = os.open(self.get_partial_path(upload_id), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            try:
+                os.posix_fallocate(fd, 0, file_size)
+            except (AttributeError, OSError):
+                os.ftruncate(fd, file_size)
+        finally:
+            os.close(fd)
+
+    def write_chunk_at(self, upload_id: str, chunk_index: int, chunk_size: int,
+                       expected_size: int, chunk_data: BinaryIO, expected_hash: str) -> bool:
+        """把分片按偏移写入预分配文件并校验大小与哈希
+
+        只写入本分片的区间 [offset, offset + expected_size)，超长数据不会覆盖相邻分片；
+        校验失败时该区间内容作废，等待客户端重传覆盖。
+        """
+        partial_path = self.get_partial_path(upload_id)
+        if not partial_path.exists():
+            raise FileNotFoundError(f"上传文件 {upload_id} 未初始化")
+
+        offset = chunk_index * chunk_size
+        hasher = hashlib.sha256()
+        written = 0
+        fd = os.open(partial_path, os.O_WRONLY)
+        try:
+            chunk_data.seek(0)
+            while True:
+                data = chunk_data.read(IO_BUFFER_SIZE)
+                if not data:
+                    break
+                hasher.update(data)
+                if written + len(data) > expected_size:
+                    return False
+                view = memoryview(data)
+                while view:
+                    count = os.pwrite(fd, view, offset + written)
+                    view = view[count:]
+                    written += count
+        finally:
+            os.close(fd)
+
+        return written == expected_size and hasher.hexdigest() == expected_hash
+
+    def commit_file(self, upload_id: str, file_name: str) -> str:
+        """positional 模式的“合并”：落盘后把预分配文件原子重命名到最终位置"""
+        partial_path = self.get_partial_path(upload_id)
+        if not partial_path.exists():
+            raise FileNotFoundError(f"上传文件 {upload_id} 不存在")
+
+        fd = os.open(partial_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        final_path = self._final_path(upload_id, file_name)
+        os.replace(partial_path, final_path)
+        return str(final_path.relative_to(self.base_path))
+
+    def get_blob_path(self, file_hash: str) -> Path:
+        """内容寻址块路径：blobs/ab/cd/<hash>"""
+        return self.blobs_dir / file_hash[:2] / file_hash[2:4] / file_hash
+
+    def store_blob(self, file_hash: str, storage_path: str) -> str:
+        """把已校验的最终文件登记为内容块，返回该文件现在的存储路径
+
+        - 块不存在：把最终文件硬链接进块目录（同一 inode，不产生额外写入）；
+        - 块已存在：先把块硬链接到临时名，再原子替换刚合并的文件，任一时刻源路径都存在；
+        - 文件系统不支持硬链接时，文件移动进块目录并直接返回块路径。
+        """
+        source = self.base_path / storage_path
+        blob_path = self.get_blob_path(file_hash)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if blob_path.exists():
+                temp_path = source.with_name(f'.{source.name}.{uuid.uuid4().hex}.tmp')
+                os.link(blob_path, temp_path)
+                try:
+                    os.replace(temp_path, source)
+                except OSError:
+                    temp_path.unlink(missing_ok=True)
+                    raise
+            else:
+                os.link(source, blob_path)
+            return storage_path
+        except FileExistsError:
+            # 并发合并同一内容：另一请求已放入块，按“块已存在”处理
+            return self.store_blob(file_hash, storage_path)
+        except OSError:
+            if source.exists():
+                if blob_path.exists():
+                    source.unlink()
+                else:
+                    os.replace(source, blob_path)
+            return str(blob_path.relative_to(self.base_path))
+
+    def link_blob(self, file_hash: str, upload_id: str, file_name: str) -> Optional[str]:
+        """为新上传记录链接已有块（秒传），块文件缺失时返回 None"""
+        blob_path = self.get_blob_path(file_hash)
+        if not blob_path.exists():
+            return None
+        final_path = self._final_path(upload_id, file_name)
+        try:
+            os.link(blob_path, final_path)
+        except OSError:
+            return str(blob_path.relative_to(self.base_path))
+        return str(final_path.relative_to(self.base_path))
+
+    def hash_blob_range(self, file_hash: str, nonce: str, offset: int, length: int) -> Optional[str]:
+        """sha256(nonce + 块内 [offset, offset + length) 字节)，用于校验秒传持有证明；块缺失时返回 None"""
+        blob_path = self.get_blob_path(file_hash)
+        hasher = hashlib.sha256(nonce.encode('utf-8'))
+        try:
+            with open(blob_path, 'rb') as f:
+                f.seek(offset)
+                remaining = length
+                while remaining > 0:
+                    data = f.read(min(IO_BUFFER_SIZE, remaining))
+                    if not data:
+                        return None
+                    hasher.update(data)
+                    remaining -= len(data)
+        except OSError:
+            return None
+        return hasher.hexdigest()
+
+    def remove_blob(self, file_hash: str) -> None:
+        blob_path = self.get_blob_path(file_hash)
+        if blob_path.exists():
+            blob_path.unlink()
+
+    def discard_file(self, storage_path: str) -> None:
+        """删除未通过校验的最终文件"""
+        path = self.base_path / storage_path
+        if path.exists():
+            path.unlink()
+
     def get_chunk_path(self, upload_id: str, chunk_index: int) -> Path:
         """获取分片存储路径"""
         upload_dir = self.chunks_dir / upload_id
@@ -51,37 +223,66 @@ class StorageManager:
             return False
         return True
 
-    def merge_chunks(self, upload_id: str, total_chunks: int, file_name: str) -> str:
-        """合并分片为最终文件"""
-        from datetime import datetime
-
-        # 生成存储路径
-        now = datetime.now()
-        date_path = self.files_dir / str(now.year) / f"{now.month:02d}"
-        date_path.mkdir(parents=True, exist_ok=True)
-
-        safe_name = secure_filename(file_name)
-        final_path = date_path / f"{upload_id[:8]}_{safe_name}"
+    def merge_chunks(self, upload_id: str, total_chunks: int, file_name: str, hasher=None) -> str:
+        """合并分片为最终文件（chunked 模式），传入 hasher 时拷贝过程中同时计算整文件哈希"""
+        final_path = self._final_path(upload_id, file_name)
 
-        # 合并分片
+        # 合并分片（流式拷贝，不把整个分片读入内存）
         with open(final_path, 'wb') as outfile:
             for i in range(total_chunks):
                 chunk_path = self.get_chunk_path(upload_id, i)
                 if not chunk_path.exists():
                     raise FileNotFoundError(f"分片 {i} 不存在")
                 with open(chunk_path, 'rb') as infile:
-                    outfile.write(infile.read())
+                    while True:
+                        data = infile.read(IO_BUFFER_SIZE)
+                        if not data:
+                            break
+                        if hasher is not None:
+                            hasher.update(data)
+                        outfile.write(data)
 
         # 清理分片
         self.cleanup_chunks(upload_id)
 
         return str(final_path.relative_to(self.base_path))
 
-    def cleanup_chunks(self, upload_id: str) -> None:
-        """清理分片目录"""
+    @staticmethod
+    def _disk_usage(path: Path) -> int:
+        """实际占用的磁盘字节数（预分配/稀疏文件按已分配块计算）"""
+        files = [path] if path.is_file() else [item for item in path.rglob('*') if item.is_file()]
+        total = 0
+        for item in files:
+            try:
+                stat = item.stat()
+            except FileNotFoundError:
+                continue
+            total += stat.st_blocks * 512 if hasattr(stat, 'st_blocks') else stat.st_size
+        return total
+
+    def cleanup_chunks(self, upload_id: str) -> int:
+        """清理分片目录与未提交的预分配文件，返回释放的磁盘字节数"""
+        reclaimed = 0
         chunk_dir = self.chunks_dir / upload_id
         if chunk_dir.exists():
-            shutil.rmtree(chunk_dir)
+            reclaimed += self._disk_usage(chunk_dir)
+            shutil.rmtree(chunk_dir, ignore_errors=True)
+        partial_path = self.get_partial_path(upload_id)
+        if partial_path.exists():
+            reclaimed += self._disk_usage(partial_path)
+            partial_path.unlink(missing_ok=True)
+        return reclaimed
+
+    def list_session_upload_ids(self, older_than: float) -> List[str]:
+        """列出最后修改早于 older_than 的分片目录与预分配文件对应的 upload_id"""
+        upload_ids = set()
+        for path in list(self.chunks_dir.iterdir()) + list(self.partial_dir.glob('*.part')):
+            try:
+                if path.stat().st_mtime < older_than:
+                    upload_ids.add(path.name[:-len('.part')] if path.suffix == '.part' else path.name)
+            except FileNotFoundError:
+                continue
+        return sorted(upload_ids)
 
 
 storage_manager = StorageManager()
@@ -0,0 +1,152 @@
+"""
+整文件哈希增量校验
+positional 模式下按分片顺序滚动计算 SHA-256：按序到达的分片直接用请求内的分片数据更新哈希，
+乱序分片等前缀补齐后由后台线程从预分配文件读取；合并时只需补算剩余部分并比对 file_hash。
+hashlib 中间状态无法序列化，分片落到其他 worker 时本进程状态不完整，剩余部分较大时由合并接口转入后台校验。
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+from .storage import IO_BUFFER_SIZE
+
+logger = logging.getLogger(__name__)
+
+# 进程内哈希状态的最长闲置时间，超过后丢弃（合并时整文件补算）
+STATE_IDLE_SECONDS = 86400
+
+
+class _HashState:
+    """单个上传会话的滚动哈希状态；hashlib 状态无法序列化，只保存在当前进程"""
+
+    __slots__ = ('path', 'total_chunks', 'chunk_size', 'file_size', 'hasher',
+                 'next_chunk', 'received', 'lock', 'touched_at')
+
+    def __init__(self, path: str, total_chunks: int, chunk_size: int, file_size: int):
+        self.path = path
+        self.total_chunks = total_chunks
+        self.chunk_size = chunk_size
+        self.file_size = file_size
+        self.hasher = hashlib.sha256()
+        self.next_chunk = 0
+        self.received = set()
+        self.lock = threading.Lock()
+        self.touched_at = time.time()
+
+
+class FileHashVerifier:
+    """整文件哈希校验器
+
+    多进程部署时分片可能落到其他 worker，或进程重启丢失状态，
+    此时合并阶段从第一个未计入哈希的分片开始补算（最坏情况为一次整文件读取）。
+    """
+
+    def __init__(self) -> None:
+        self._states: Dict[str, _HashState] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._finalize_executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload-verify')
+        return self._executor
+
+    def submit_finalize(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """在后台线程执行合并校验（与增量哈希线程分开，避免大文件补算阻塞其他会话的增量计算）"""
+        if self._finalize_executor is None:
+            with self._lock:
+                if self._finalize_executor is None:
+                    self._finalize_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='upload-finalize')
+        return self._finalize_executor.submit(fn, *args)
+
+    def pending_bytes(self, upload_id: str, chunk_size: int, file_size: int) -> int:
+        """本进程合并时还需补算的字节数；没有状态（分片落在其他 worker 或进程重启）时为整个文件"""
+        state = self._states.get(upload_id)
+        if state is None:
+            return file_size
+        return max(file_size - state.next_chunk * chunk_size, 0)
+
+    def start(self, upload_id: str, path: str, total_chunks: int, chunk_size: int, file_size: int) -> None:
+        """上传会话初始化时登记滚动哈希状态"""
+        now = time.time()
+        with self._lock:
+            for stale_id in [key for key, state in self._states.items() if now - state.touched_at > STATE_IDLE_SECONDS]:
+                self._states.pop(stale_id, None)
+            self._states[upload_id] = _HashState(path, total_chunks, chunk_size, file_size)
+
+    def chunk_received(self, upload_id: str, chunk_index: int, chunk_data: BinaryIO) -> None:
+        """分片落盘后调用：按序分片直接计入哈希，否则交给后台线程等前缀补齐后读取文件"""
+        state = self._states.get(upload_id)
+        if state is None:
+            return
+        state.touched_at = time.time()
+        state.received.add(chunk_index)
+        if chunk_index == state.next_chunk and state.lock.acquire(blocking=False):
+            try:
+                if chunk_index == state.next_chunk:
+                    chunk_data.seek(0)
+                    while True:
+                        data = chunk_data.read(IO_BUFFER_SIZE)
+                        if not data:
+                            break
+                        state.hasher.update(data)
+                    state.next_chunk += 1
+            finally:
+                state.lock.release()
+        if state.next_chunk in state.received:
+            self._get_executor().submit(self._advance_in_background, upload_id, state)
+
+    def _advance_in_background(self, upload_id: str, state: _HashState) -> None:
+        with state.lock:
+            try:
+                self._advance(state)
+            except Exception as exc:
+                # 哈希可能已部分更新，丢弃进度由合并时从头补算
+                logger.warning(f'[upload-verify] {upload_id} background hashing reset: {exc}')
+                state.hasher = hashlib.sha256()
+                state.next_chunk = 0
+
+    @staticmethod
+    def _advance(state: _HashState) -> None:
+        """从文件读取已到达的连续分片计入哈希（调用方持有 state.lock）"""
+        if state.next_chunk not in state.received:
+            return
+        fd = os.open(state.path, os.O_RDONLY)
+        try:
+            while state.next_chunk < state.total_chunks and state.next_chunk in state.received:
+                offset = state.next_chunk * state.chunk_size
+                end = min(offset + state.chunk_size, state.file_size)
+                while offset < end:
+                    data = os.pread(fd, min(IO_BUFFER_SIZE, end - offset), offset)
+                    if not data:
+                        raise EOFError(f'文件在偏移 {offset} 处提前结束')
+                    state.hasher.update(data)
+                    offset += len(data)
+                state.next_chunk += 1
+        finally:
+            os.close(fd)
+
+    def finalize(self, upload_id: str, path: str, total_chunks: int, chunk_size: int, file_size: int) -> str:
+        """所有分片到齐后补算剩余部分并返回整文件摘要；本进程无状态时整文件计算"""
+        with self._lock:
+            state = self._states.pop(upload_id, None)
+        if state is None:
+            state = _HashState(path, total_chunks, chunk_size, file_size)
+        with state.lock:
+            state.received.update(range(total_chunks))
+            self._advance(state)
+            return state.hasher.hexdigest()
+
+    def discard(self, upload_id: str) -> None:
+        with self._lock:
+            self._states.pop(upload_id, None)
+
+
+file_hash_verifier = FileHashVerifier()
@@ -3,7 +3,7 @@
 """
 from .response import success, error, paginated, get_trace_id
 from .errors import BusinessError, ValidationError, NotFoundError, PermissionError, AuthenticationError
-from .pagination import PageParams, PageResult
+from .pagination import PageParams, PageResult, encode_cursor, decode_cursor
 from .decorators import require_permission, log_request, validate_json
 
 __all__ = [
@@ -12,7 +12,7 @@ __all__ = [
     # Errors
     'BusinessError', 'ValidationError', 'NotFoundError', 'PermissionError', 'AuthenticationError',
     # Pagination
-    'PageParams', 'PageResult',
+    'PageParams', 'PageResult', 'encode_cursor', 'decode_cursor',
     # Decorators
     'require_permission', 'log_request', 'validate_json'
 ]
@@ -42,6 +42,41 @@ class CacheKeys:
     # 关联数据
     FOLD_TYPE_SIM_TYPE_RELS = "config:fold_type_sim_type_rels"
 
+    # 订单列表总数（generation 变化即整体失效）
+    ORDERS_COUNT_GENERATION = "orders:count_gen"
+
+    @staticmethod
+    def orders_count(generation: str, filter_digest: str) -> str:
+        return f"orders:count:{generation}:{filter_digest}"
+
+    @staticmethod
+    def daily_round_usage(domain_account: str, usage_date: int) -> str:
+        return f"quota:rounds:{domain_account}:{usage_date}"
+
+    # 上传会话已接收分片位图（SETBIT/BITCOUNT）
+    @staticmethod
+    def upload_chunk_bitmap(upload_id: str) -> str:
+        return f"upload:chunks:{upload_id}"
+
+    # 轮次列表总数（按状态拆分，单 key 便于整体失效）
+    @staticmethod
+    def round_totals(sim_type_result_id: int) -> str:
+        return f"results:round_totals:{sim_type_result_id}"
+
+    # 外部结果兜底快照（外部库熔断时返回）
+    @staticmethod
+    def opt_issue_summary(opt_issue_id: int) -> str:
+        return f"external:opt_issue_summary:{opt_issue_id}"
+
+    @staticmethod
+    def opt_job_summary(opt_job_id: int) -> str:
+        return f"external:opt_job_summary:{opt_job_id}"
+
+    # INP set 提取结果（按文件路径/大小/mtime 指纹）
+    @staticmethod
+    def inp_sets(fingerprint: str) -> str:
+        return f"inp:sets:{fingerprint}"
+
 
 class ConfigCache:
     """配置数据缓存服务"""
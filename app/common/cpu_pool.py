@@ -0,0 +1,239 @@
+"""
+CPU 密集任务进程池
+Excel/CSV 解析、INP set 提取、编码检测等纯 CPU 工作会持有 GIL，在 gthread worker 内执行会拖慢同进程的其他请求线程；
+统一提交到本进程池执行：在途任务数有上限（超出直接拒绝而不是无限排队），单任务超时后重建进程池回收卡住的子进程。
+"""
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from app.common.errors import BusinessError
+from app.constants import ErrorCode
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 子进程启动时预先导入的模块（避免首个请求承担 openpyxl 等的导入开销）
+WARMUP_MODULES: Tuple[str, ...] = (
+    'openpyxl',
+    'chardet',
+    'app.api.v1.orders.excel_parser_service',
+    'app.api.v1.orders.inp_scanner',
+)
+
+
+def _warm_up(modules: Tuple[str, ...]) -> int:
+    for module in modules:
+        importlib.import_module(module)
+    return os.getpid()
+
+
+class CpuTaskPool:
+    """进程池封装
+
+    - 每个 gunicorn worker 一个进程池（按 pid 懒创建，fork 后不复用父进程的池）；
+    - 子进程由 forkserver 启动，不继承请求线程持有的锁；
+    - 任务函数与参数需可 pickle（模块级函数、路径/字节等简单参数），文件内容以临时文件路径传递。
+    """
+
+    _instance: Optional['CpuTaskPool'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._executor = None
+            cls._instance._pid = None
+            cls._instance._in_flight = 0
+            cls._instance._settings = {
+                'enabled': False,
+                'workers': 1,
+                'max_pending': 0,
+                'task_timeout': 60.0,
+                'max_tasks_per_child': None,
+            }
+            cls._instance._metrics = {
+                'submitted': 0, 'completed': 0, 'rejected': 0, 'timeouts': 0, 'failures': 0,
+                'total_ms': 0.0, 'max_ms': 0.0,
+            }
+        return cls._instance
+
+    @staticmethod
+    def default_workers(gunicorn_workers: int) -> int:
+        """未配置 CPU_POOL_WORKERS 时按核数均分给各 gunicorn worker，避免整机进程数超过核数"""
+        return max(1, (os.cpu_count() or 1) // max(1, gunicorn_workers))
+
+    def init_app(self, app) -> None:
+        """读取进程池配置；仅在服务进程中启动子进程并预热（CLI 脚本、测试按需懒创建）"""
+        workers = int(app.config.get('CPU_POOL_WORKERS', 0)) or self.default_workers(
+            int(app.config.get('GUNICORN_WORKERS', 0)) or (os.cpu_count() or 1)
+        )
+        self._settings = {
+            'enabled': bool(app.config.get('CPU_POOL_ENABLED', True)),
+            'workers': workers,
+            'max_pending': int(app.config.get('CPU_POOL_MAX_PENDING', workers * 2)),
+            'task_timeout': float(app.config.get('CPU_POOL_TASK_TIMEOUT', 60.0)),
+            'max_tasks_per_child': int(app.config.get('CPU_POOL_MAX_TASKS_PER_CHILD', 0)) or None,
+        }
+        self.shutdown()
+        if self._settings['enabled'] and app.config.get('SERVING') and not app.config.get('TESTING'):
+            self.warm_up()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                if context.get_start_method() == 'forkserver':
+                    context.set_forkserver_preload(list(WARMUP_MODULES))
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._settings['workers'],
+                    mp_context=context,
+                    max_tasks_per_child=self._settings['max_tasks_per_child'],
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def warm_up(self) -> None:
+        """拉起全部子进程并导入解析依赖"""
+        try:
+            executor = self._get_executor()
+            futures = [executor.submit(_warm_up, WARMUP_MODULES) for _ in range(self._settings['workers'])]
+            pids = {future.result(timeout=self._settings['task_timeout']) for future in futures}
+            logger.info(f'[cpu-pool] warmed up {len(pids)} worker process(es)')
+        except Exception as exc:
+            logger.warning(f'[cpu-pool] warm-up failed: {exc}')
+
+    @property
+    def parallelism(self) -> int:
+        """可同时执行的任务数（未启用时为 1），分段任务据此决定段数"""
+        return self._settings['workers'] if self._settings['enabled'] else 1
+
+    def run(self, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None) -> T:
+        """在进程池中执行 fn(*args) 并等待结果；未启用时在当前线程直接执行
+
+        Raises:
+            BusinessError: 在途任务已满、执行超时或子进程异常退出
+        """
+        return self.run_many(fn, [args], timeout=timeout)[0]
+
+    def run_many(
+        self,
+        fn: Callable[..., T],
+        args_list: Sequence[Tuple[Any, ...]],
+        timeout: Optional[float] = None,
+    ) -> List[T]:
+        """并行执行一批 fn(*args)，按提交顺序返回结果
+
+        整批一次性占用在途名额（名额不足时整批拒绝），超时按整批计算；任一任务失败时取消其余未开始的任务。
+
+        Raises:
+            BusinessError: 在途任务已满、执行超时或子进程异常退出
+        """
+        if not self._settings['enabled']:
+            return [fn(*args) for args in args_list]
+
+        count = len(args_list)
+        with self._lock:
+            if self._in_flight + count > self._settings['workers'] + self._settings['max_pending']:
+                self._metrics['rejected'] += 1
+                raise BusinessError(ErrorCode.BUSINESS_ERROR, '解析任务繁忙，请稍后重试')
+            self._in_flight += count
+            self._metrics['submitted'] += count
+
+        started = time.perf_counter()
+        elapsed: List[float] = []
+        futures: List[Future] = []
+        try:
+            executor = self._get_executor()
+            futures = [executor.submit(fn, *args) for args in args_list]
+            deadline = started + (timeout or self._settings['task_timeout'])
+            results: List[T] = []
+            for future in futures:
+                try:
+                    results.append(future.result(timeout=max(0.0, deadline - time.perf_counter())))
+                except FutureTimeoutError:
+                    self._count('timeouts')
+                    if [f for f in futures if not f.done() and not f.cancel()]:
+                        self._reset(executor)
+                    raise BusinessError(ErrorCode.BUSINESS_ERROR, '解析超时，请检查文件大小后重试')
+                except BrokenProcessPool:
+                    self._count('failures')
+                    self._reset(executor)
+                    raise BusinessError(ErrorCode.INTERNAL_ERROR, '解析进程异常退出，请稍后重试')
+                except Exception:
+                    self._count('failures')
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                elapsed.append(time.perf_counter() - started)
+            return results
+        finally:
+            failed_elapsed = time.perf_counter() - started
+            for index in range(count):
+                if index < len(elapsed):
+                    self._record(elapsed[index], False)
+                else:
+                    self._record(failed_elapsed, True)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._metrics[name] += 1
+
+    def _record(self, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if not failed:
+                self._metrics['completed'] += 1
+            self._metrics['total_ms'] += elapsed * 1000
+            self._metrics['max_ms'] = max(self._metrics['max_ms'], elapsed * 1000)
+
+    def _reset(self, executor: ProcessPoolExecutor) -> None:
+        """终止卡住/损坏的进程池，下次提交时重建；同池内其他在途任务会收到 BrokenProcessPool"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            try:
+                process.kill()
+            except Exception:
+                pass
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning('[cpu-pool] worker processes killed and pool reset')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """在途/排队任务数与执行统计"""
+        with self._lock:
+            finished = self._metrics['submitted'] - self._in_flight
+            return {
+                'enabled': self._settings['enabled'],
+                'workers': self._settings['workers'],
+                'inFlight': self._in_flight,
+                'queueDepth': max(0, self._in_flight - self._settings['workers']),
+                'maxPending': self._settings['max_pending'],
+                'submitted': self._metrics['submitted'],
+                'completed': self._metrics['completed'],
+                'rejected': self._metrics['rejected'],
+                'timeouts': self._metrics['timeouts'],
+                'failures': self._metrics['failures'],
+                'avgMs': round(self._metrics['total_ms'] / finished, 2) if finished else 0,
+                'maxMs': round(self._metrics['max_ms'], 2),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            owned = self._pid == os.getpid()
+        if executor is not None and owned:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 全局实例
+cpu_pool = CpuTaskPool()
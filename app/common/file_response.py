@@ -0,0 +1,72 @@
+"""
+文件下载响应
+支持 Range / If-Range / If-None-Match（206 / 304 / 416），ETag 优先使用存储时的内容哈希；
+配置 DOWNLOAD_ACCEL_PREFIX + DOWNLOAD_ACCEL_ROOT 时改为返回 X-Accel-Redirect 由前置 nginx 直接发送文件，
+否则整文件响应走 WSGI file_wrapper（gunicorn 下为 sendfile 零拷贝）
+"""
+import mimetypes
+import unicodedata
+from pathlib import Path
+from typing import Optional, Union
+from urllib.parse import quote
+
+from flask import Response, current_app, send_file
+
+
+def _content_disposition(download_name: str) -> dict:
+    """attachment 文件名参数；非 ASCII 文件名按 RFC 5987 附加 filename*"""
+    try:
+        download_name.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        return {'filename': simple, 'filename*': f"UTF-8''{quote(download_name, safe='!#$&+^`|~')}"}
+    return {'filename': download_name}
+
+
+def _accel_redirect_uri(path: Path) -> Optional[str]:
+    prefix = current_app.config.get('DOWNLOAD_ACCEL_PREFIX')
+    root = current_app.config.get('DOWNLOAD_ACCEL_ROOT')
+    if not prefix or not root:
+        return None
+    try:
+        relative = path.resolve().relative_to(Path(root).resolve())
+    except ValueError:
+        return None
+    return f"{prefix.rstrip('/')}/{quote(relative.as_posix())}"
+
+
+def send_stored_file(
+    path: Union[str, Path],
+    download_name: str,
+    mimetype: Optional[str] = None,
+    etag: Optional[str] = None,
+) -> Response:
+    """以附件形式发送磁盘文件
+
+    Args:
+        path: 文件路径
+        download_name: 下载文件名
+        mimetype: 为空时按文件名推断
+        etag: 强 ETag（如文件 SHA-256）；为空时按路径/大小/修改时间生成
+    """
+    path = Path(path)
+    mimetype = mimetype or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+    accel_uri = _accel_redirect_uri(path)
+    if accel_uri:
+        response = current_app.response_class(status=200, mimetype=mimetype)
+        response.headers['X-Accel-Redirect'] = accel_uri
+        response.headers['Accept-Ranges'] = 'bytes'
+        response.headers.set('Content-Disposition', 'attachment', **_content_disposition(download_name))
+        if etag:
+            response.set_etag(etag)
+        return response
+
+    return send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=True,
+        download_name=download_name,
+        conditional=True,
+        etag=etag if etag else True,
+    )
@@ -0,0 +1,163 @@
+"""
+出站 HTTP 客户端
+按集成名复用 requests.Session（按 host 连接池 + keep-alive），统一重试、超时与耗时统计
+"""
+import logging
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+TimeoutValue = Union[float, Tuple[float, float], None]
+
+
+class HttpClient:
+    """出站 HTTP 客户端封装
+
+    - 每个集成（auth / resource_pool / automation ...）一个 Session，Session 内按 host 维护连接池；
+    - 连接失败对所有方法重试（请求尚未发出），502/503/504 只对幂等方法重试；
+    - 共享 Session 不保存响应 Set-Cookie，避免不同用户的请求互相串 cookie。
+    """
+
+    _instance: Optional['HttpClient'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._sessions = {}
+            cls._instance._metrics = {}
+            cls._instance._settings = {
+                'pool_connections': 10,
+                'pool_maxsize': 20,
+                'retries': 2,
+                'backoff_factor': 0.2,
+                'connect_timeout': 3.0,
+                'default_timeout': 10.0,
+                'slow_call_seconds': 2.0,
+            }
+        return cls._instance
+
+    def init_app(self, app):
+        """读取连接池/重试配置，并丢弃旧配置下建立的 Session"""
+        self._settings = {
+            'pool_connections': int(app.config.get('OUTBOUND_HTTP_POOL_CONNECTIONS', 10)),
+            'pool_maxsize': int(app.config.get('OUTBOUND_HTTP_POOL_MAXSIZE', 20)),
+            'retries': int(app.config.get('OUTBOUND_HTTP_RETRIES', 2)),
+            'backoff_factor': float(app.config.get('OUTBOUND_HTTP_BACKOFF_FACTOR', 0.2)),
+            'connect_timeout': float(app.config.get('OUTBOUND_HTTP_CONNECT_TIMEOUT', 3.0)),
+            'default_timeout': float(app.config.get('OUTBOUND_HTTP_DEFAULT_TIMEOUT', 10.0)),
+            'slow_call_seconds': float(app.config.get('OUTBOUND_HTTP_SLOW_CALL_SECONDS', 2.0)),
+        }
+        self.close()
+
+    def _build_session(self) -> requests.Session:
+        retries = max(self._settings['retries'], 0)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+            backoff_factor=self._settings['backoff_factor'],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self._settings['pool_connections'],
+            pool_maxsize=self._settings['pool_maxsize'],
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        return session
+
+    def session(self, integration: str) -> requests.Session:
+        """获取集成对应的共享 Session"""
+        session = self._sessions.get(integration)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(integration)
+                if session is None:
+                    session = self._build_session()
+                    self._sessions[integration] = session
+        return session
+
+    def _resolve_timeout(self, timeout: TimeoutValue) -> Tuple[float, float]:
+        if isinstance(timeout, tuple):
+            return timeout
+        read_timeout = float(timeout) if timeout else self._settings['default_timeout']
+        return min(self._settings['connect_timeout'], read_timeout), read_timeout
+
+    def request(
+        self,
+        integration: str,
+        method: str,
+        url: str,
+        timeout: TimeoutValue = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """发送请求；异常与 requests 一致（requests.RequestException）"""
+        started = time.perf_counter()
+        status_code = None
+        try:
+            response = self.session(integration).request(
+                method.upper(), url, timeout=self._resolve_timeout(timeout), **kwargs
+            )
+            status_code = response.status_code
+            return response
+        finally:
+            self._record(integration, time.perf_counter() - started, status_code)
+
+    def get(self, integration: str, url: str, **kwargs: Any) -> requests.Response:
+        return self.request(integration, 'GET', url, **kwargs)
+
+    def post(self, integration: str, url: str, **kwargs: Any) -> requests.Response:
+        return self.request(integration, 'POST', url, **kwargs)
+
+    def _record(self, integration: str, elapsed: float, status_code: Optional[int]) -> None:
+        failed = status_code is None or status_code >= 500
+        with self._lock:
+            metric = self._metrics.setdefault(
+                integration,
+                {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_status': None},
+            )
+            metric['calls'] += 1
+            metric['errors'] += 1 if failed else 0
+            metric['total_ms'] += elapsed * 1000
+            metric['max_ms'] = max(metric['max_ms'], elapsed * 1000)
+            metric['last_status'] = status_code
+        if elapsed >= self._settings['slow_call_seconds']:
+            logger.warning(f'[http-client] {integration} slow call: {elapsed:.2f}s status={status_code}')
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """各集成调用次数、失败次数与耗时统计"""
+        with self._lock:
+            return {
+                integration: {
+                    'calls': metric['calls'],
+                    'errors': metric['errors'],
+                    'avgMs': round(metric['total_ms'] / metric['calls'], 2) if metric['calls'] else 0,
+                    'maxMs': round(metric['max_ms'], 2),
+                    'lastStatus': metric['last_status'],
+                }
+                for integration, metric in self._metrics.items()
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+# 全局实例
+http_client = HttpClient()
@@ -1,7 +1,9 @@
 """
 分页工具
 """
-from typing import TypeVar, Generic
+import base64
+import json
+from typing import TypeVar, Generic, Any, Tuple
 from dataclasses import dataclass
 from flask import request
 
@@ -66,3 +68,20 @@ class PageResult(Generic[T]):
             "has_prev": self.has_prev
         }
 
+
+def encode_cursor(*values: Any) -> str:
+    """将排序键编码为不透明的游标（keyset 分页）"""
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """解析游标，格式不合法时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception as exc:
+        raise ValueError('无效的分页游标') from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('无效的分页游标')
+    return tuple(values)
@@ -13,6 +13,7 @@ class RedisClient:
 
     _instance: Optional['RedisClient'] = None
     _pool: Optional[redis.ConnectionPool] = None
+    _raw_pool: Optional[redis.ConnectionPool] = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -24,18 +25,20 @@ class RedisClient:
         socket_connect_timeout = float(app.config.get('REDIS_SOCKET_CONNECT_TIMEOUT', 0.5))
         socket_timeout = float(app.config.get('REDIS_SOCKET_TIMEOUT', 0.8))
 
-        self._pool = redis.ConnectionPool(
+        pool_options = dict(
             host=app.config.get('REDIS_HOST', 'localhost'),
             port=app.config.get('REDIS_PORT', 6379),
             db=app.config.get('REDIS_DB', 0),
             password=app.config.get('REDIS_PASSWORD'),
-            decode_responses=True,
             max_connections=20,
             socket_connect_timeout=socket_connect_timeout,
             socket_timeout=socket_timeout,
             retry_on_timeout=False,
             health_check_interval=30,
         )
+        self._pool = redis.ConnectionPool(decode_responses=True, **pool_options)
+        # 位图等二进制值不能按 UTF-8 解码，单独一个小连接池
+        self._raw_pool = redis.ConnectionPool(**{**pool_options, 'max_connections': 5})
         self._prefix = app.config.get('REDIS_KEY_PREFIX', 'structsim:')
         self._default_ttl = app.config.get('REDIS_DEFAULT_TTL', 3600)
 
@@ -46,6 +49,13 @@ class RedisClient:
             raise RuntimeError("Redis 未初始化，请先调用 init_app")
         return redis.Redis(connection_pool=self._pool)
 
+    @property
+    def raw_client(self) -> redis.Redis:
+        """获取不解码响应的 Redis 客户端（读写二进制值）"""
+        if self._raw_pool is None:
+            raise RuntimeError("Redis 未初始化，请先调用 init_app")
+        return redis.Redis(connection_pool=self._raw_pool)
+
     def _key(self, key: str) -> str:
         """添加 key 前缀"""
         return f"{self._prefix}{key}"
@@ -83,6 +93,41 @@ class RedisClient:
             current_app.logger.error(f"Redis EXISTS 错误: {e}")
             return False
 
+    def setbit(self, key: str, offset: int, ttl: int = None) -> Optional[int]:
+        """置位并刷新过期时间，返回原位值；Redis 不可用时返回 None"""
+        try:
+            pipe = self.client.pipeline()
+            pipe.setbit(self._key(key), offset, 1)
+            pipe.expire(self._key(key), ttl or self._default_ttl)
+            return pipe.execute()[0]
+        except redis.RedisError as e:
+            current_app.logger.error(f"Redis SETBIT 错误: {e}")
+            return None
+
+    def bitcount(self, key: str) -> Optional[int]:
+        """统计置位数；Redis 不可用时返回 None"""
+        try:
+            return self.client.bitcount(self._key(key))
+        except redis.RedisError as e:
+            current_app.logger.error(f"Redis BITCOUNT 错误: {e}")
+            return None
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """获取二进制值"""
+        try:
+            return self.raw_client.get(self._key(key))
+        except redis.RedisError as e:
+            current_app.logger.error(f"Redis GET 错误: {e}")
+            return None
+
+    def set_bytes(self, key: str, value: bytes, ttl: int = None, nx: bool = False) -> bool:
+        """设置二进制值；nx=True 时仅在 key 不存在时写入"""
+        try:
+            return bool(self.raw_client.set(self._key(key), value, ex=ttl or self._default_ttl, nx=nx))
+        except redis.RedisError as e:
+            current_app.logger.error(f"Redis SET 错误: {e}")
+            return False
+
 
 # 单例实例
 redis_client = RedisClient()
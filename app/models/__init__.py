@@ -44,9 +44,12 @@ from app.models.config_relations import (
 # 订单模型
 from app.models.order import (
     Order,
-    OrderResult
+    OrderResult,
+    OrderSimType,
+    UserDailyRoundUsage
 )
-from app.models.case_opti import OrderCaseOpti, CaseConditionOpti
+from app.models.case_opti import OrderCaseOpti, CaseConditionOpti, AutomationOutbox
+from app.models.snapshot import SnapshotBlob
 
 # 结果模型
 from app.models.result import (
@@ -69,7 +72,7 @@ from app.models.platform import (
 )
 
 # 上传模型
-from app.models.upload import UploadFile
+from app.models.upload import UploadFile, UploadBlob
 from app.models.upload_chunk import UploadChunk
 
 __all__ = [
@@ -108,8 +111,12 @@ __all__ = [
     # 订单
     'Order',
     'OrderResult',
+    'OrderSimType',
+    'UserDailyRoundUsage',
     'OrderCaseOpti',
     'CaseConditionOpti',
+    'AutomationOutbox',
+    'SnapshotBlob',
     # 结果
     'SimTypeResult',
     'Round',
@@ -124,5 +131,6 @@ __all__ = [
     'TrackingEvent',
     # 上传
     'UploadFile',
+    'UploadBlob',
     'UploadChunk'
 ]
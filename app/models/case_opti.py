@@ -2,6 +2,7 @@ from datetime import datetime
 
 from app import db
 from app.models.base import ToDictMixin
+from app.models.snapshot import snapshot_store
 
 
 class OrderCaseOpti(db.Model, ToDictMixin):
@@ -83,7 +84,8 @@ class CaseConditionOpti(db.Model, ToDictMixin):
     status = db.Column(db.SmallInteger, default=0)
     statistics_json = db.Column(db.JSON)
     result_summary_json = db.Column(db.JSON)
-    condition_snapshot = db.Column(db.JSON, nullable=False)
+    # 列名保持 condition_snapshot；大字段外置到 snapshot_blobs，经 condition_snapshot 属性透明读写
+    condition_snapshot_ref = db.Column('condition_snapshot', db.JSON, nullable=False)
     subject_config = db.Column(db.JSON)
     external_meta = db.Column(db.JSON)
     created_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()))
@@ -105,7 +107,42 @@ class CaseConditionOpti(db.Model, ToDictMixin):
     def order_case(self):
         return OrderCaseOpti.query.filter_by(id=self.order_case_id).first()
 
+    @property
+    def condition_snapshot(self):
+        stored = self.condition_snapshot_ref
+        cached = self.__dict__.get('_hydrated_snapshot')
+        if cached is not None and cached[0] is stored:
+            return cached[1]
+        snapshot = snapshot_store.hydrate(stored)
+        self.__dict__['_hydrated_snapshot'] = (stored, snapshot)
+        return snapshot
+
+    @condition_snapshot.setter
+    def condition_snapshot(self, value):
+        self.condition_snapshot_ref = snapshot_store.dehydrate(value)
+
+    @classmethod
+    def storage_values(cls, values: dict) -> dict:
+        """批量 insert/update 用：把 condition_snapshot 换成外置引用后的存储列。"""
+        if 'condition_snapshot' not in values:
+            return values
+        stored = dict(values)
+        stored['condition_snapshot_ref'] = snapshot_store.dehydrate(stored.pop('condition_snapshot'))
+        return stored
+
     def to_dict(self):
+        payload = self.to_list_dict()
+        payload.update({
+            'statistics_json': self.statistics_json,
+            'result_summary_json': self.result_summary_json,
+            'condition_snapshot': self.condition_snapshot,
+            'subject_config': self.subject_config,
+            'external_meta': self.external_meta,
+        })
+        return payload
+
+    def to_list_dict(self):
+        """列表字段，不含快照等大字段（不触发快照还原）。"""
         return {
             'id': self.id,
             'order_id': self.order_id,
@@ -131,20 +168,36 @@ class CaseConditionOpti(db.Model, ToDictMixin):
             'running_module': self.running_module,
             'process': float(self.process or 0),
             'status': self.status,
-            'statistics_json': self.statistics_json,
-            'result_summary_json': self.result_summary_json,
-            'condition_snapshot': self.condition_snapshot,
-            'subject_config': self.subject_config,
-            'external_meta': self.external_meta,
             'created_at': self.created_at,
             'updated_at': self.updated_at,
         }
 
-    def to_list_dict(self):
-        payload = self.to_dict()
-        payload.pop('condition_snapshot', None)
-        payload.pop('subject_config', None)
-        payload.pop('external_meta', None)
-        payload.pop('statistics_json', None)
-        payload.pop('result_summary_json', None)
-        return payload
+
+class AutomationOutbox(db.Model):
+    """自动化提交 outbox：与订单同事务写入，由后台 dispatcher 异步提交到分发接口。"""
+
+    __tablename__ = 'automation_outbox'
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    order_id = db.Column(db.BigInteger, nullable=False, index=True)
+    order_case_id = db.Column(db.BigInteger, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default=STATUS_PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.Integer, nullable=False, default=0, comment='下次可投递时间（秒级时间戳）')
+    locked_until = db.Column(db.Integer, nullable=False, default=0, comment='处理中租约到期时间')
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()))
+    updated_at = db.Column(
+        db.Integer,
+        default=lambda: int(datetime.utcnow().timestamp()),
+        onupdate=lambda: int(datetime.utcnow().timestamp()),
+    )
+
+    __table_args__ = (
+        db.Index('idx_automation_outbox_due', 'status', 'next_attempt_at'),
+    )
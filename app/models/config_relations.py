@@ -19,6 +19,8 @@ class ParamGroup(db.Model, ToDictMixin):
     doe_file_name = db.Column(db.String(255), comment='DOE文件名')
     doe_file_heads = db.Column(db.JSON, comment='DOE文件表头')
     doe_file_data = db.Column(db.JSON, comment='DOE文件数据')
+    doe_matrix_id = db.Column(db.String(64), comment='外置DOE矩阵ID（列式文件内容 sha256），非空时 doe_file_data 为空')
+    doe_row_count = db.Column(db.Integer, comment='DOE矩阵行数')
     valid = db.Column(db.SmallInteger, default=1, comment='1=有效,0=禁用')
     sort = db.Column(db.Integer, default=100, comment='排序')
     created_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()))
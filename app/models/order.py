@@ -57,6 +57,7 @@ class Order(db.Model):
     
     # 工况概览（冗余存储，供列表展示）
     condition_summary = db.Column(db.JSON, comment='工况概览 {姿态名: [仿真类型名,...]}')
+    search_text = db.Column(db.Text, comment='检索文本（备注+工况概览），ngram 全文索引')
 
     # 客户端元数据
     client_meta = db.Column(db.JSON, comment='客户端元数据 {lang, theme, ui_ver}')
@@ -68,6 +69,57 @@ class Order(db.Model):
     created_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()))
     updated_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()),
                           onupdate=lambda: int(datetime.utcnow().timestamp()))
+
+    # 列表 keyset 分页索引
+    __table_args__ = (
+        db.Index('idx_orders_created_id', 'created_at', 'id'),
+    )
+
+    # 字段投影（fields/include）：序列化键 -> 需要读取的列
+    FIELD_COLUMNS = {
+        'origin_file': ('origin_file_type', 'origin_file_name', 'origin_file_path', 'origin_file_id'),
+    }
+    # 可能不存在于旧库、按 __dict__ 读取的列
+    OPTIONAL_COLUMNS = ('phase_id', 'opt_issue_id', 'domain_account', 'base_dir', 'condition_summary')
+    # 大 JSON 字段，只在详情默认返回或显式 include 时读取
+    HEAVY_FIELDS = ('input_json', 'submit_check', 'client_meta')
+    DETAIL_FIELDS = (
+        'id', 'order_no', 'project_id', 'phase_id', 'model_level_id', 'origin_file', 'origin_fold_type_id',
+        'fold_type_id', 'fold_type_ids', 'participant_uids', 'remark', 'sim_type_ids', 'input_json',
+        'opt_issue_id', 'domain_account', 'base_dir', 'workflow_id', 'status', 'progress', 'cur_node_id',
+        'submit_check', 'condition_summary', 'client_meta', 'created_by', 'created_at', 'updated_at',
+    )
+    LIST_FIELDS = (
+        'id', 'order_no', 'project_id', 'phase_id', 'remark', 'sim_type_ids', 'fold_type_ids',
+        'condition_summary', 'opt_issue_id', 'domain_account', 'base_dir', 'status', 'progress',
+        'created_by', 'created_at', 'updated_at',
+    )
+
+    @classmethod
+    def columns_for_fields(cls, fields) -> list:
+        columns = []
+        for field in fields:
+            for column in cls.FIELD_COLUMNS.get(field, (field,)):
+                if column in cls.__table__.columns and column not in columns:
+                    columns.append(column)
+        return columns
+
+    def to_projected_dict(self, fields):
+        """按字段投影序列化，只访问请求的字段"""
+        payload = {}
+        for field in fields:
+            if field == 'origin_file':
+                payload[field] = {
+                    'type': self.origin_file_type,
+                    'name': self.origin_file_name,
+                    'path': self.origin_file_path,
+                    'file_id': self.origin_file_id
+                }
+            elif field in self.OPTIONAL_COLUMNS:
+                payload[field] = self.__dict__.get(field)
+            else:
+                payload[field] = getattr(self, field)
+        return payload
     
     def to_dict(self):
         return {
@@ -126,6 +178,34 @@ class Order(db.Model):
         }
 
 
+class OrderSimType(db.Model):
+    """订单-仿真类型关联表（orders.sim_type_ids 的规范化副本，供按仿真类型筛选走索引）"""
+    __tablename__ = 'order_sim_types'
+
+    order_id = db.Column(db.Integer, primary_key=True, comment='订单ID')
+    sim_type_id = db.Column(db.Integer, primary_key=True, comment='仿真类型ID')
+
+    __table_args__ = (
+        db.Index('idx_order_sim_types_sim_type', 'sim_type_id', 'order_id'),
+    )
+
+
+class UserDailyRoundUsage(db.Model):
+    """用户每日已用轮次计数（提单配额校验用，按天原子累加）"""
+    __tablename__ = 'user_daily_round_usage'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    domain_account = db.Column(db.String(32), nullable=False, comment='提交用户域账号')
+    usage_date = db.Column(db.Integer, nullable=False, comment='日期 YYYYMMDD（服务器本地时区）')
+    used_rounds = db.Column(db.Integer, nullable=False, default=0, comment='当日已用轮次')
+    updated_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()),
+                          onupdate=lambda: int(datetime.utcnow().timestamp()))
+
+    __table_args__ = (
+        db.UniqueConstraint('domain_account', 'usage_date', name='uk_user_daily_round_usage'),
+    )
+
+
 class OrderResult(db.Model, ToDictMixin):
     """订单结果概览表"""
     __tablename__ = 'order_results'
@@ -33,6 +33,7 @@ class SimTypeResult(db.Model, ToDictMixin):
     total_rounds = db.Column(db.Integer, default=0, comment='总轮次数')
     completed_rounds = db.Column(db.Integer, default=0, comment='已完成轮次数')
     failed_rounds = db.Column(db.Integer, default=0, comment='失败轮次数')
+    round_status_counts = db.Column(db.JSON, comment='各状态轮次数 {status: count}，增量维护，NULL 表示未初始化')
     
     # 时间戳
     created_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()))
@@ -86,6 +87,7 @@ class Round(db.Model, ToDictMixin):
     # 复合索引
     __table_args__ = (
         db.Index('idx_simresult_round', 'sim_type_result_id', 'round_index'),
+        db.Index('idx_simresult_status_round', 'sim_type_result_id', 'status', 'round_index'),
         db.Index('idx_order_simtype_round', 'order_id', 'sim_type_id', 'round_index'),
     )
 
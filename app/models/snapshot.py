@@ -0,0 +1,113 @@
+import hashlib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+# 工况快照中按内容寻址外置的大字段（同一订单的工况通常共享同一份 globalParams/solver）
+SNAPSHOT_BLOB_FIELDS = ('params', 'globalParams', 'output', 'solver')
+SNAPSHOT_REFS_KEY = '$refs'
+
+
+def canonical_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def snapshot_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class SnapshotBlob(db.Model):
+    """内容寻址快照块：sha256(规范化 JSON) -> zlib 压缩 JSON，写入后不可变"""
+    __tablename__ = 'snapshot_blobs'
+
+    hash = db.Column(db.String(64), primary_key=True, comment='规范化 JSON 的 sha256')
+    payload = db.Column(db.LargeBinary(length=16777215), nullable=False, comment='zlib 压缩的规范化 JSON')
+    raw_size = db.Column(db.Integer, nullable=False, default=0, comment='压缩前字节数')
+    created_at = db.Column(db.Integer, default=lambda: int(datetime.utcnow().timestamp()))
+
+
+class SnapshotStore:
+    """快照块读写。内容不可变，解压后的 JSON 文本按 hash 做进程内 LRU 缓存。"""
+
+    def __init__(self, cache_size: int = 2048) -> None:
+        self._cache_size = cache_size
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, digest: str, text: str) -> None:
+        with self._lock:
+            self._cache[digest] = text
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _recall(self, digest: str) -> Optional[str]:
+        with self._lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+            return text
+
+    def put(self, value: Any) -> str:
+        """写入快照块并返回 hash；已存在时不重复写。"""
+        data = canonical_json(value)
+        digest = snapshot_hash(data)
+        if db.session.get(SnapshotBlob, digest) is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(SnapshotBlob(hash=digest, payload=zlib.compress(data, 6), raw_size=len(data)))
+            except IntegrityError:
+                pass
+        self._remember(digest, data.decode('utf-8'))
+        return digest
+
+    def get_many(self, digests: Iterable[str]) -> Dict[str, Any]:
+        texts: Dict[str, str] = {}
+        missing = []
+        for digest in set(digests):
+            text = self._recall(digest)
+            if text is None:
+                missing.append(digest)
+            else:
+                texts[digest] = text
+        if missing:
+            for blob in SnapshotBlob.query.filter(SnapshotBlob.hash.in_(missing)).all():
+                text = zlib.decompress(blob.payload).decode('utf-8')
+                self._remember(blob.hash, text)
+                texts[blob.hash] = text
+        return {digest: json.loads(text) for digest, text in texts.items()}
+
+    def dehydrate(self, snapshot: Any) -> Any:
+        """把大字段替换为 hash 引用，其余字段原样保留。"""
+        if not isinstance(snapshot, dict) or SNAPSHOT_REFS_KEY in snapshot:
+            return snapshot
+        stored = dict(snapshot)
+        refs = {}
+        for field in SNAPSHOT_BLOB_FIELDS:
+            value = stored.get(field)
+            if isinstance(value, (dict, list)) and value:
+                refs[field] = self.put(stored.pop(field))
+        if refs:
+            stored[SNAPSHOT_REFS_KEY] = refs
+        return stored
+
+    def hydrate(self, stored: Any) -> Any:
+        """还原引用字段；历史行（无引用）原样返回。"""
+        if not isinstance(stored, dict) or SNAPSHOT_REFS_KEY not in stored:
+            return stored
+        snapshot = dict(stored)
+        refs = snapshot.pop(SNAPSHOT_REFS_KEY) or {}
+        blobs = self.get_many(refs.values())
+        for field, digest in refs.items():
+            snapshot[field] = blobs.get(digest, {})
+        return snapshot
+
+
+snapshot_store = SnapshotStore()
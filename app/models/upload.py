@@ -9,6 +9,7 @@ from app.models.base import ToDictMixin
 class UploadFile(db.Model, ToDictMixin):
     """文件上传记录表"""
     __tablename__ = 'upload_files'
+    _exclude_fields = {'chunk_bitmap'}
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
@@ -26,11 +27,12 @@ class UploadFile(db.Model, ToDictMixin):
     # 分片配置
     chunk_size = db.Column(db.Integer, nullable=False, default=5242880, comment='分片大小(字节)')
     total_chunks = db.Column(db.Integer, nullable=False, comment='总分片数')
+    chunk_bitmap = db.Column(db.LargeBinary, comment='已接收分片位图(与 Redis SETBIT 位序一致)')
 
 
 
     # 状态
-    status = db.Column(db.String(20), nullable=False, default='uploading', comment='状态: uploading/merging/completed/failed')
+    status = db.Column(db.String(20), nullable=False, default='uploading', comment='状态: uploading/verifying/completed/failed')
     storage_path = db.Column(db.String(500), comment='存储路径')
 
     # 元数据
@@ -42,3 +44,15 @@ class UploadFile(db.Model, ToDictMixin):
     updated_at = db.Column(db.Integer, nullable=False, default=lambda: int(datetime.utcnow().timestamp()))
     completed_at = db.Column(db.Integer, comment='完成时间')
     expires_at = db.Column(db.Integer, index=True, comment='过期时间')
+
+
+class UploadBlob(db.Model, ToDictMixin):
+    """内容寻址文件块：同一 file_hash 跨用户只存一份，上传记录通过硬链接（或直接路径）引用"""
+    __tablename__ = 'upload_blobs'
+
+    file_hash = db.Column(db.String(64), primary_key=True, comment='文件SHA-256哈希')
+    storage_path = db.Column(db.String(500), nullable=False, comment='块存储路径(相对存储根目录)')
+    file_size = db.Column(db.BigInteger, nullable=False, comment='文件大小(字节)')
+    ref_count = db.Column(db.Integer, nullable=False, default=0, comment='引用该块的已完成上传记录数')
+    created_at = db.Column(db.Integer, nullable=False, default=lambda: int(datetime.utcnow().timestamp()))
+    updated_at = db.Column(db.Integer, nullable=False, default=lambda: int(datetime.utcnow().timestamp()))
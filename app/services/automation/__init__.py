@@ -1,3 +1,4 @@
 from .distribution_client import automation_distribution_client
+from .outbox_worker import automation_outbox_worker
 
-__all__ = ['automation_distribution_client']
+__all__ = ['automation_distribution_client', 'automation_outbox_worker']
@@ -6,6 +6,9 @@ from typing import Any, Dict, List
 import requests
 from flask import current_app
 
+from app.common.http_client import http_client
+from app.services.doe_matrix import doe_matrix_store
+
 from .mock_union_writer import mock_union_writer
 
 
@@ -55,7 +58,7 @@ class AutomationDistributionClient:
         timeout = float(current_app.config.get('AUTOMATION_DISTRIBUTION_TIMEOUT', 15.0))
         payload = self._build_payload(order, case_entity, conditions, issue_id)
         try:
-            response = requests.post(url, json=payload, timeout=timeout)
+            response = http_client.post('automation', url, json=payload, timeout=timeout)
             response.raise_for_status()
             body = response.json()
         except requests.RequestException as exc:
@@ -152,7 +155,9 @@ class AutomationDistributionClient:
             'remark': getattr(case_entity, 'case_name', None) or getattr(order, 'remark', None),
             'conditions': [
                 {
-                    'condition': getattr(condition, 'condition_snapshot', None) or {},
+                    'condition': AutomationDistributionClient._external_condition(
+                        getattr(condition, 'condition_snapshot', None) or {}
+                    ),
                     'conditionRef': {
                         'caseConditionId': getattr(condition, 'id', None),
                         'conditionId': getattr(condition, 'condition_id', None),
@@ -165,6 +170,18 @@ class AutomationDistributionClient:
             ],
         }
 
+    @staticmethod
+    def _external_condition(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """外置的 DOE 矩阵还原为 doeParamData，对外投递格式保持不变。"""
+        params = snapshot.get('params')
+        if not isinstance(params, dict):
+            return snapshot
+        opt_key = 'optParams' if 'optParams' in params else 'opt_params'
+        opt_params = doe_matrix_store.hydrate_opt_params(params.get(opt_key))
+        if opt_params is params.get(opt_key):
+            return snapshot
+        return {**snapshot, 'params': {**params, opt_key: opt_params}}
+
     @staticmethod
     def _build_mock_issue_id(order) -> int:
         return 600_000_000 + max(int(getattr(order, 'id', 0) or 0), 0)
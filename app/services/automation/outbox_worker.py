@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AutomationOutboxWorker:
+    """outbox 后台投递线程。
+
+    - 每个进程一个守护线程，按 AUTOMATION_OUTBOX_POLL_SECONDS 轮询；
+    - 新订单提交后调用 notify() 立即唤醒，不必等待下一次轮询；
+    - 多进程并发由 outbox 行的条件更新认领保证不重复投递。
+    """
+
+    def __init__(self) -> None:
+        self._app = None
+        self._dispatch: Optional[Callable[[], int]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app, dispatch: Callable[[], int]) -> None:
+        if self.running:
+            return
+        self._app = app
+        self._dispatch = dispatch
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='automation-outbox', daemon=True)
+        self._thread.start()
+        logger.info('[automation-outbox] worker started')
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        poll_seconds = float(self._app.config.get('AUTOMATION_OUTBOX_POLL_SECONDS', 2.0))
+        batch_size = int(self._app.config.get('AUTOMATION_OUTBOX_BATCH_SIZE', 20))
+        while not self._stopped.is_set():
+            processed = 0
+            try:
+                with self._app.app_context():
+                    processed = self._dispatch()
+            except Exception as exc:
+                logger.exception(f'[automation-outbox] dispatch failed: {exc}')
+            if processed >= batch_size:
+                continue
+            self._wakeup.wait(poll_seconds)
+            self._wakeup.clear()
+
+
+automation_outbox_worker = AutomationOutboxWorker()
@@ -0,0 +1,299 @@
+"""
+DOE 矩阵列式存储
+DOE 矩阵（行字典列表）按列编码为二进制文件，按内容 sha256 寻址、写入后不可变；
+业务表 / input_json 只保留 doeMatrixId、行数与列名，读取时 mmap 打开，按需取列或分页取行。
+
+文件格式（小端）：
+    头部 16 字节: magic 'DOEM' | version u8 | 3 字节保留 | row_count u32 | meta_len u32
+    meta: UTF-8 JSON {"columns": [{"name": ..., "type": "i8" | "f8" | "json"}]}，以空格补齐到 8 字节
+    列数据按 meta 顺序排列，每列补齐到 8 字节：
+        i8 / f8: row_count 个 int64 / float64
+        json:    u32 长度 + 该列取值组成的 JSON 数组（字符串、混合类型列）
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from flask import current_app, has_app_context
+
+from app.common.errors import BusinessError, NotFoundError
+from app.constants import ErrorCode
+
+DOE_MATRIX_MAGIC = b'DOEM'
+DOE_MATRIX_VERSION = 1
+DOE_MATRIX_SUFFIX = '.doem'
+
+# opt_params 中的引用字段（替换 doeParamData 行列表）
+DOE_MATRIX_ID_KEY = 'doeMatrixId'
+DOE_ROW_COUNT_KEY = 'doeRowCount'
+DOE_COLUMNS_KEY = 'doeColumns'
+
+_SNAKE_KEYS = {
+    DOE_MATRIX_ID_KEY: 'doe_matrix_id',
+    DOE_ROW_COUNT_KEY: 'doe_row_count',
+    DOE_COLUMNS_KEY: 'doe_columns',
+}
+_REFERENCE_KEYS = frozenset(_SNAKE_KEYS) | frozenset(_SNAKE_KEYS.values())
+
+_HEADER = struct.Struct('<4sB3xII')
+_LENGTH = struct.Struct('<I')
+_MATRIX_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+_TYPECODES = {'i8': 'q', 'f8': 'd'}
+
+
+def _padding(size: int) -> int:
+    return (-size) % 8
+
+
+def _column_type(values: Sequence[Any]) -> str:
+    """整数列 -> i8，浮点列 -> f8；bool、None、字符串及 int/float 混合列按 JSON 保存以保证原样还原"""
+    if all(type(value) is int and _INT64_MIN <= value <= _INT64_MAX for value in values):
+        return 'i8'
+    if all(type(value) is float for value in values):
+        return 'f8'
+    return 'json'
+
+
+def _matrix_columns(rows: Any) -> Optional[List[str]]:
+    """所有行均为键集合相同的字典时返回列名（按首行顺序），否则返回 None（保持行存）"""
+    if not isinstance(rows, list) or not rows or not isinstance(rows[0], dict):
+        return None
+    columns = list(rows[0].keys())
+    if not columns or not all(isinstance(name, str) for name in columns):
+        return None
+    key_set = set(columns)
+    for row in rows:
+        if not isinstance(row, dict) or len(row) != len(columns) or row.keys() != key_set:
+            return None
+    return columns
+
+
+def encode_matrix(columns: List[str], rows: List[Dict[str, Any]]) -> bytes:
+    """把行字典列表编码为列式二进制"""
+    specs = []
+    parts = []
+    for name in columns:
+        values = [row[name] for row in rows]
+        column_type = _column_type(values)
+        if column_type == 'json':
+            data = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            payload = _LENGTH.pack(len(data)) + data
+        else:
+            typed = array(_TYPECODES[column_type], values)
+            if sys.byteorder != 'little':
+                typed.byteswap()
+            payload = typed.tobytes()
+        parts.append(payload + b'\0' * _padding(len(payload)))
+        specs.append({'name': name, 'type': column_type})
+
+    meta = json.dumps({'columns': specs}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    meta += b' ' * _padding(len(meta))
+    return _HEADER.pack(DOE_MATRIX_MAGIC, DOE_MATRIX_VERSION, len(rows), len(meta)) + meta + b''.join(parts)
+
+
+class DoeMatrix:
+    """mmap 打开的只读 DOE 矩阵；用完需 close()（或 with 语句）"""
+
+    def __init__(self, path: Path) -> None:
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, row_count, meta_len = _HEADER.unpack_from(self._mmap, 0)
+            if magic != DOE_MATRIX_MAGIC or version != DOE_MATRIX_VERSION:
+                raise ValueError(f'不支持的 DOE 矩阵文件: {path}')
+            meta = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_len])
+        except Exception:
+            self.close()
+            raise
+        self.row_count: int = row_count
+        self._specs: Dict[str, Tuple[str, int, int]] = {}
+        self.columns: List[str] = []
+        offset = _HEADER.size + meta_len
+        for spec in meta['columns']:
+            if spec['type'] == 'json':
+                size = _LENGTH.size + _LENGTH.unpack_from(self._mmap, offset)[0]
+            else:
+                size = row_count * 8
+            self._specs[spec['name']] = (spec['type'], offset, size)
+            self.columns.append(spec['name'])
+            offset += size + _padding(size)
+
+    def __enter__(self) -> 'DoeMatrix':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def column_type(self, name: str) -> str:
+        return self._specs[name][0]
+
+    @contextmanager
+    def _numeric_view(self, name: str) -> Iterator[Sequence]:
+        """数值列的零拷贝视图（仅在 with 块内有效）"""
+        column_type, offset, size = self._specs[name]
+        if sys.byteorder != 'little':
+            typed = array(_TYPECODES[column_type], self._mmap[offset:offset + size])
+            typed.byteswap()
+            yield typed
+            return
+        with memoryview(self._mmap) as view, view[offset:offset + size] as raw, \
+                raw.cast(_TYPECODES[column_type]) as values:
+            yield values
+
+    def column(self, name: str, start: int = 0, stop: Optional[int] = None) -> List[Any]:
+        """读取单列 [start, stop) 行的取值"""
+        column_type, offset, size = self._specs[name]
+        if column_type == 'json':
+            values = json.loads(self._mmap[offset + _LENGTH.size:offset + size])
+            return values[start:stop]
+        with self._numeric_view(name) as values:
+            return values[start:stop].tolist() if isinstance(values, memoryview) else list(values[start:stop])
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """还原 [start, stop) 行为行字典列表"""
+        columns = [self.column(name, start, stop) for name in self.columns]
+        return [dict(zip(self.columns, values)) for values in zip(*columns)]
+
+    def find_out_of_range(
+        self, name: str, low: Optional[float], high: Optional[float]
+    ) -> Optional[Tuple[int, Any]]:
+        """返回第一个超出 [low, high] 的 (行下标, 取值)；整列在范围内时返回 None
+
+        数值列先对整列求 min/max 判断，只有越界时才逐行定位；JSON 列只检查可转为数值的取值。
+        """
+        if low is None and high is None:
+            return None
+        if self.column_type(name) != 'json':
+            with self._numeric_view(name) as values:
+                if not len(values) or ((low is None or min(values) >= low) and (high is None or max(values) <= high)):
+                    return None
+                for index, value in enumerate(values):
+                    if (low is not None and value < low) or (high is not None and value > high):
+                        return index, value
+            return None
+
+        for index, value in enumerate(self.column(name)):
+            if isinstance(value, bool):
+                continue
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                continue
+            if (low is not None and number < low) or (high is not None and number > high):
+                return index, value
+        return None
+
+
+class DoeMatrixStore:
+    """DOE 矩阵文件读写，目录默认为 {UPLOAD_FOLDER}/doe/matrices/<id 前两位>/<id>.doem"""
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        if self._root:
+            return Path(self._root)
+        upload_folder = current_app.config.get('UPLOAD_FOLDER', './storage') if has_app_context() else './storage'
+        return Path(upload_folder) / 'doe' / 'matrices'
+
+    def _path(self, matrix_id: str) -> Path:
+        if not isinstance(matrix_id, str) or not _MATRIX_ID_PATTERN.match(matrix_id):
+            raise BusinessError(ErrorCode.VALIDATION_ERROR, 'DOE矩阵ID格式无效')
+        return self.root / matrix_id[:2] / f'{matrix_id}{DOE_MATRIX_SUFFIX}'
+
+    def put(self, rows: Any) -> Optional[Dict[str, Any]]:
+        """写入矩阵并返回引用 {doeMatrixId, doeRowCount, doeColumns}；行结构不规整时返回 None"""
+        columns = _matrix_columns(rows)
+        if columns is None:
+            return None
+        data = encode_matrix(columns, rows)
+        matrix_id = hashlib.sha256(data).hexdigest()
+        path = self._path(matrix_id)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fp:
+                    fp.write(data)
+                    fp.flush()
+                    os.fsync(fp.fileno())
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return {DOE_MATRIX_ID_KEY: matrix_id, DOE_ROW_COUNT_KEY: len(rows), DOE_COLUMNS_KEY: columns}
+
+    def open(self, matrix_id: str) -> DoeMatrix:
+        path = self._path(matrix_id)
+        if not path.exists():
+            raise NotFoundError('DOE矩阵', matrix_id)
+        return DoeMatrix(path)
+
+    def reference(self, matrix_id: str) -> Dict[str, Any]:
+        """按文件头返回引用信息（行数、列名以文件为准）"""
+        with self.open(matrix_id) as matrix:
+            return {DOE_MATRIX_ID_KEY: matrix_id, DOE_ROW_COUNT_KEY: matrix.row_count, DOE_COLUMNS_KEY: matrix.columns}
+
+    def load_rows(self, matrix_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self.open(matrix_id) as matrix:
+            return matrix.rows(offset, None if limit is None else offset + limit)
+
+    def dehydrate_opt_params(self, opt_params: Any, min_rows: int) -> Any:
+        """doeParamData 行数达到 min_rows 时外置为矩阵引用；已是引用时按文件校正行数与列名
+
+        引用字段沿用原字典的命名风格（请求体经 snake_case 转换后为 doe_matrix_id 等）。
+        """
+        if not isinstance(opt_params, dict):
+            return opt_params
+        snake = 'doeParamData' not in opt_params and DOE_MATRIX_ID_KEY not in opt_params
+        data_key = 'doe_param_data' if snake else 'doeParamData'
+        rows = opt_params.get(data_key)
+        if isinstance(rows, list):
+            if len(rows) < min_rows:
+                return opt_params
+            reference = self.put(rows)
+            if reference is None:
+                return opt_params
+        else:
+            matrix_id = opt_params.get(DOE_MATRIX_ID_KEY, opt_params.get('doe_matrix_id'))
+            if not matrix_id:
+                return opt_params
+            reference = self.reference(matrix_id)
+        stored = {
+            key: value for key, value in opt_params.items()
+            if key not in _REFERENCE_KEYS and key not in ('doeParamData', 'doe_param_data')
+        }
+        stored.update({_SNAKE_KEYS[key] if snake else key: value for key, value in reference.items()})
+        return stored
+
+    def hydrate_opt_params(self, opt_params: Any) -> Any:
+        """把矩阵引用还原为 doeParamData 行列表（对外投递时使用）"""
+        if not isinstance(opt_params, dict):
+            return opt_params
+        matrix_id = opt_params.get(DOE_MATRIX_ID_KEY, opt_params.get('doe_matrix_id'))
+        if not matrix_id or isinstance(opt_params.get('doeParamData', opt_params.get('doe_param_data')), list):
+            return opt_params
+        hydrated = {key: value for key, value in opt_params.items() if key not in _REFERENCE_KEYS}
+        hydrated['doeParamData' if DOE_MATRIX_ID_KEY in opt_params else 'doe_param_data'] = self.load_rows(matrix_id)
+        return hydrated
+
+
+doe_matrix_store = DoeMatrixStore()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """外部依赖熔断器（closed -> open -> half_open -> closed）。
+
+    - 连续失败或慢调用达到阈值后进入 open，在冷却期内直接拒绝请求；
+    - 冷却期结束后进入 half_open，只放行一个探测请求；
+    - 探测成功恢复 closed，失败则重新 open。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 8.0,
+        open_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = max(int(failure_threshold), 1)
+        self.slow_call_seconds = float(slow_call_seconds)
+        self.open_seconds = float(open_seconds)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._total_rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self) -> None:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+    def _open(self) -> None:
+        if self._state != self.OPEN:
+            logger.warning(
+                f'[circuit-breaker] {self.name} opened after {self._consecutive_failures} failures'
+            )
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            self._refresh_state()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._total_rejected += 1
+            return False
+
+    def record_success(self, elapsed_seconds: float = 0.0) -> None:
+        if self.slow_call_seconds > 0 and elapsed_seconds >= self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f'[circuit-breaker] {self.name} closed')
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """调用结果未知（非依赖本身的异常中断）时释放 half_open 探测名额，由下一个请求重新探测"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh_state()
+            return {
+                'name': self.name,
+                'state': self._state,
+                'consecutiveFailures': self._consecutive_failures,
+                'rejected': self._total_rejected,
+            }
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from contextlib import contextmanager
 from queue import Empty, Full, LifoQueue
 from typing import Any, Dict, Iterable, List
@@ -8,6 +9,17 @@ import pymysql
 from flask import current_app
 from pymysql.cursors import DictCursor
 
+from app.common.errors import BusinessError
+from app.constants import ErrorCode
+from app.services.external_data.circuit_breaker import CircuitBreaker
+
+
+class ExternalDataUnavailableError(BusinessError):
+    """外部库熔断中或访问失败。"""
+
+    def __init__(self, msg: str = '外部数据源暂不可用'):
+        super().__init__(code=ErrorCode.EXTERNAL_SERVICE_ERROR, msg=msg)
+
 
 class ExternalMySQL56Client:
     """外部 MySQL 5.6 只读客户端。"""
@@ -15,6 +27,7 @@ class ExternalMySQL56Client:
     def __init__(self) -> None:
         self._connection_kwargs_cache: Dict[str, Any] | None = None
         self._pools: Dict[str, LifoQueue] = {}
+        self._breaker: CircuitBreaker | None = None
 
     def _build_connection_kwargs(self) -> Dict[str, Any]:
         app = current_app
@@ -37,16 +50,60 @@ class ExternalMySQL56Client:
             self._connection_kwargs_cache = self._build_connection_kwargs()
         return self._connection_kwargs_cache
 
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """整个实例共用一个熔断器：多个 schema 在同一台 MySQL 上，故障是一起的。"""
+        if self._breaker is None:
+            config = current_app.config
+            self._breaker = CircuitBreaker(
+                'external_mysql56',
+                failure_threshold=int(config.get('EXTERNAL_MYSQL_BREAKER_FAILURE_THRESHOLD', 5)),
+                slow_call_seconds=float(config.get('EXTERNAL_MYSQL_BREAKER_SLOW_CALL_SECONDS', 8)),
+                open_seconds=float(config.get('EXTERNAL_MYSQL_BREAKER_OPEN_SECONDS', 30)),
+            )
+        return self._breaker
+
     @contextmanager
     def connection(self, database: str):
-        conn = self._acquire_connection(database)
+        breaker = self.breaker
+        if not breaker.allow_request():
+            raise ExternalDataUnavailableError('外部数据源熔断中，请稍后重试')
+
+        started = time.monotonic()
+        conn = None
+        recorded = False
         try:
-            yield conn
-        except Exception:
-            self._close_connection(conn)
-            raise
+            try:
+                conn = self._acquire_connection(database)
+            except (pymysql.MySQLError, OSError) as exc:
+                recorded = True
+                breaker.record_failure()
+                raise ExternalDataUnavailableError(f'外部数据源连接失败: {exc}') from exc
+
+            try:
+                yield conn
+            except (pymysql.MySQLError, OSError):
+                self._close_connection(conn)
+                recorded = True
+                breaker.record_failure()
+                raise
+            except Exception:
+                # 非数据库异常（调用方数据处理出错）不计入熔断
+                self._close_connection(conn)
+                recorded = True
+                breaker.record_success(time.monotonic() - started)
+                raise
+            except BaseException:
+                self._close_connection(conn)
+                raise
+            else:
+                recorded = True
+                breaker.record_success(time.monotonic() - started)
         finally:
-            if getattr(conn, 'open', False):
+            if not recorded:
+                # 获取连接时的非数据库异常、GeneratorExit/KeyboardInterrupt 等：结果未知，释放探测名额
+                breaker.release_probe()
+            if conn is not None and getattr(conn, 'open', False):
                 self._release_connection(database, conn)
 
     def _pool_size(self) -> int:
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import json
 from collections import defaultdict
 from typing import Any, Dict, Iterable, List
 
+import pymysql
 from flask import current_app
 
-from .mysql56_client import external_mysql56_client
+from app.common.cache_service import CacheKeys
+from app.common.redis_client import redis_client
+
+from .mysql56_client import ExternalDataUnavailableError, external_mysql56_client
+from .stale_snapshot import stale_snapshot_writer
 
 
 class OptimizationRepository:
@@ -65,23 +71,99 @@ class OptimizationRepository:
         if not issue_ids and not requested_job_ids:
             return {}, []
 
-        with external_mysql56_client.connection(self._db_name()) as conn:
-            with conn.cursor() as cursor:
-                issue_rows = self._list_issues_with_cursor(cursor, issue_ids) if issue_ids else []
-                job_summaries = (
-                    self._build_job_summaries_with_cursor(cursor, requested_job_ids, include_outputs)
-                    if requested_job_ids
-                    else []
-                )
-        return {int(row['id']): self._format_issue_summary(row) for row in issue_rows}, job_summaries
+        try:
+            with external_mysql56_client.connection(self._db_name()) as conn:
+                with conn.cursor() as cursor:
+                    issue_rows = self._list_issues_with_cursor(cursor, issue_ids) if issue_ids else []
+                    job_summaries = (
+                        self._build_job_summaries_with_cursor(cursor, requested_job_ids, include_outputs)
+                        if requested_job_ids
+                        else []
+                    )
+        except (ExternalDataUnavailableError, pymysql.MySQLError, OSError) as exc:
+            return self._load_stale_summaries(issue_ids, requested_job_ids, exc)
+
+        issue_map = {int(row['id']): self._format_issue_summary(row) for row in issue_rows}
+        self._remember_summaries(issue_map.values(), job_summaries if include_outputs else [])
+        return issue_map, job_summaries
 
     def build_job_summaries(self, job_ids: Iterable[int], include_outputs: bool = True) -> List[Dict[str, Any]]:
         requested_job_ids = self._positive_ids(job_ids)
         if not requested_job_ids:
             return []
-        with external_mysql56_client.connection(self._db_name()) as conn:
-            with conn.cursor() as cursor:
-                return self._build_job_summaries_with_cursor(cursor, requested_job_ids, include_outputs)
+        return self.build_issue_and_job_summaries([], requested_job_ids, include_outputs)[1]
+
+    @staticmethod
+    def _stale_cache_ttl() -> int:
+        return int(current_app.config.get('EXTERNAL_RESULT_STALE_CACHE_TTL', 7 * 24 * 3600))
+
+    def _remember_summaries(
+        self,
+        issue_summaries: Iterable[Dict[str, Any]],
+        job_summaries: Iterable[Dict[str, Any]],
+    ) -> None:
+        """保存最近一次成功读取的结果快照，外部库不可用时兜底返回。
+
+        只缓存带输出的完整 job 摘要；序列化与写入交给后台线程，内容未变化时不重复写，
+        用 Flask JSON provider 序列化，保证 datetime/Decimal 与实时接口的输出格式一致。
+        """
+        ttl = self._stale_cache_ttl()
+        if ttl <= 0:
+            return
+        items = [(CacheKeys.opt_issue_summary(issue['id']), issue) for issue in issue_summaries]
+        items += [(CacheKeys.opt_job_summary(job['id']), job) for job in job_summaries]
+        stale_snapshot_writer.submit(
+            items, ttl, float(current_app.config.get('EXTERNAL_RESULT_STALE_CACHE_MIN_INTERVAL', 60))
+        )
+
+    @staticmethod
+    def _read_stale(key: str) -> Dict[str, Any] | None:
+        raw = redis_client.get(key)
+        if raw is None:
+            return None
+        try:
+            payload = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(payload, dict):
+            return None
+        payload['stale'] = True
+        return payload
+
+    def _load_stale_summaries(
+        self,
+        issue_ids: List[int],
+        job_ids: List[int],
+        exc: Exception,
+    ) -> tuple[Dict[int, Dict[str, Any]], List[Dict[str, Any]]]:
+        """外部库不可用时按快照返回；任一请求的 issue/job 没有快照时整体报错，不返回看似完整的部分结果"""
+        issue_map: Dict[int, Dict[str, Any]] = {}
+        missing_issue_ids: List[int] = []
+        for issue_id in issue_ids:
+            cached = self._read_stale(CacheKeys.opt_issue_summary(issue_id))
+            if cached is not None:
+                issue_map[issue_id] = cached
+            else:
+                missing_issue_ids.append(issue_id)
+        job_summaries: List[Dict[str, Any]] = []
+        missing_job_ids: List[int] = []
+        for job_id in job_ids:
+            cached = self._read_stale(CacheKeys.opt_job_summary(job_id))
+            if cached is not None:
+                job_summaries.append(cached)
+            else:
+                missing_job_ids.append(job_id)
+
+        if missing_issue_ids or missing_job_ids:
+            if not issue_map and not job_summaries and isinstance(exc, ExternalDataUnavailableError):
+                raise exc
+            raise ExternalDataUnavailableError(
+                f'外部数据源查询失败且缺少缓存结果 issues={missing_issue_ids} jobs={missing_job_ids}: {exc}'
+            ) from exc
+        current_app.logger.warning(
+            f'[external] union_opt_kernal 不可用，返回缓存结果 issues={len(issue_map)} jobs={len(job_summaries)}: {exc}'
+        )
+        return issue_map, job_summaries
 
     def _list_issues_with_cursor(self, cursor, issue_ids: List[int]) -> List[Dict[str, Any]]:
         placeholders = self._placeholders(issue_ids)
@@ -282,9 +364,31 @@ class OptimizationRepository:
             cursor,
             f"""
             SELECT id, task_id, resp_config_id, best_time, best_label, origin_value,
-                   final_value, curves_json_path, curves_png_path, cloud_png_path1,
-                   cloud_png_path2, avi_path1, avi_path2, start_time, end_time,
-                   s_errors, max_gif_x, max_gif_y
+                   final_value, start_time, end_time, s_errors,
+                   CASE
+                     WHEN COALESCE(curves_json_path, '') <> ''
+                       OR COALESCE(curves_png_path, '') <> ''
+                       OR COALESCE(cloud_png_path1, '') <> ''
+                       OR COALESCE(cloud_png_path2, '') <> ''
+                       OR COALESCE(avi_path1, '') <> ''
+                       OR COALESCE(avi_path2, '') <> ''
+                     THEN 1 ELSE 0
+                   END AS has_attachments
+            FROM post_data_save
+            WHERE task_id IN ({placeholders})
+            ORDER BY task_id ASC, resp_config_id ASC, id ASC
+            """,
+            schedule_ids,
+        )
+
+    def _list_post_data_attachments_with_cursor(self, cursor, schedule_ids: List[int]) -> List[Dict[str, Any]]:
+        placeholders = self._placeholders(schedule_ids)
+        return self._fetch_all(
+            cursor,
+            f"""
+            SELECT id, task_id, resp_config_id, origin_value, final_value,
+                   curves_json_path, curves_png_path, cloud_png_path1, cloud_png_path2,
+                   avi_path1, avi_path2, max_gif_x, max_gif_y
             FROM post_data_save
             WHERE task_id IN ({placeholders})
             ORDER BY task_id ASC, resp_config_id ASC, id ASC
@@ -571,28 +675,94 @@ class OptimizationRepository:
                 'finalValue': post_data.get('final_value') if post_data else None,
                 'bestTime': post_data.get('best_time') if post_data else None,
                 'bestLabel': post_data.get('best_label') if post_data else None,
+                'postDataId': post_data.get('id') if post_data else None,
+                'hasAttachments': bool(post_data.get('has_attachments')) if post_data else False,
+                'errors': post_data.get('s_errors') if post_data else (opt_data.get('s_errors') if opt_data else None),
+            }
+        )
+        return payload
+
+    def get_round_output_attachments(
+        self,
+        job_id: int,
+        circle_id: int,
+        condition_config_id: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        """按轮次（opt_circle）懒加载输出附件路径，仅查询单个轮次涉及的 post_data_save 行。"""
+        job_ids = self._positive_ids([job_id])
+        circle_ids = self._positive_ids([circle_id])
+        if not job_ids or not circle_ids:
+            return []
+
+        with external_mysql56_client.connection(self._db_name()) as conn:
+            with conn.cursor() as cursor:
+                circles = self._fetch_all(
+                    cursor,
+                    'SELECT n_id FROM opt_circle WHERE n_id = %s AND n_job_id = %s',
+                    [circle_ids[0], job_ids[0]],
+                )
+                if not circles:
+                    return []
+
+                condition_config_ids = self._positive_ids([condition_config_id or 0])
+                if not condition_config_ids:
+                    condition_config_ids = [
+                        int(row['n_id']) for row in self._list_condition_configs_with_cursor(cursor, job_ids)
+                    ]
+                if not condition_config_ids:
+                    return []
+
+                allowed_condition_config_ids = set(condition_config_ids)
+                opt_data_rows = [
+                    row
+                    for row in self._list_opt_data_with_cursor(cursor, circle_ids)
+                    if int(row['n_condition_config_id']) in allowed_condition_config_ids
+                ]
+                opt_data_ids = [int(row['id']) for row in opt_data_rows]
+                schedule_rows = self._list_post_schedule_with_cursor(cursor, opt_data_ids) if opt_data_ids else []
+                schedule_ids = [int(row['id']) for row in schedule_rows]
+                post_data_rows = (
+                    self._list_post_data_attachments_with_cursor(cursor, schedule_ids) if schedule_ids else []
+                )
+                resp_configs = self._list_resp_configs_with_cursor(cursor, condition_config_ids)
+
+        resp_config_by_id = {int(row['n_id']): row for row in resp_configs}
+        opt_data_by_id = {int(row['id']): row for row in opt_data_rows}
+        opt_data_id_by_schedule = {int(row['id']): int(row['opt_data_id']) for row in schedule_rows}
+
+        attachments: Dict[str, Dict[str, Any]] = {}
+        for post_data in post_data_rows:
+            resp_config_id = int(post_data['resp_config_id'])
+            resp_config = resp_config_by_id.get(resp_config_id)
+            if resp_config is None:
+                continue
+            resp_name = str(resp_config.get('s_name') or f'resp_{resp_config_id}')
+            opt_data = opt_data_by_id.get(opt_data_id_by_schedule.get(int(post_data['task_id']), 0)) or {}
+            attachments[resp_name] = {
+                'respName': resp_name,
+                'respConfigId': resp_config_id,
+                'conditionConfigId': resp_config.get('n_condition_config_id'),
+                'postDataId': post_data.get('id'),
                 'imagePaths': [
                     value
                     for value in (
-                        post_data.get('curves_png_path') if post_data else None,
-                        post_data.get('cloud_png_path1') if post_data else None,
-                        post_data.get('cloud_png_path2') if post_data else None,
+                        post_data.get('curves_png_path'),
+                        post_data.get('cloud_png_path1'),
+                        post_data.get('cloud_png_path2'),
                     )
                     if value
                 ],
-                'curveJsonPath': post_data.get('curves_json_path') if post_data else None,
-                'aviPaths': [
-                    value
-                    for value in (
-                        post_data.get('avi_path1') if post_data else None,
-                        post_data.get('avi_path2') if post_data else None,
-                    )
-                    if value
-                ],
-                'errors': post_data.get('s_errors') if post_data else (opt_data.get('s_errors') if opt_data else None),
+                'aviPaths': [value for value in (post_data.get('avi_path1'), post_data.get('avi_path2')) if value],
+                'curveJsonPath': post_data.get('curves_json_path'),
+                'maxGifX': post_data.get('max_gif_x'),
+                'maxGifY': post_data.get('max_gif_y'),
+                'dataDir': opt_data.get('data_dir'),
+                'taskId': opt_data.get('task_id'),
+                'optDataId': opt_data.get('id'),
+                'originValue': post_data.get('origin_value'),
+                'finalValue': post_data.get('final_value'),
             }
-        )
-        return payload
+        return list(attachments.values())
 
     @staticmethod
     def _first_running_module(opt_data_rows: List[Dict[str, Any]]) -> str | None:
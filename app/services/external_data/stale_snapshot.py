@@ -0,0 +1,103 @@
+"""外部结果兜底快照的后台写入。
+
+请求线程只把本次读到的摘要放入有界队列，序列化与 Redis 写入在后台线程完成；
+内容未变化时不重复写（TTL 过半时续期），内容变化的 key 也按最短间隔限流。
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+
+from app.common.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# 快照中不保存的字段：serverModules 为全局模块配置（每个 job 重复一份），inputJson 与本地订单 input_json 重复
+STALE_SNAPSHOT_EXCLUDED_FIELDS = ('serverModules', 'inputJson')
+
+
+class StaleSnapshotWriter:
+    """后台快照写入线程（每进程一个，按需启动）"""
+
+    def __init__(self, max_pending: int = 64, max_tracked_keys: int = 10000) -> None:
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._max_tracked_keys = max_tracked_keys
+        # key -> (内容摘要, 写入时间)，用于跳过未变化的快照
+        self._written: OrderedDict[str, Tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, items: List[Tuple[str, Dict[str, Any]]], ttl: int, min_interval: float) -> bool:
+        """入队一批 (key, 摘要)；队列已满时丢弃本批（兜底快照允许滞后），返回是否入队"""
+        if not items or ttl <= 0:
+            return False
+        self._ensure_thread()
+        snapshot = [
+            (key, {name: value for name, value in payload.items() if name not in STALE_SNAPSHOT_EXCLUDED_FIELDS})
+            for key, payload in items
+        ]
+        try:
+            self._queue.put_nowait((current_app._get_current_object(), snapshot, ttl, min_interval))
+            return True
+        except queue.Full:
+            logger.debug('[external] stale snapshot queue full, dropping %d item(s)', len(snapshot))
+            return False
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='stale-snapshot-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            app, items, ttl, min_interval = self._queue.get()
+            try:
+                with app.app_context():
+                    self.write(items, ttl, min_interval)
+            except Exception as exc:
+                logger.warning(f'[external] stale snapshot write failed: {exc}')
+            finally:
+                self._queue.task_done()
+
+    def write(self, items: List[Tuple[str, Dict[str, Any]]], ttl: int, min_interval: float) -> int:
+        """写入变化的快照，返回实际写入条数（需在应用上下文中调用）"""
+        written = 0
+        now = time.time()
+        for key, payload in items:
+            body = current_app.json.dumps(payload)
+            digest = hashlib.sha1(body.encode('utf-8')).hexdigest()
+            previous = self._written.get(key)
+            if previous is not None:
+                previous_digest, written_at = previous
+                age = now - written_at
+                if previous_digest == digest and age < ttl / 2:
+                    continue
+                if previous_digest != digest and age < min_interval:
+                    continue
+            redis_client.set(key, current_app.json.dumps({**payload, 'cachedAt': int(now)}), ttl=ttl)
+            self._remember(key, digest, now)
+            written += 1
+        return written
+
+    def _remember(self, key: str, digest: str, written_at: float) -> None:
+        self._written[key] = (digest, written_at)
+        self._written.move_to_end(key)
+        while len(self._written) > self._max_tracked_keys:
+            self._written.popitem(last=False)
+
+    def join(self) -> None:
+        """等待已入队的快照写完（测试与进程退出前使用）"""
+        self._queue.join()
+
+
+stale_snapshot_writer = StaleSnapshotWriter()
@@ -6,6 +6,8 @@ from typing import Any, Dict, List, Optional
 import requests
 from flask import current_app
 
+from app.common.http_client import http_client
+
 
 class UserResourcePoolRepository:
     """按域账号读取用户可用资源池与默认资源池。"""
@@ -117,9 +119,13 @@ class UserResourcePoolRepository:
 
         try:
             if method == "POST":
-                response = requests.post(resource_url, json=payload, headers=headers, timeout=timeout)
+                response = http_client.post(
+                    'resource_pool', resource_url, json=payload, headers=headers, timeout=timeout
+                )
             else:
-                response = requests.get(resource_url, params=payload, headers=headers, timeout=timeout)
+                response = http_client.get(
+                    'resource_pool', resource_url, params=payload, headers=headers, timeout=timeout
+                )
         except requests.RequestException:
             return self._ensure_non_empty_result(self._mock_resource_pools())
 
@@ -48,6 +48,12 @@ class Config:
     EXTERNAL_MYSQL_READ_TIMEOUT = float(os.getenv('EXTERNAL_MYSQL_READ_TIMEOUT', 20))
     EXTERNAL_MYSQL_WRITE_TIMEOUT = float(os.getenv('EXTERNAL_MYSQL_WRITE_TIMEOUT', 20))
     EXTERNAL_MYSQL_POOL_SIZE = int(os.getenv('EXTERNAL_MYSQL_POOL_SIZE', 4))
+    EXTERNAL_MYSQL_BREAKER_FAILURE_THRESHOLD = int(os.getenv('EXTERNAL_MYSQL_BREAKER_FAILURE_THRESHOLD', 5))
+    EXTERNAL_MYSQL_BREAKER_SLOW_CALL_SECONDS = float(os.getenv('EXTERNAL_MYSQL_BREAKER_SLOW_CALL_SECONDS', 8))
+    EXTERNAL_MYSQL_BREAKER_OPEN_SECONDS = float(os.getenv('EXTERNAL_MYSQL_BREAKER_OPEN_SECONDS', 30))
+    EXTERNAL_RESULT_STALE_CACHE_TTL = int(os.getenv('EXTERNAL_RESULT_STALE_CACHE_TTL', 7 * 24 * 3600))
+    # 同一 job/issue 快照内容变化时的最短写入间隔（秒），未变化的快照只在 TTL 过半时续期
+    EXTERNAL_RESULT_STALE_CACHE_MIN_INTERVAL = float(os.getenv('EXTERNAL_RESULT_STALE_CACHE_MIN_INTERVAL', 60))
     EXTERNAL_MYSQL_SCHEMA_SIMULATION_PROJECT = os.getenv(
         'EXTERNAL_MYSQL_SCHEMA_SIMULATION_PROJECT', 'simulation_project'
     )
@@ -69,6 +75,25 @@ class Config:
     AUTOMATION_MOCK_WRITE_UNION_OPT = (
         os.getenv('AUTOMATION_MOCK_WRITE_UNION_OPT', 'false').lower() == 'true'
     )
+    AUTOMATION_OUTBOX_WORKER_ENABLED = (
+        os.getenv('AUTOMATION_OUTBOX_WORKER_ENABLED', 'true').lower() == 'true'
+    )
+    AUTOMATION_OUTBOX_POLL_SECONDS = float(os.getenv('AUTOMATION_OUTBOX_POLL_SECONDS', 2.0))
+    AUTOMATION_OUTBOX_BATCH_SIZE = int(os.getenv('AUTOMATION_OUTBOX_BATCH_SIZE', 20))
+    AUTOMATION_OUTBOX_MAX_WORKERS = int(os.getenv('AUTOMATION_OUTBOX_MAX_WORKERS', 4))
+    AUTOMATION_OUTBOX_MAX_ATTEMPTS = int(os.getenv('AUTOMATION_OUTBOX_MAX_ATTEMPTS', 5))
+    AUTOMATION_OUTBOX_RETRY_BASE_SECONDS = float(os.getenv('AUTOMATION_OUTBOX_RETRY_BASE_SECONDS', 5.0))
+    # 认领租约下限；实际租约按批大小、并发数与分发超时（含重试）推算，取两者较大值
+    AUTOMATION_OUTBOX_LEASE_SECONDS = int(os.getenv('AUTOMATION_OUTBOX_LEASE_SECONDS', 120))
+
+    # 出站 HTTP（公司认证 / 资源池 / 自动化分发共用连接池）
+    OUTBOUND_HTTP_POOL_CONNECTIONS = int(os.getenv('OUTBOUND_HTTP_POOL_CONNECTIONS', 10))
+    OUTBOUND_HTTP_POOL_MAXSIZE = int(os.getenv('OUTBOUND_HTTP_POOL_MAXSIZE', 20))
+    OUTBOUND_HTTP_RETRIES = int(os.getenv('OUTBOUND_HTTP_RETRIES', 2))
+    OUTBOUND_HTTP_BACKOFF_FACTOR = float(os.getenv('OUTBOUND_HTTP_BACKOFF_FACTOR', 0.2))
+    OUTBOUND_HTTP_CONNECT_TIMEOUT = float(os.getenv('OUTBOUND_HTTP_CONNECT_TIMEOUT', 3.0))
+    OUTBOUND_HTTP_DEFAULT_TIMEOUT = float(os.getenv('OUTBOUND_HTTP_DEFAULT_TIMEOUT', 10.0))
+    OUTBOUND_HTTP_SLOW_CALL_SECONDS = float(os.getenv('OUTBOUND_HTTP_SLOW_CALL_SECONDS', 2.0))
 
     # Redis
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
@@ -77,6 +102,8 @@ class Config:
     REDIS_PASSWORD = os.getenv('REDIS_PASSWORD', None) or None
     REDIS_KEY_PREFIX = os.getenv('REDIS_KEY_PREFIX', 'structsim:')
     REDIS_DEFAULT_TTL = int(os.getenv('REDIS_DEFAULT_TTL', 3600))
+    RESULTS_ROUND_TOTAL_CACHE_TTL = int(os.getenv('RESULTS_ROUND_TOTAL_CACHE_TTL', 60))
+    ORDERS_COUNT_CACHE_TTL = int(os.getenv('ORDERS_COUNT_CACHE_TTL', 30))
 
     # 登录/认证配置
     AUTH_ENABLE_SSO = os.getenv('AUTH_ENABLE_SSO', 'false').lower() == 'true'
@@ -137,6 +164,39 @@ class Config:
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', './storage')
     MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', 4294967296))  # 4GB
     CHUNK_SIZE = int(os.getenv('CHUNK_SIZE', 5242880))  # 5MB
+    # 分片直接按偏移写入预分配的目标文件，合并只做重命名（不支持 os.pwrite 的平台自动退回分片文件模式）
+    UPLOAD_POSITIONAL_WRITES = os.getenv('UPLOAD_POSITIONAL_WRITES', 'true').lower() == 'true'
+    # 已接收分片位图在 Redis 中累计，每 N 个新分片落库一次（收齐时总会落库）
+    UPLOAD_BITMAP_FLUSH_CHUNKS = int(os.getenv('UPLOAD_BITMAP_FLUSH_CHUNKS', 16))
+    # positional 合并时本进程剩余待补算字节超过该值则转入后台校验（状态 verifying，客户端轮询 /upload/status）
+    UPLOAD_INLINE_VERIFY_BYTES = int(os.getenv('UPLOAD_INLINE_VERIFY_BYTES', 64 * 1024 * 1024))
+    # verifying 超过该时长未完成（进程退出等）时，再次合并请求会重新发起校验
+    UPLOAD_VERIFY_STALE_SECONDS = int(os.getenv('UPLOAD_VERIFY_STALE_SECONDS', 1800))
+    # 复用他人已上传内容（秒传）时持有证明挑战的有效期（秒）
+    UPLOAD_CLAIM_CHALLENGE_TTL = int(os.getenv('UPLOAD_CLAIM_CHALLENGE_TTL', 300))
+    # 过期上传清理：进程内定时线程默认关闭（多实例时只在一个实例开启，或用 scripts/purge_expired_uploads.py）
+    UPLOAD_JANITOR_ENABLED = os.getenv('UPLOAD_JANITOR_ENABLED', 'false').lower() == 'true'
+    UPLOAD_JANITOR_INTERVAL_SECONDS = int(os.getenv('UPLOAD_JANITOR_INTERVAL_SECONDS', 3600))
+    UPLOAD_JANITOR_BATCH_SIZE = int(os.getenv('UPLOAD_JANITOR_BATCH_SIZE', 200))
+    # 无对应上传中会话的分片目录/预分配文件，最后修改超过该时长才视为孤儿
+    UPLOAD_ORPHAN_GRACE_SECONDS = int(os.getenv('UPLOAD_ORPHAN_GRACE_SECONDS', 3600))
+    # DOE 矩阵行数达到该值时按列式二进制文件外置（{UPLOAD_FOLDER}/doe/matrices），参数组/订单只保留引用
+    DOE_MATRIX_EXTERNAL_MIN_ROWS = int(os.getenv('DOE_MATRIX_EXTERNAL_MIN_ROWS', 200))
+    # CPU 密集解析（Excel/CSV、INP set 提取）提交到进程池；在途任务超过 workers + max_pending 时直接拒绝
+    CPU_POOL_ENABLED = os.getenv('CPU_POOL_ENABLED', 'true').lower() == 'true'
+    CPU_POOL_WORKERS = int(os.getenv('CPU_POOL_WORKERS', 0))  # 0 表示 max(1, CPU 核数 // GUNICORN_WORKERS)
+    # 与 gunicorn_conf.py 的 workers 取值一致，用于均分进程池大小
+    GUNICORN_WORKERS = max(2, int(os.getenv('GUNICORN_WORKERS', os.cpu_count() or 1)))
+    CPU_POOL_MAX_PENDING = int(os.getenv('CPU_POOL_MAX_PENDING', 8))
+    CPU_POOL_TASK_TIMEOUT = float(os.getenv('CPU_POOL_TASK_TIMEOUT', 60))
+    # 子进程执行 N 个任务后重建，回收解析大文件留下的内存碎片（0 表示不限）
+    CPU_POOL_MAX_TASKS_PER_CHILD = int(os.getenv('CPU_POOL_MAX_TASKS_PER_CHILD', 200))
+    # INP set 提取：超过该大小的文件按行边界分段并行扫描；结果按 (路径, 大小, mtime) 缓存（Redis + {UPLOAD_FOLDER}/.cache/inp_sets）
+    INP_SCAN_PARALLEL_MIN_BYTES = int(os.getenv('INP_SCAN_PARALLEL_MIN_BYTES', 64 * 1024 * 1024))
+    INP_SETS_CACHE_TTL = int(os.getenv('INP_SETS_CACHE_TTL', 7 * 24 * 3600))
+    # 文件下载交给前置 nginx：internal location 前缀与其对应的磁盘根目录（均配置时返回 X-Accel-Redirect）
+    DOWNLOAD_ACCEL_PREFIX = os.getenv('DOWNLOAD_ACCEL_PREFIX', '')
+    DOWNLOAD_ACCEL_ROOT = os.getenv('DOWNLOAD_ACCEL_ROOT', '')
 
 
 class DevelopmentConfig(Config):
@@ -156,6 +216,7 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SQLALCHEMY_BINDS = {}
+    CPU_POOL_ENABLED = False
 
 
 config = {
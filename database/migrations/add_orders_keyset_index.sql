@@ -0,0 +1,5 @@
+-- 订单列表 keyset 分页索引
+-- 目的：列表按 (created_at DESC, id DESC) 游标翻页，避免深分页 OFFSET 扫描
+-- 执行时间: 2026-10-19
+
+CREATE INDEX idx_orders_created_id ON orders(created_at, id);
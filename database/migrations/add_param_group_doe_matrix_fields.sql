@@ -0,0 +1,30 @@
+-- 参数组合 DOE 矩阵外置为列式二进制文件，行内只保留矩阵ID与行数
+-- 兼容低版本MySQL（不依赖 ADD COLUMN IF NOT EXISTS）
+-- 说明：历史行的 doe_file_data 保持不变，下次保存时外置
+-- 执行时间: 2026-10-19
+
+SET @schema_name = DATABASE();
+
+SET @sql = IF(
+  EXISTS(
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = @schema_name AND table_name = 'param_groups' AND column_name = 'doe_matrix_id'
+  ),
+  'SELECT 1',
+  "ALTER TABLE `param_groups` ADD COLUMN `doe_matrix_id` VARCHAR(64) NULL COMMENT '外置DOE矩阵ID（列式文件内容 sha256）' AFTER `doe_file_data`"
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @sql = IF(
+  EXISTS(
+    SELECT 1 FROM information_schema.columns
+    WHERE table_schema = @schema_name AND table_name = 'param_groups' AND column_name = 'doe_row_count'
+  ),
+  'SELECT 1',
+  "ALTER TABLE `param_groups` ADD COLUMN `doe_row_count` INT NULL COMMENT 'DOE矩阵行数' AFTER `doe_matrix_id`"
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,5 @@
+-- 轮次表 keyset 分页索引
+-- 目的：按状态筛选的轮次列表走 (sim_type_result_id, status, round_index) 顺序扫描，避免深分页 OFFSET 回表
+-- 执行时间: 2026-10-19
+
+CREATE INDEX idx_simresult_status_round ON rounds(sim_type_result_id, status, round_index);
@@ -0,0 +1,19 @@
+-- 仿真类型结果轮次计数器
+-- 目的：统计信息改为主键读取，不再每次对 rounds 做 GROUP BY；round_status_counts 为空时由后端首次读取时回填
+-- 执行时间: 2026-10-19
+
+ALTER TABLE sim_type_results
+  ADD COLUMN round_status_counts JSON NULL COMMENT '各状态轮次数 {status: count}，增量维护';
+
+UPDATE sim_type_results s
+LEFT JOIN (
+  SELECT sim_type_result_id,
+         COUNT(*) AS total_rounds,
+         SUM(CASE WHEN status = 2 THEN 1 ELSE 0 END) AS completed_rounds,
+         SUM(CASE WHEN status = 3 THEN 1 ELSE 0 END) AS failed_rounds
+  FROM rounds
+  GROUP BY sim_type_result_id
+) r ON r.sim_type_result_id = s.id
+SET s.total_rounds = COALESCE(r.total_rounds, 0),
+    s.completed_rounds = COALESCE(r.completed_rounds, 0),
+    s.failed_rounds = COALESCE(r.failed_rounds, 0);
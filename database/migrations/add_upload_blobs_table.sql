@@ -0,0 +1,14 @@
+-- 上传内容块表迁移
+-- 目的：同一文件哈希跨用户只存一份，上传记录硬链接到 blobs/ab/cd/<hash> 并按引用数回收
+-- 说明：迁移前已完成的上传文件不回填，新合并或秒传的文件才登记
+-- 执行时间: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS `upload_blobs` (
+  `file_hash` VARCHAR(64) NOT NULL COMMENT '文件SHA-256哈希',
+  `storage_path` VARCHAR(500) NOT NULL COMMENT '块存储路径(相对存储根目录)',
+  `file_size` BIGINT NOT NULL COMMENT '文件大小(字节)',
+  `ref_count` INT NOT NULL DEFAULT 0 COMMENT '引用该块的已完成上传记录数',
+  `created_at` INT NOT NULL,
+  `updated_at` INT NOT NULL,
+  PRIMARY KEY (`file_hash`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='上传内容块表';
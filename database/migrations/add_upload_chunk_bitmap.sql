@@ -0,0 +1,7 @@
+-- 上传分片位图迁移
+-- 目的：已接收分片改为位图记录（Redis SETBIT 为主、此列持久化兜底），不再逐分片写 upload_chunks
+-- 说明：upload_chunks 保留，仅用于读取迁移前创建的上传会话
+-- 执行时间: 2026-10-19
+
+ALTER TABLE `upload_files`
+  ADD COLUMN `chunk_bitmap` VARBINARY(8192) DEFAULT NULL COMMENT '已接收分片位图(与 Redis SETBIT 位序一致)' AFTER `total_chunks`;
@@ -0,0 +1,56 @@
+"""
+automation_outbox 升级脚本。
+只建表；历史订单已同步提交，无需回填。
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import create_engine, inspect, text
+
+
+AUTOMATION_OUTBOX_TABLE_SQL = """
+CREATE TABLE automation_outbox (
+  id INT NOT NULL AUTO_INCREMENT,
+  order_id BIGINT NOT NULL,
+  order_case_id BIGINT NOT NULL,
+  status VARCHAR(16) NOT NULL DEFAULT 'pending' COMMENT 'pending/processing/done/failed',
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at INT NOT NULL DEFAULT 0 COMMENT '下次可投递时间（秒级时间戳）',
+  locked_until INT NOT NULL DEFAULT 0 COMMENT '处理中租约到期时间',
+  last_error TEXT,
+  created_at INT DEFAULT NULL,
+  updated_at INT DEFAULT NULL,
+  PRIMARY KEY (id),
+  KEY ix_automation_outbox_order_id (order_id),
+  KEY idx_automation_outbox_due (status, next_attempt_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='自动化提交 outbox'
+"""
+
+
+def upgrade_automation_outbox_schema(db_url: str, verbose: bool = True) -> None:
+    engine = create_engine(db_url)
+    if verbose:
+        print(f'[automation-outbox-upgrade] start: {db_url}')
+
+    with engine.connect() as conn:
+        inspector = inspect(engine)
+        if 'automation_outbox' not in set(inspector.get_table_names()):
+            conn.execute(text(AUTOMATION_OUTBOX_TABLE_SQL))
+        conn.commit()
+
+    if verbose:
+        print('[automation-outbox-upgrade] done')
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='创建 automation_outbox 表')
+    parser.add_argument('--db-url', default=os.getenv('DATABASE_URL'), help='数据库连接 URL')
+    args = parser.parse_args()
+
+    if not args.db_url:
+        raise SystemExit('错误: 缺少 --db-url 或 DATABASE_URL')
+
+    upgrade_automation_outbox_schema(args.db_url, verbose=True)
@@ -0,0 +1,115 @@
+"""
+orders 检索升级脚本。
+增加 search_text 字段（备注 + 工况概览）并建立 ngram 全文索引，不添加外键。
+"""
+
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import create_engine, inspect, text
+
+
+FULLTEXT_INDEX_NAME = 'ft_orders_search_text'
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _table_exists(inspector, table_name: str) -> bool:
+    return table_name in set(inspector.get_table_names())
+
+
+def _column_names(inspector, table_name: str) -> set[str]:
+    return {col.get('name') for col in inspector.get_columns(table_name)}
+
+
+def _index_names(inspector, table_name: str) -> set[str]:
+    try:
+        return {idx.get('name') for idx in inspector.get_indexes(table_name) if idx.get('name')}
+    except Exception:
+        return set()
+
+
+def build_search_text(remark, condition_summary) -> str:
+    """与 OrdersRepository.build_search_text 保持一致。"""
+    if isinstance(condition_summary, str):
+        try:
+            condition_summary = json.loads(condition_summary)
+        except ValueError:
+            condition_summary = None
+    parts = [str(remark or '').strip()]
+    if isinstance(condition_summary, dict):
+        for fold_name, sim_names in condition_summary.items():
+            parts.append(str(fold_name))
+            if isinstance(sim_names, list):
+                parts.extend(str(name) for name in sim_names)
+    return ' '.join(part for part in parts if part)
+
+
+def upgrade_order_search_schema(db_url: str, verbose: bool = True) -> None:
+    engine = create_engine(db_url)
+    if verbose:
+        print(f'[order-search-upgrade] start: {db_url}')
+
+    with engine.connect() as conn:
+        inspector = inspect(engine)
+        if not _table_exists(inspector, 'orders'):
+            if verbose:
+                print('[order-search-upgrade] skip: orders table not found')
+            return
+
+        columns = _column_names(inspector, 'orders')
+        if 'search_text' not in columns:
+            conn.execute(
+                text("ALTER TABLE orders ADD COLUMN search_text TEXT NULL COMMENT '检索文本（备注+工况概览）'")
+            )
+            has_summary = 'condition_summary' in columns
+            last_id = 0
+            while True:
+                rows = conn.execute(
+                    text(
+                        f"SELECT id, remark, {'condition_summary' if has_summary else 'NULL'} "
+                        'FROM orders WHERE id > :last_id ORDER BY id ASC LIMIT :limit'
+                    ),
+                    {'last_id': last_id, 'limit': BACKFILL_BATCH_SIZE},
+                ).fetchall()
+                if not rows:
+                    break
+                conn.execute(
+                    text('UPDATE orders SET search_text = :search_text WHERE id = :id'),
+                    [
+                        {'id': int(row[0]), 'search_text': build_search_text(row[1], row[2])}
+                        for row in rows
+                    ],
+                )
+                last_id = int(rows[-1][0])
+
+        inspector = inspect(engine)
+        indexes = _index_names(inspector, 'orders')
+        if FULLTEXT_INDEX_NAME not in indexes:
+            try:
+                conn.execute(
+                    text(f'CREATE FULLTEXT INDEX {FULLTEXT_INDEX_NAME} ON orders(search_text) WITH PARSER ngram')
+                )
+            except Exception as exc:
+                # MySQL < 5.7.6 没有 ngram 解析器；默认分词无法匹配中文与子串，不建索引，检索继续走 LIKE
+                if verbose:
+                    print(f'[order-search-upgrade] ngram parser unavailable, skip fulltext index: {exc}')
+
+        conn.commit()
+
+    if verbose:
+        print('[order-search-upgrade] done')
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='升级 orders 检索字段与全文索引')
+    parser.add_argument('--db-url', default=os.getenv('DATABASE_URL'), help='数据库连接 URL')
+    args = parser.parse_args()
+
+    if not args.db_url:
+        raise SystemExit('错误: 缺少 --db-url 或 DATABASE_URL')
+
+    upgrade_order_search_schema(args.db_url, verbose=True)
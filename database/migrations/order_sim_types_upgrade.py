@@ -0,0 +1,109 @@
+"""
+order_sim_types 关联表升级脚本。
+建表后按 orders.sim_type_ids 回填，不添加外键。
+"""
+
+from __future__ import annotations
+
+import json
+
+from sqlalchemy import create_engine, inspect, text
+
+
+ORDER_SIM_TYPES_TABLE_SQL = """
+CREATE TABLE order_sim_types (
+  order_id INT NOT NULL COMMENT '订单ID',
+  sim_type_id INT NOT NULL COMMENT '仿真类型ID',
+  PRIMARY KEY (order_id, sim_type_id),
+  KEY idx_order_sim_types_sim_type (sim_type_id, order_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='订单-仿真类型关联表'
+"""
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _table_exists(inspector, table_name: str) -> bool:
+    return table_name in set(inspector.get_table_names())
+
+
+def _parse_sim_type_ids(value) -> list[int]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    if not isinstance(value, list):
+        return []
+    ids: list[int] = []
+    for item in value:
+        try:
+            sim_type_id = int(item)
+        except (TypeError, ValueError):
+            continue
+        if sim_type_id > 0 and sim_type_id not in ids:
+            ids.append(sim_type_id)
+    return ids
+
+
+def upgrade_order_sim_types_schema(db_url: str, verbose: bool = True) -> None:
+    engine = create_engine(db_url)
+    if verbose:
+        print(f'[order-sim-types-upgrade] start: {db_url}')
+
+    with engine.connect() as conn:
+        inspector = inspect(engine)
+        if not _table_exists(inspector, 'orders'):
+            if verbose:
+                print('[order-sim-types-upgrade] skip: orders table not found')
+            return
+
+        if not _table_exists(inspector, 'order_sim_types'):
+            conn.execute(text(ORDER_SIM_TYPES_TABLE_SQL))
+
+        existing = conn.execute(text('SELECT COUNT(*) FROM order_sim_types')).scalar() or 0
+        if existing == 0:
+            last_id = 0
+            inserted = 0
+            while True:
+                rows = conn.execute(
+                    text(
+                        'SELECT id, sim_type_ids FROM orders '
+                        'WHERE id > :last_id ORDER BY id ASC LIMIT :limit'
+                    ),
+                    {'last_id': last_id, 'limit': BACKFILL_BATCH_SIZE},
+                ).fetchall()
+                if not rows:
+                    break
+                values = [
+                    {'order_id': int(row[0]), 'sim_type_id': sim_type_id}
+                    for row in rows
+                    for sim_type_id in _parse_sim_type_ids(row[1])
+                ]
+                if values:
+                    conn.execute(
+                        text('INSERT INTO order_sim_types (order_id, sim_type_id) VALUES (:order_id, :sim_type_id)'),
+                        values,
+                    )
+                    inserted += len(values)
+                last_id = int(rows[-1][0])
+            if verbose:
+                print(f'[order-sim-types-upgrade] backfilled rows: {inserted}')
+
+        conn.commit()
+
+    if verbose:
+        print('[order-sim-types-upgrade] done')
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='创建并回填 order_sim_types 关联表')
+    parser.add_argument('--db-url', default=os.getenv('DATABASE_URL'), help='数据库连接 URL')
+    args = parser.parse_args()
+
+    if not args.db_url:
+        raise SystemExit('错误: 缺少 --db-url 或 DATABASE_URL')
+
+    upgrade_order_sim_types_schema(args.db_url, verbose=True)
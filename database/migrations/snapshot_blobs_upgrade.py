@@ -0,0 +1,131 @@
+"""
+snapshot_blobs 升级脚本。
+- 创建内容寻址快照块表；
+- --backfill 时把历史 case_condition_opti.condition_snapshot 的大字段外置为 hash 引用。
+规范化 / 压缩方式必须与 app/models/snapshot.py 保持一致。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+
+from sqlalchemy import create_engine, inspect, text
+
+
+SNAPSHOT_BLOB_FIELDS = ('params', 'globalParams', 'output', 'solver')
+SNAPSHOT_REFS_KEY = '$refs'
+BACKFILL_BATCH_SIZE = 500
+
+SNAPSHOT_BLOBS_TABLE_SQL = """
+CREATE TABLE snapshot_blobs (
+  hash VARCHAR(64) NOT NULL COMMENT '规范化 JSON 的 sha256',
+  payload MEDIUMBLOB NOT NULL COMMENT 'zlib 压缩的规范化 JSON',
+  raw_size INT NOT NULL DEFAULT 0 COMMENT '压缩前字节数',
+  created_at INT DEFAULT NULL,
+  PRIMARY KEY (hash)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='内容寻址快照块'
+"""
+
+
+def _canonical_json(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _dehydrate(snapshot: dict, blobs: dict) -> dict | None:
+    if not isinstance(snapshot, dict) or SNAPSHOT_REFS_KEY in snapshot:
+        return None
+    stored = dict(snapshot)
+    refs = {}
+    for field in SNAPSHOT_BLOB_FIELDS:
+        value = stored.get(field)
+        if isinstance(value, (dict, list)) and value:
+            data = _canonical_json(stored.pop(field))
+            digest = hashlib.sha256(data).hexdigest()
+            blobs[digest] = data
+            refs[field] = digest
+    if not refs:
+        return None
+    stored[SNAPSHOT_REFS_KEY] = refs
+    return stored
+
+
+def _backfill(conn, verbose: bool) -> int:
+    converted = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            text(
+                'SELECT id, condition_snapshot FROM case_condition_opti '
+                'WHERE id > :last_id ORDER BY id LIMIT :limit'
+            ),
+            {'last_id': last_id, 'limit': BACKFILL_BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        blobs: dict = {}
+        updates = []
+        for row_id, raw in rows:
+            snapshot = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+            stored = _dehydrate(snapshot, blobs)
+            if stored is not None:
+                updates.append({'id': row_id, 'snapshot': json.dumps(stored, ensure_ascii=False)})
+
+        if blobs:
+            conn.execute(
+                text(
+                    'INSERT IGNORE INTO snapshot_blobs (hash, payload, raw_size, created_at) '
+                    'VALUES (:hash, :payload, :raw_size, UNIX_TIMESTAMP())'
+                ),
+                [
+                    {'hash': digest, 'payload': zlib.compress(data, 6), 'raw_size': len(data)}
+                    for digest, data in blobs.items()
+                ],
+            )
+        if updates:
+            conn.execute(
+                text('UPDATE case_condition_opti SET condition_snapshot = :snapshot WHERE id = :id'),
+                updates,
+            )
+        conn.commit()
+        converted += len(updates)
+        if verbose:
+            print(f'[snapshot-blobs-upgrade] backfilled up to id={last_id}, converted={converted}')
+    return converted
+
+
+def upgrade_snapshot_blobs_schema(db_url: str, verbose: bool = True, backfill: bool = False) -> None:
+    engine = create_engine(db_url)
+    if verbose:
+        print(f'[snapshot-blobs-upgrade] start: {db_url}')
+
+    with engine.connect() as conn:
+        inspector = inspect(engine)
+        table_names = set(inspector.get_table_names())
+        if 'snapshot_blobs' not in table_names:
+            conn.execute(text(SNAPSHOT_BLOBS_TABLE_SQL))
+        conn.commit()
+
+        if backfill and 'case_condition_opti' in table_names:
+            _backfill(conn, verbose)
+
+    if verbose:
+        print('[snapshot-blobs-upgrade] done')
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='创建 snapshot_blobs 表并可选外置历史工况快照')
+    parser.add_argument('--db-url', default=os.getenv('DATABASE_URL'), help='数据库连接 URL')
+    parser.add_argument('--backfill', action='store_true', help='外置历史 case_condition_opti 快照大字段')
+    args = parser.parse_args()
+
+    if not args.db_url:
+        raise SystemExit('错误: 缺少 --db-url 或 DATABASE_URL')
+
+    upgrade_snapshot_blobs_schema(args.db_url, verbose=True, backfill=args.backfill)
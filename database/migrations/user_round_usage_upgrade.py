@@ -0,0 +1,50 @@
+"""
+user_daily_round_usage 升级脚本。
+只建表，计数在首次查询当天用量时由后端按当日订单回填。
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import create_engine, inspect, text
+
+
+USER_DAILY_ROUND_USAGE_TABLE_SQL = """
+CREATE TABLE user_daily_round_usage (
+  id INT NOT NULL AUTO_INCREMENT,
+  domain_account VARCHAR(32) NOT NULL COMMENT '提交用户域账号',
+  usage_date INT NOT NULL COMMENT '日期 YYYYMMDD（服务器本地时区）',
+  used_rounds INT NOT NULL DEFAULT 0 COMMENT '当日已用轮次',
+  updated_at INT DEFAULT NULL,
+  PRIMARY KEY (id),
+  UNIQUE KEY uk_user_daily_round_usage (domain_account, usage_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户每日已用轮次计数'
+"""
+
+
+def upgrade_user_round_usage_schema(db_url: str, verbose: bool = True) -> None:
+    engine = create_engine(db_url)
+    if verbose:
+        print(f'[user-round-usage-upgrade] start: {db_url}')
+
+    with engine.connect() as conn:
+        inspector = inspect(engine)
+        if 'user_daily_round_usage' not in set(inspector.get_table_names()):
+            conn.execute(text(USER_DAILY_ROUND_USAGE_TABLE_SQL))
+        conn.commit()
+
+    if verbose:
+        print('[user-round-usage-upgrade] done')
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description='创建 user_daily_round_usage 表')
+    parser.add_argument('--db-url', default=os.getenv('DATABASE_URL'), help='数据库连接 URL')
+    args = parser.parse_args()
+
+    if not args.db_url:
+        raise SystemExit('错误: 缺少 --db-url 或 DATABASE_URL')
+
+    upgrade_user_round_usage_schema(args.db_url, verbose=True)
@@ -69,7 +69,7 @@ def main():
     os.environ['FLASK_ENV'] = args.env
     
     # Create application
-    app = create_app(args.env)
+    app = create_app(args.env, serving=not (args.init_db or args.seed))
     
     # Initialize database if requested
     if args.init_db:
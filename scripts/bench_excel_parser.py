@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from openpyxl import Workbook  # noqa: E402
+
+from app.api.v1.orders.excel_parser_service import excel_parser_service  # noqa: E402
+
+HEADER = ('参数键', '参数名', '值', '单位', '备注')
+
+
+def _rows(count: int):
+    for index in range(count):
+        yield (f'param_{index}', f' 参数{index % 500} ', index * 0.5, ('mm', 'MPa', 'N')[index % 3], '')
+
+
+def build_xlsx(count: int) -> bytes:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for row in _rows(count):
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def build_csv(count: int) -> bytes:
+    lines = [','.join(HEADER)]
+    lines.extend(','.join(str(value) for value in row) for row in _rows(count))
+    return '\n'.join(lines).encode('utf-8')
+
+
+class _NamedBytesIO(io.BytesIO):
+    def __init__(self, content: bytes, filename: str) -> None:
+        super().__init__(content)
+        self.filename = filename
+
+
+def measure(content: bytes, filename: str, batch_size: int) -> dict:
+    report = excel_parser_service._new_report()
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _batch in excel_parser_service.iter_param_batches(
+        _NamedBytesIO(content, filename), batch_size=batch_size, report=report,
+    ):
+        pass
+    elapsed = time.perf_counter() - started
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'file': filename,
+        'rows': report['rowCount'],
+        'seconds': round(elapsed, 3),
+        'rows_per_second': int(report['rowCount'] / elapsed) if elapsed else None,
+        'peak_memory_mb': round(peak / 1024 / 1024, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Measure throughput and peak memory of streaming parameter file parsing (xlsx and csv).',
+    )
+    parser.add_argument('--rows', type=int, default=100000, help='Data rows per generated file. Default: 100000.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per yielded batch. Default: 1000.')
+    args = parser.parse_args()
+
+    results = [
+        measure(build_xlsx(args.rows), 'bench.xlsx', args.batch_size),
+        measure(build_csv(args.rows), 'bench.csv', args.batch_size),
+    ]
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import create_app  # noqa: E402
+from app.api.v1.orders.inp_scanner import InpSetIndex, scan_inp_sets  # noqa: E402
+from app.common.cpu_pool import cpu_pool  # noqa: E402
+
+
+def build_inp(path: Path, size_mb: int) -> None:
+    """生成约 size_mb 的 INP：每个 part 含节点/单元数据块与若干 set 定义"""
+    target = size_mb * 1024 * 1024
+    with open(path, 'w', encoding='utf-8') as fp:
+        part = 0
+        while fp.tell() < target:
+            fp.write(f'** Part {part}\n*Part, name=PART-{part}\n*Node\n')
+            fp.writelines(f'{i}, {i * 0.1:.4f}, {i * 0.2:.4f}, {i * 0.3:.4f}\n' for i in range(1, 20001))
+            fp.write('*Element, type=C3D8R\n')
+            fp.writelines(f'{i}, {i}, {i + 1}, {i + 2}, {i + 3}, {i + 4}, {i + 5}, {i + 6}, {i + 7}\n'
+                          for i in range(1, 10001))
+            fp.write(f'*Elset, elset=ESET-{part}, generate\n1, 10000, 1\n*Nset, nset=NSET-{part}, generate\n'
+                     f'1, 20000, 1\n*End Part\n*Instance, name=INST-{part}, part=PART-{part}\n*End Instance\n')
+            part += 1
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, round(time.perf_counter() - started, 3)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure INP set extraction: serial scan, segmented scan, cache hit.')
+    parser.add_argument('--path', help='Existing INP file. Default: generate a synthetic one.')
+    parser.add_argument('--size-mb', type=int, default=200, help='Size of the generated file. Default: 200.')
+    parser.add_argument('--workers', type=int, default=4, help='Process pool workers. Default: 4.')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    with app.app_context(), tempfile.TemporaryDirectory() as work_dir:
+        path = Path(args.path) if args.path else Path(work_dir) / 'bench.inp'
+        if not args.path:
+            build_inp(path, args.size_mb)
+
+        serial, serial_seconds = _timed(scan_inp_sets, str(path))
+
+        cpu_pool.init_app(SimpleNamespace(config={
+            'CPU_POOL_ENABLED': True, 'CPU_POOL_WORKERS': args.workers,
+            'CPU_POOL_MAX_PENDING': args.workers, 'TESTING': False, 'SERVING': True,
+        }))
+        index = InpSetIndex(str(Path(work_dir) / 'cache'))
+        parallel, parallel_seconds = _timed(index.get, str(path))
+        cached, cached_seconds = _timed(index.get, str(path))
+        cpu_pool.shutdown()
+
+        print(json.dumps({
+            'file_mb': round(path.stat().st_size / 1024 / 1024, 1),
+            'sets': len(serial),
+            'serial_seconds': serial_seconds,
+            'parallel_seconds': parallel_seconds,
+            'cached_seconds': cached_seconds,
+            'consistent': serial == parallel == cached,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
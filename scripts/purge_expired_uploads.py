@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import create_app  # noqa: E402
+from app.api.v1.upload.service import upload_service  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Delete expired upload sessions, orphan chunk directories and stale upload_chunks rows.',
+    )
+    parser.add_argument(
+        '--config',
+        default=os.getenv('FLASK_ENV', 'development'),
+        help='Flask config name. Default: FLASK_ENV or development.',
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=None,
+        help='Sessions deleted per transaction. Default: UPLOAD_JANITOR_BATCH_SIZE.',
+    )
+    parser.add_argument(
+        '--orphan-grace-seconds',
+        type=int,
+        default=None,
+        help='Minimum age of a chunk directory without an active session. Default: UPLOAD_ORPHAN_GRACE_SECONDS.',
+    )
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    with app.app_context():
+        stats = upload_service.purge_expired(
+            batch_size=args.batch_size or int(app.config.get('UPLOAD_JANITOR_BATCH_SIZE', 200)),
+            orphan_grace_seconds=(
+                args.orphan_grace_seconds
+                if args.orphan_grace_seconds is not None
+                else int(app.config.get('UPLOAD_ORPHAN_GRACE_SECONDS', 3600))
+            ),
+        )
+
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
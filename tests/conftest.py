@@ -12,10 +12,11 @@ def app():
     app = create_app('testing')
     app.config.update(TESTING=True)
     with app.app_context():
-        db.create_all()
+        # 测试库只有默认 bind；其他用例创建的非测试 app 可能已注册 legacy_mysql 元数据
+        db.create_all(bind_key=None)
         yield app
         db.session.remove()
-        db.drop_all()
+        db.drop_all(bind_key=None)
 
 
 @pytest.fixture()
@@ -0,0 +1,83 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.common.cpu_pool import cpu_pool
+from app.common.errors import BusinessError
+
+
+@pytest.fixture()
+def pool(app):
+    cpu_pool.init_app(SimpleNamespace(config={
+        'CPU_POOL_ENABLED': True, 'CPU_POOL_WORKERS': 1, 'CPU_POOL_MAX_PENDING': 0, 'TESTING': True,
+    }))
+    yield cpu_pool
+    cpu_pool.init_app(app)
+
+
+def test_cpu_pool_runs_tasks_in_worker_process(pool, tmp_path):
+    import os
+    from app.api.v1.orders.service import OrdersService
+
+    inp = tmp_path / 'model.inp'
+    inp.write_text('*PART, NAME=P1\n*ELSET, ELSET=E1\n*NSET, NSET=N1\n*ELSET, ELSET=E1\n')
+    assert pool.run(OrdersService._parse_inp_sets, str(inp)) == [
+        {'type': 'component', 'name': 'P1'}, {'type': 'eleset', 'name': 'E1'}, {'type': 'nodeset', 'name': 'N1'},
+    ]
+    assert pool.run(os.getpid) != os.getpid()
+
+    with pytest.raises(BusinessError, match='超时'):
+        pool.run(time.sleep, 5, timeout=0.5)
+    assert pool.run(abs, -1) == 1
+
+    pool._in_flight = 1
+    with pytest.raises(BusinessError, match='繁忙'):
+        pool.run(abs, -1)
+    pool._in_flight = 0
+
+    stats = pool.snapshot()
+    assert (stats['completed'], stats['timeouts'], stats['rejected'], stats['inFlight']) == (3, 1, 1, 0)
+
+
+def test_inp_scanner_segments_and_cache(pool, app, tmp_path):
+    from app.api.v1.orders.inp_scanner import InpSetIndex, scan_inp_sets, split_inp_segments
+
+    lines = ['*Part, name=P1', '** *ELSET, ELSET=COMMENTED', '  *Elset, elset=E1, internal, instance=I1\r',
+             '*NSET,NSET = N1 , generate', '1, 2, 3', '*Instance, name=I1, part=P1', '*ELSETX, ELSET=NO']
+    lines += [f'{i}, {i}.0, 0.0' for i in range(2000)] + ['*Elset, elset=E1', '*NSET, NSET=N2']
+    inp = tmp_path / 'model.inp'
+    inp.write_bytes('\n'.join(lines).encode())
+    expected = [
+        {'type': 'component', 'name': 'P1'}, {'type': 'eleset', 'name': 'E1'}, {'type': 'nodeset', 'name': 'N1'},
+        {'type': 'component', 'name': 'I1'}, {'type': 'nodeset', 'name': 'N2'},
+    ]
+    assert scan_inp_sets(str(inp)) == expected
+    segments = split_inp_segments(str(inp), 4)
+    assert len(segments) == 4 and segments[0][0] == 0 and segments[-1][1] == inp.stat().st_size
+
+    app.config['INP_SCAN_PARALLEL_MIN_BYTES'] = 1024
+    pool._settings.update(workers=2, max_pending=2)
+    index = InpSetIndex(str(tmp_path / 'cache'))
+    completed = pool.snapshot()['completed']
+    assert index.get(str(inp)) == expected
+    assert pool.snapshot()['completed'] == completed + 2
+    assert index.get(str(inp)) == expected
+    assert pool.snapshot()['completed'] == completed + 2
+
+    inp.write_bytes(b'*NSET, NSET=ONLY\n')
+    assert index.get(str(inp)) == [{'type': 'nodeset', 'name': 'ONLY'}]
+
+
+def test_cpu_pool_splits_cores_and_warms_up_only_when_serving(app, monkeypatch):
+    warmed = []
+    monkeypatch.setattr('app.common.cpu_pool.os.cpu_count', lambda: 8)
+    monkeypatch.setattr(cpu_pool, 'warm_up', lambda: warmed.append(True))
+    try:
+        cpu_pool.init_app(SimpleNamespace(config={'CPU_POOL_ENABLED': True, 'GUNICORN_WORKERS': 4}))
+        assert cpu_pool.parallelism == 2 and not warmed
+        cpu_pool.init_app(SimpleNamespace(config={'CPU_POOL_ENABLED': True, 'GUNICORN_WORKERS': 16, 'SERVING': True}))
+        assert cpu_pool.parallelism == 1 and warmed == [True]
+    finally:
+        monkeypatch.undo()
+        cpu_pool.init_app(app)
@@ -0,0 +1,117 @@
+import importlib
+
+import pytest
+
+from app.services.external_data.circuit_breaker import CircuitBreaker
+from app.services.external_data.mysql56_client import ExternalDataUnavailableError
+
+optimization_repository_module = importlib.import_module('app.services.external_data.optimization_repository')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_and_probes_once():
+    clock = FakeClock()
+    breaker = CircuitBreaker('test', failure_threshold=2, slow_call_seconds=1, open_seconds=10, clock=clock)
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_success(elapsed_seconds=5)  # 慢调用按失败计
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 10
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # half_open 只放行一个探测
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record_success(elapsed_seconds=0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_half_open_probe_is_released_on_unexpected_error(app, monkeypatch):
+    from app.services.external_data.mysql56_client import ExternalMySQL56Client
+
+    clock = FakeClock()
+    client = ExternalMySQL56Client()
+    client._breaker = CircuitBreaker('test', failure_threshold=1, open_seconds=10, clock=clock)
+    client._breaker.record_failure()
+    clock.now = 10
+
+    def broken_acquire(database):
+        raise RuntimeError('config missing')
+
+    monkeypatch.setattr(client, '_acquire_connection', broken_acquire)
+    with pytest.raises(RuntimeError):
+        with client.connection('db'):
+            pass
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.breaker.allow_request()
+
+
+def test_job_summaries_fall_back_to_stale_cache(app, monkeypatch):
+    from app.services.external_data.stale_snapshot import stale_snapshot_writer
+
+    store = {}
+    writes = []
+    monkeypatch.setattr(optimization_repository_module.redis_client, 'get', lambda key: store.get(key))
+    monkeypatch.setattr(
+        optimization_repository_module.redis_client,
+        'set',
+        lambda key, value, ttl=None: writes.append(key) or store.__setitem__(key, value) or True,
+    )
+    repository = optimization_repository_module.optimization_repository
+    monkeypatch.setattr(
+        repository,
+        '_build_job_summaries_with_cursor',
+        lambda cursor, job_ids, include_outputs: [
+            {'id': job_id, 'status': 2, 'serverModules': [{'id': 1}]} for job_id in job_ids
+        ],
+    )
+
+    class FakeConnection:
+        def cursor(self):
+            return self
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(
+        optimization_repository_module.external_mysql56_client,
+        'connection',
+        lambda database: FakeConnection(),
+    )
+    _issues, jobs = repository.build_issue_and_job_summaries([], [7])
+    assert jobs == [{'id': 7, 'status': 2, 'serverModules': [{'id': 1}]}]
+    repository.build_issue_and_job_summaries([], [7])
+    stale_snapshot_writer.join()
+    assert len(writes) == 1  # 内容未变化的快照不重复写入
+
+    def unavailable(database):
+        raise ExternalDataUnavailableError()
+
+    monkeypatch.setattr(optimization_repository_module.external_mysql56_client, 'connection', unavailable)
+    _issues, jobs = repository.build_issue_and_job_summaries([], [7])
+    assert jobs[0]['id'] == 7
+    assert jobs[0]['stale'] is True
+    assert jobs[0]['cachedAt'] > 0
+    assert 'serverModules' not in jobs[0]
+
+    with pytest.raises(ExternalDataUnavailableError):
+        repository.build_issue_and_job_summaries([], [8])
+    with pytest.raises(ExternalDataUnavailableError, match=r'jobs=\[8\]'):
+        repository.build_issue_and_job_summaries([], [7, 8])
@@ -80,3 +80,49 @@ def test_cond_out_group_flow(client):
 
     delete_resp = client.delete(f'/api/v1/config/output-groups/{group_id}')
     assert delete_resp.get_json()['code'] == ErrorCode.SUCCESS
+
+
+def test_param_group_doe_matrix_stored_out_of_row(app, client, tmp_path, monkeypatch):
+    from app.api.v1.config.param_groups import service as param_group_service_module
+    from app.extensions import db
+    from app.models import ParamGroup
+
+    monkeypatch.setattr(param_group_service_module, 'DOE_GROUP_FILES_DIR', tmp_path / 'csv')
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), DOE_MATRIX_EXTERNAL_MIN_ROWS=3)
+    rows = [{'thickness': index, 'width': index * 0.5, 'label': f'r{index}'} for index in range(5)]
+    group_id = client.post('/api/v1/config/param-groups', json={
+        'name': 'DOE组合', 'algType': 5, 'doeFileHeads': ['thickness', 'width', 'label'], 'doeFileData': rows,
+    }).get_json()['data']['id']
+
+    group = db.session.get(ParamGroup, group_id)
+    assert group.doe_file_data is None and group.doe_row_count == 5
+    listed = next(item for item in client.get('/api/v1/config/param-groups').get_json()['data'] if item['id'] == group_id)
+    assert listed['doeFileData'] is None and listed['doeMatrixId'] == group.doe_matrix_id
+    detail = client.get(f'/api/v1/config/param-groups/{group_id}').get_json()['data']
+    assert detail['doeFileData'] is None
+    assert (detail['doeMatrixId'], detail['doeRowCount'], detail['doeColumns']) == (
+        group.doe_matrix_id, 5, ['label', 'thickness', 'width'])
+
+    page = client.get(f'/api/v1/config/param-groups/doe-matrices/{group.doe_matrix_id}?offset=3&limit=10')
+    page_data = page.get_json()['data']
+    assert (page_data['rowCount'], page_data['items']) == (5, rows[3:])
+    assert client.get('/api/v1/config/param-groups/doe-matrices/bad-id').status_code == 400
+
+    param_id = client.post('/api/v1/config/param-defs', json={
+        'name': 'DOE参数', 'key': 'thickness', 'min_val': 0, 'max_val': 3,
+    }).get_json()['data']['id']
+    client.post(f'/api/v1/config/param-groups/{group_id}/params', json={'paramDefId': param_id})
+    matrix_files = set((tmp_path / 'doe' / 'matrices').rglob('*.doem'))
+    rejected = [{**row, 'label': f'x{row["thickness"]}'} for row in rows]
+    body = client.put(f'/api/v1/config/param-groups/{group_id}', json={'doeFileData': rejected}).get_json()
+    assert body['code'] != ErrorCode.SUCCESS and '第 5 行' in body['msg']
+    assert set((tmp_path / 'doe' / 'matrices').rglob('*.doem')) == matrix_files
+
+    updated = client.put(f'/api/v1/config/param-groups/{group_id}', json={'doeFileData': rows[:4]}).get_json()['data']
+    assert (updated['doeRowCount'], updated['doeColumns'], updated['doeFileData']) == (
+        4, ['label', 'thickness', 'width'], None)
+
+    inline_body = client.put(f'/api/v1/config/param-groups/{group_id}', json={'doeFileData': rows[2:]}).get_json()
+    assert inline_body['code'] != ErrorCode.SUCCESS and '第 3 行' in inline_body['msg']
+    assert client.put(f'/api/v1/config/param-groups/{group_id}', json={'doeFileData': rows[:2]}).get_json()['code'] == ErrorCode.SUCCESS
+    assert db.session.get(ParamGroup, group_id).doe_file_data == rows[:2]
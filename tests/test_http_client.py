@@ -0,0 +1,61 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.common.http_client import HttpClient
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    peers = []
+
+    def do_GET(self):
+        self.peers.append(self.client_address)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Set-Cookie', 'sid=leak; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def local_server():
+    _KeepAliveHandler.peers = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_client_reuses_connections_and_drops_cookies(app, local_server):
+    client = HttpClient()
+    client.init_app(app)
+
+    for _ in range(3):
+        response = client.get('test', f'{local_server}/ping', timeout=2)
+        assert response.json() == {'ok': True}
+
+    assert len(set(_KeepAliveHandler.peers)) == 1
+    assert len(client.session('test').cookies) == 0
+    metrics = client.snapshot()['test']
+    assert metrics['calls'] == 3
+    assert metrics['errors'] == 0
+    assert metrics['lastStatus'] == 200
+    client.close()
+
+
+def test_health_exposes_http_client_metrics(app, client, local_server):
+    from app.common.http_client import http_client
+
+    http_client.get('health-probe', f'{local_server}/ping', timeout=2)
+    body = client.get('/health').get_json()
+    assert body['http_client']['health-probe']['lastStatus'] == 200
+    assert 'cpu_pool' in body
@@ -1,5 +1,5 @@
-def test_orders_crud_flow(client, auth_headers, project, fold_type, sim_type):
-    payload = {
+def _order_payload(project, fold_type, sim_type):
+    return {
         'projectId': project.id,
         'modelLevelId': 1,
         'originFile': {'type': 1, 'name': 'demo.stp', 'path': '/data/demo.stp'},
@@ -33,6 +33,10 @@ def test_orders_crud_flow(client, auth_headers, project, fold_type, sim_type):
             'globalSolver': {'solverId': 1, 'cpuType': 1, 'cpuCores': 1, 'double': 0, 'useGlobalConfig': 1, 'applyToAll': True},
         },
     }
+
+
+def test_orders_crud_flow(client, auth_headers, project, fold_type, sim_type):
+    payload = _order_payload(project, fold_type, sim_type)
     create_resp = client.post('/api/v1/orders', json=payload, headers=auth_headers)
     assert create_resp.status_code == 200
     create_payload = create_resp.get_json()
@@ -64,6 +68,453 @@ def test_orders_crud_flow(client, auth_headers, project, fold_type, sim_type):
     assert update_payload['data']['remark'] == 'updated'
     assert update_payload['data']['baseDir'] == '/data/orders/ord-1'
 
+    from app.api.v1.orders.service import orders_service
+    assert orders_service.dispatch_automation_outbox() == 1
+
     delete_resp = client.delete(f'/api/v1/orders/{order_id}', headers=auth_headers)
     assert delete_resp.status_code == 400
     assert '未开始' in delete_resp.get_json()['msg']
+
+
+def test_orders_keyset_pagination(client, auth_headers, db_session, project):
+    from app.models.order import Order
+
+    db_session.add_all([
+        Order(order_no=f'ORD_KEYSET_{index}', project_id=project.id, created_at=1000 + index // 2)
+        for index in range(5)
+    ])
+    db_session.commit()
+
+    first = client.get('/api/v1/orders?pageSize=2', headers=auth_headers).get_json()['data']
+    assert first['total'] == 5
+    assert first['hasMore'] is True
+    seen = [item['orderNo'] for item in first['items']]
+
+    cursor = first['nextCursor']
+    while cursor:
+        page = client.get(f'/api/v1/orders?pageSize=2&cursor={cursor}', headers=auth_headers).get_json()['data']
+        seen.extend(item['orderNo'] for item in page['items'])
+        cursor = page['nextCursor']
+
+    assert seen == ['ORD_KEYSET_4', 'ORD_KEYSET_3', 'ORD_KEYSET_2', 'ORD_KEYSET_1', 'ORD_KEYSET_0']
+
+    bad = client.get('/api/v1/orders?cursor=%%%', headers=auth_headers)
+    assert bad.status_code == 400
+
+
+def test_orders_sim_type_filter_uses_junction(client, auth_headers, db_session, project):
+    from app.api.v1.orders.repository import orders_repository
+    from app.models.order import Order, OrderSimType
+
+    first = orders_repository.create_order({'order_no': 'ORD_SIM_1', 'project_id': project.id, 'sim_type_ids': [21, 22]})
+    second = orders_repository.create_order({'order_no': 'ORD_SIM_2', 'project_id': project.id, 'sim_type_ids': [22]})
+    db_session.commit()
+    assert {row.sim_type_id for row in OrderSimType.query.filter_by(order_id=first.id)} == {21, 22}
+
+    resp = client.get('/api/v1/orders?simTypeId=21', headers=auth_headers).get_json()['data']
+    assert [item['orderNo'] for item in resp['items']] == ['ORD_SIM_1']
+
+    orders_repository.update_order(db_session.get(Order, second.id), {'sim_type_ids': [21]})
+    db_session.commit()
+    resp = client.get('/api/v1/orders?simTypeId=22', headers=auth_headers).get_json()['data']
+    assert [item['orderNo'] for item in resp['items']] == ['ORD_SIM_1']
+
+
+def test_orders_keyword_search(client, auth_headers, db_session, project, monkeypatch):
+    from app.api.v1.orders.repository import OrdersRepository, orders_repository
+    from sqlalchemy.dialects import mysql
+
+    orders_repository.create_order({
+        'order_no': 'ORD-20260101-00001',
+        'project_id': project.id,
+        'remark': '折叠屏跌落复测',
+        'condition_summary': {'展开态': ['跌落']},
+    })
+    orders_repository.create_order({
+        'order_no': 'ORD-20260102-00002',
+        'project_id': project.id,
+        'remark': 'static check',
+        'condition_summary': {'折叠态': ['静力']},
+    })
+    db_session.commit()
+
+    def search(query):
+        data = client.get(f'/api/v1/orders?{query}', headers=auth_headers).get_json()['data']
+        return sorted(item['orderNo'] for item in data['items'])
+
+    assert search('keyword=ORD-20260102') == ['ORD-20260102-00002']
+    assert search('keyword=跌落') == ['ORD-20260101-00001']
+    assert search('keyword=折叠') == ['ORD-20260101-00001', 'ORD-20260102-00002']
+    assert search('remark=static') == ['ORD-20260102-00002']
+    assert search('orderNo=00001') == ['ORD-20260101-00001']
+
+    monkeypatch.setattr(OrdersRepository, '_fulltext_available', True)
+    sql = str(orders_repository._search_text_clause('跌落').compile(dialect=mysql.dialect()))
+    assert 'MATCH' in sql and 'IN BOOLEAN MODE' in sql and 'LIKE' in sql
+
+    index_line = '  FULLTEXT KEY `ft_orders_search_text` (`search_text`)'
+    assert OrdersRepository._fulltext_uses_ngram(f'CREATE TABLE `orders` (\n{index_line} /*!50100 WITH PARSER `ngram` */ \n)')
+    assert not OrdersRepository._fulltext_uses_ngram(f'CREATE TABLE `orders` (\n{index_line}\n)')
+
+
+def test_daily_round_usage_counter(client, auth_headers, db_session):
+    from app.api.v1.orders.repository import OrdersRepository
+    from app.api.v1.orders.service import orders_service
+
+    today = orders_service._usage_date()
+    resp = client.get('/api/v1/orders/submit-limits', headers=auth_headers)
+    assert resp.status_code == 200
+    assert resp.get_json()['data']['todayUsedRounds'] == 0
+    assert OrdersRepository.get_daily_round_usage('tester', today) == 0
+
+    assert OrdersRepository.try_reserve_daily_rounds('tester', today, 300, 500)
+    assert not OrdersRepository.try_reserve_daily_rounds('tester', today, 300, 500)
+    assert OrdersRepository.try_reserve_daily_rounds('tester', today, 200, 500)
+    OrdersRepository.adjust_daily_round_usage('tester', today, -800)
+    db_session.commit()
+    assert OrdersRepository.get_daily_round_usage('tester', today) == 0
+
+
+def test_order_submission_goes_through_outbox(app, client, auth_headers, project, fold_type, sim_type, monkeypatch):
+    from app.api.v1.orders.service import orders_service
+    from app.models.case_opti import AutomationOutbox, CaseConditionOpti
+    from app.services.automation import automation_distribution_client
+    from app.services.automation.distribution_client import AutomationSubmissionError
+
+    app.config.update(AUTOMATION_OUTBOX_RETRY_BASE_SECONDS=0, AUTOMATION_OUTBOX_MAX_WORKERS=1)
+    original_submit = automation_distribution_client.submit_case
+    calls = []
+
+    def flaky_submit(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise AutomationSubmissionError('timeout')
+        return original_submit(**kwargs)
+
+    monkeypatch.setattr(automation_distribution_client, 'submit_case', flaky_submit)
+
+    create_resp = client.post('/api/v1/orders', json=_order_payload(project, fold_type, sim_type), headers=auth_headers)
+    data = create_resp.get_json()['data']
+    assert data['status'] == 0
+    assert calls == []
+    assert AutomationOutbox.query.filter_by(order_id=data['id']).one().status == AutomationOutbox.STATUS_PENDING
+
+    assert orders_service.dispatch_automation_outbox() == 1
+    entry = AutomationOutbox.query.filter_by(order_id=data['id']).one()
+    assert (entry.status, entry.attempts, entry.last_error) == (AutomationOutbox.STATUS_PENDING, 1, 'timeout')
+
+    assert orders_service.dispatch_automation_outbox() == 1
+    assert AutomationOutbox.query.filter_by(order_id=data['id']).one().status == AutomationOutbox.STATUS_DONE
+    condition = CaseConditionOpti.query.filter_by(order_id=data['id']).one()
+    assert condition.opt_job_id > 0 and condition.status == 1
+    assert client.get(f"/api/v1/orders/{data['id']}", headers=auth_headers).get_json()['data']['status'] == 1
+    assert orders_service.dispatch_automation_outbox() == 0
+
+
+def test_outbox_defers_following_cases_until_order_has_issue(app, client, auth_headers, project, fold_type, sim_type,
+                                                             monkeypatch):
+    import copy
+    from app.api.v1.orders.service import orders_service
+    from app.models.case_opti import AutomationOutbox
+    from app.services.automation import automation_distribution_client
+    from app.services.automation.distribution_client import AutomationSubmissionError
+
+    app.config.update(AUTOMATION_OUTBOX_RETRY_BASE_SECONDS=0, AUTOMATION_OUTBOX_MAX_WORKERS=1)
+    payload = _order_payload(project, fold_type, sim_type)
+    second = copy.deepcopy(payload['inputJson']['conditions'][0])
+    second.update(conditionId=2, remark='condition-2')
+    payload['inputJson']['conditions'].append(second)
+    order_id = client.post('/api/v1/orders', json=payload, headers=auth_headers).get_json()['data']['id']
+    assert AutomationOutbox.query.filter_by(order_id=order_id).count() == 2
+
+    original_submit = automation_distribution_client.submit_case
+    issue_ids = []
+
+    def submit(**kwargs):
+        issue_ids.append(kwargs.get('issue_id'))
+        if len(issue_ids) == 1:
+            raise AutomationSubmissionError('timeout')
+        return original_submit(**kwargs)
+
+    monkeypatch.setattr(automation_distribution_client, 'submit_case', submit)
+    assert orders_service.dispatch_automation_outbox() == 2
+    assert issue_ids == [None]
+    entries = AutomationOutbox.query.filter_by(order_id=order_id).order_by(AutomationOutbox.id).all()
+    assert [(entry.status, entry.attempts) for entry in entries] == [
+        (AutomationOutbox.STATUS_PENDING, 1), (AutomationOutbox.STATUS_PENDING, 0)]
+
+    assert orders_service.dispatch_automation_outbox() == 2
+    assert issue_ids[1] is None and issue_ids[2] is not None
+    assert {entry.status for entry in AutomationOutbox.query.filter_by(order_id=order_id)} == {
+        AutomationOutbox.STATUS_DONE}
+
+
+def test_outbox_writeback_is_fenced_and_committed_per_row(app, client, auth_headers, project, fold_type, sim_type,
+                                                          monkeypatch):
+    from app.api.v1.orders.repository import OrdersRepository
+    from app.api.v1.orders.service import orders_service
+    from app.models.case_opti import AutomationOutbox, CaseConditionOpti
+
+    app.config.update(AUTOMATION_OUTBOX_MAX_WORKERS=1)
+    assert orders_service._outbox_lease_seconds(20) > app.config['AUTOMATION_OUTBOX_LEASE_SECONDS']
+    first_id, second_id = [
+        client.post('/api/v1/orders', json=_order_payload(project, fold_type, sim_type), headers=auth_headers)
+        .get_json()['data']['id']
+        for _ in range(2)
+    ]
+    original_success = orders_service._apply_case_submit_success
+
+    def broken_success(order, *args):
+        if order.id == first_id:
+            raise RuntimeError('db hiccup')
+        return original_success(order, *args)
+
+    monkeypatch.setattr(orders_service, '_apply_case_submit_success', broken_success)
+    assert orders_service.dispatch_automation_outbox() == 2
+    failed = AutomationOutbox.query.filter_by(order_id=first_id).one()
+    assert failed.status == AutomationOutbox.STATUS_FAILED and '回写失败' in failed.last_error
+    assert AutomationOutbox.query.filter_by(order_id=second_id).one().status == AutomationOutbox.STATUS_DONE
+    assert CaseConditionOpti.query.filter_by(order_id=second_id).one().opt_job_id > 0
+    monkeypatch.undo()
+
+    third_id = client.post('/api/v1/orders', json=_order_payload(project, fold_type, sim_type),
+                           headers=auth_headers).get_json()['data']['id']
+    entry = OrdersRepository.claim_automation_outbox(1, 60)[0]
+    job = (entry.id, third_id, entry.order_case_id, entry.attempts)
+    OrdersRepository.commit()
+    client.put(f'/api/v1/orders/{third_id}', json={'remark': 'edited while submitting'}, headers=auth_headers)
+    assert AutomationOutbox.query.filter_by(order_id=third_id).one().status == AutomationOutbox.STATUS_PROCESSING
+
+    AutomationOutbox.query.filter_by(id=entry.id).update({'attempts': entry.attempts + 1})
+    OrdersRepository.commit()
+    assert orders_service._submit_outbox_case(job) == (None, None)
+    orders_service._commit_outbox_outcome(job, {'jobId': 1}, None)
+    assert AutomationOutbox.query.filter_by(id=entry.id).one().status == AutomationOutbox.STATUS_PROCESSING
+    assert CaseConditionOpti.query.filter_by(order_id=third_id).one().opt_job_id in (None, 0)
+
+
+def test_outbox_worker_starts_only_in_serving_process(monkeypatch):
+    from types import SimpleNamespace
+    from app import _start_automation_outbox_worker
+    from app.services.automation import automation_outbox_worker
+
+    started = []
+    monkeypatch.setattr(automation_outbox_worker, 'start', lambda *args: started.append(args))
+    _start_automation_outbox_worker(SimpleNamespace(config={'SERVING': False}))
+    assert started == []
+    _start_automation_outbox_worker(SimpleNamespace(config={'SERVING': True}))
+    assert len(started) == 1
+
+
+def test_order_update_diffs_case_conditions(client, auth_headers, project, fold_type, sim_type):
+    from app.api.v1.orders.service import orders_service
+    from app.models.case_opti import CaseConditionOpti
+
+    payload = _order_payload(project, fold_type, sim_type)
+    order_id = client.post('/api/v1/orders', json=payload, headers=auth_headers).get_json()['data']['id']
+    orders_service.dispatch_automation_outbox()
+    submitted = CaseConditionOpti.query.filter_by(order_id=order_id).one()
+    condition_pk, job_id, snapshot_updated_at = submitted.id, submitted.opt_job_id, submitted.updated_at
+    assert job_id > 0
+
+    client.put(f'/api/v1/orders/{order_id}', json={'remark': 'only remark'}, headers=auth_headers)
+    kept = CaseConditionOpti.query.filter_by(order_id=order_id).one()
+    assert (kept.id, kept.opt_job_id, kept.status) == (condition_pk, job_id, 1)
+
+    input_json = payload['inputJson']
+    input_json['conditions'].append(dict(input_json['conditions'][0], conditionId=2, remark='condition-2'))
+    client.put(f'/api/v1/orders/{order_id}', json={'inputJson': input_json}, headers=auth_headers)
+    rows = CaseConditionOpti.query.filter_by(order_id=order_id).order_by(CaseConditionOpti.case_index).all()
+    assert [row.condition_id for row in rows] == [1, 2]
+    assert (rows[0].id, rows[0].opt_job_id, rows[0].updated_at) == (condition_pk, job_id, snapshot_updated_at)
+    assert rows[1].opt_job_id is None
+
+    input_json['conditions'] = input_json['conditions'][1:]
+    client.put(f'/api/v1/orders/{order_id}', json={'inputJson': input_json}, headers=auth_headers)
+    assert [row.condition_id for row in CaseConditionOpti.query.filter_by(order_id=order_id)] == [2]
+
+
+def test_condition_snapshots_are_content_addressed(client, auth_headers, db_session, project, fold_type, sim_type):
+    from app.models.case_opti import CaseConditionOpti
+    from app.models.snapshot import SNAPSHOT_REFS_KEY, SnapshotBlob
+
+    payload = _order_payload(project, fold_type, sim_type)
+    conditions = payload['inputJson']['conditions']
+    conditions.append(dict(conditions[0], conditionId=2))
+    order_id = client.post('/api/v1/orders', json=payload, headers=auth_headers).get_json()['data']['id']
+
+    rows = CaseConditionOpti.query.filter_by(order_id=order_id).order_by(CaseConditionOpti.condition_id).all()
+    assert len(rows) == 2
+    assert rows[0].condition_snapshot_ref[SNAPSHOT_REFS_KEY] == rows[1].condition_snapshot_ref[SNAPSHOT_REFS_KEY]
+    assert 'params' not in rows[0].condition_snapshot_ref
+    assert SnapshotBlob.query.count() == len(rows[0].condition_snapshot_ref[SNAPSHOT_REFS_KEY])
+
+    db_session.expire_all()
+    snapshot = db_session.get(CaseConditionOpti, rows[1].id).to_dict()['condition_snapshot']
+    assert snapshot['params'] == {'opt_params': {'alg_type': 1, 'batch_size': [1], 'max_iter': 1}}
+    assert snapshot['solver']['solver_id'] == 1
+    assert snapshot['conditionId'] == 2
+
+
+def test_order_field_projection(client, auth_headers, db_session, project, fold_type, sim_type):
+    from sqlalchemy import event
+
+    order_id = client.post(
+        '/api/v1/orders', json=_order_payload(project, fold_type, sim_type), headers=auth_headers
+    ).get_json()['data']['id']
+    db_session.expunge_all()
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        items = client.get('/api/v1/orders?fields=orderNo,status', headers=auth_headers).get_json()['data']['items']
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    assert set(items[0]) == {'id', 'orderNo', 'status'}
+    order_selects = [sql for sql in statements if 'FROM orders' in sql]
+    assert order_selects and not any('input_json' in sql for sql in order_selects)
+
+    header = client.get(f'/api/v1/orders/{order_id}?include=conditions', headers=auth_headers).get_json()['data']
+    assert 'inputJson' not in header and 'clientMeta' not in header
+    assert header['originFile']['name'] == 'demo.stp'
+    assert len(header['conditions']) == 1
+
+    only_input = client.get(f'/api/v1/orders/{order_id}?fields=inputJson', headers=auth_headers).get_json()['data']
+    assert set(only_input) == {'id', 'inputJson'}
+
+    full = client.get(f'/api/v1/orders/{order_id}', headers=auth_headers).get_json()['data']
+    assert 'inputJson' in full and 'conditions' in full
+
+    assert client.get('/api/v1/orders?fields=password', headers=auth_headers).status_code == 400
+
+
+def test_order_schema_is_reflected_once(client, auth_headers, monkeypatch):
+    from app.api.v1.orders import repository as orders_repository_module
+    from app.api.v1.orders.repository import OrdersRepository
+
+    reflections = []
+    real_inspect = orders_repository_module.inspect
+
+    def counting_inspect(bind):
+        inspector = real_inspect(bind)
+        real_get_columns = inspector.get_columns
+
+        def get_columns(table_name, *args, **kwargs):
+            reflections.append(table_name)
+            return real_get_columns(table_name, *args, **kwargs)
+
+        def get_table_names(*args, **kwargs):
+            reflections.append('tables')
+            return real_get_table_names(*args, **kwargs)
+
+        real_get_table_names = inspector.get_table_names
+        inspector.get_columns = get_columns
+        inspector.get_table_names = get_table_names
+        return inspector
+
+    monkeypatch.setattr(orders_repository_module, 'inspect', counting_inspect)
+    monkeypatch.setattr(OrdersRepository, '_is_memory_sqlite', staticmethod(lambda: False))
+    monkeypatch.setattr(OrdersRepository, '_order_columns_cache', {})
+    monkeypatch.setattr(OrdersRepository, '_present_tables_cache', {})
+    for _ in range(2):
+        assert client.get('/api/v1/orders?fields=orderNo,status,remark', headers=auth_headers).status_code == 200
+        assert OrdersRepository._has_order_sim_types_table() and OrdersRepository._has_automation_outbox_table()
+    assert reflections == ['orders', 'tables', 'tables']
+
+
+def test_bulk_order_creation(client, auth_headers, project, fold_type, sim_type):
+    from app.models.case_opti import AutomationOutbox, CaseConditionOpti
+    from app.models.order import OrderSimType
+
+    orders = [_order_payload(project, fold_type, sim_type) for _ in range(3)]
+    resp = client.post('/api/v1/orders/bulk', json={'orders': orders}, headers=auth_headers)
+    assert resp.status_code == 200
+    data = resp.get_json()['data']
+    assert data['total'] == 3
+    order_ids = [item['id'] for item in data['items']]
+    assert len({item['orderNo'] for item in data['items']}) == 3
+
+    from app.api.v1.orders.service import generate_order_no
+    order_nos = {generate_order_no() for _ in range(5000)}
+    assert len(order_nos) == 5000 and all(no.startswith('ORD-') and len(no) <= 50 for no in order_nos)
+    for order_id in order_ids:
+        detail = client.get(f'/api/v1/orders/{order_id}', headers=auth_headers).get_json()['data']
+        assert detail['remark'] == 'first order'
+        assert CaseConditionOpti.query.filter_by(order_id=order_id).count() == 1
+        assert AutomationOutbox.query.filter_by(order_id=order_id).count() == 1
+        assert OrderSimType.query.filter_by(order_id=order_id).one().sim_type_id == sim_type.id
+
+    invalid = _order_payload(project, fold_type, sim_type)
+    invalid['inputJson']['conditions'] = []
+    resp = client.post('/api/v1/orders/bulk', json={'orders': [orders[0], invalid]}, headers=auth_headers)
+    body = resp.get_json()
+    assert body['code'] != 0 and '第 2 个订单' in body['msg']
+    assert client.get('/api/v1/orders', headers=auth_headers).get_json()['data']['total'] == 3
+
+    resp = client.post('/api/v1/orders/bulk', json={'orders': []}, headers=auth_headers)
+    assert resp.status_code == 400
+
+
+def test_parse_param_file_xlsx_and_csv(client, auth_headers):
+    import io
+    from openpyxl import Workbook
+    from app.api.v1.orders.excel_parser_service import excel_parser_service
+
+    rows = [('参数键', '参数名', '值', '单位', 'extra'), (' k1 ', '长度\u3000', 1.5, 'mm', None), (None, None, None, None, None),
+            (None, '无键', 2, None, None), ('k2', '宽度', 3, 'mm', 'x')]
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    xlsx = io.BytesIO()
+    workbook.save(xlsx)
+    csv_bytes = '\n'.join(','.join('' if v is None else str(v) for v in row) for row in rows).encode('gbk')
+
+    parsed = {}
+    for content, name in ((xlsx.getvalue(), 'params.xlsx'), (csv_bytes, 'params.csv')):
+        resp = client.post('/api/v1/orders/parse-param-excel', data={'file': (io.BytesIO(content), name)},
+                           headers=auth_headers, content_type='multipart/form-data')
+        data = resp.get_json()['data']
+        assert data['success'] is True and data['rowCount'] == 2
+        assert [item['paramKey'] for item in data['items']] == ['k1', 'k2']
+        assert data['items'][0]['paramName'] == '长度'
+        assert {w['type'] for w in data['warnings']} == {'unknown_column', 'missing_key'}
+        parsed[name] = data['items']
+    assert parsed['params.csv'] == parsed['params.xlsx']
+    assert [item['value'] for item in parsed['params.csv']] == [1.5, 3]
+
+    from app.api.v1.orders.excel_parser_service import _coerce_csv_cell
+    assert [_coerce_csv_cell(cell) for cell in ('-2', '1e3', '0.25', '007', '1.', 'abc', '')] == [
+        -2, 1000.0, 0.25, '007', '1.', 'abc', '']
+
+    report = excel_parser_service._new_report()
+    batches = list(excel_parser_service.iter_param_batches(io.BytesIO(xlsx.getvalue()), batch_size=1, report=report))
+    assert [len(batch) for batch in batches] == [1, 1] and report['rowCount'] == 2
+
+
+def test_large_doe_matrix_is_stored_out_of_row(app, client, auth_headers, project, fold_type, sim_type, tmp_path):
+    from types import SimpleNamespace
+    from app.models.case_opti import CaseConditionOpti
+    from app.models.order import Order
+    from app.services.automation.distribution_client import AutomationDistributionClient
+
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), DOE_MATRIX_EXTERNAL_MIN_ROWS=3)
+    rows = [{'thickness': 1.0 + index, 'width': index} for index in range(4)]
+    payload = _order_payload(project, fold_type, sim_type)
+    payload['inputJson']['conditions'][0]['params']['optParams'] = {'algType': 5, 'doeParamData': rows}
+    order_id = client.post('/api/v1/orders', json=payload, headers=auth_headers).get_json()['data']['id']
+
+    opt_params = Order.query.get(order_id).input_json['conditions'][0]['params']['opt_params']
+    assert 'doe_param_data' not in opt_params
+    assert (opt_params['doe_row_count'], opt_params['doe_columns']) == (4, ['thickness', 'width'])
+    condition = CaseConditionOpti.query.filter_by(order_id=order_id).one()
+    assert condition.round_total == 4
+
+    request_payload = AutomationDistributionClient._build_payload(SimpleNamespace(), SimpleNamespace(), [condition], 1)
+    assert request_payload['conditions'][0]['condition']['params']['opt_params'] == {'alg_type': 5, 'doe_param_data': rows}
+    detail = client.get(f'/api/v1/orders/{order_id}', headers=auth_headers).get_json()['data']
+    assert detail['inputJson']['conditions'][0]['params']['optParams']['doeMatrixId'] == opt_params['doe_matrix_id']
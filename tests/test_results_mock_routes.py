@@ -118,3 +118,100 @@ def test_results_cases_mock_payload_follows_order_status(client, auth_headers, d
         for condition in case_payload['conditions']
     ]
     assert [item['status'] for item in failed_conditions] == [2, 3, 0]
+
+
+def test_round_output_attachments_are_lazy(client, auth_headers, db_session, project, monkeypatch):
+    from app.api.v1.results import service as results_service_module
+    from app.api.v1.results.service import results_service
+    from app.models.case_opti import CaseConditionOpti
+
+    condition = CaseConditionOpti(
+        order_id=1,
+        order_case_id=1,
+        condition_id=301,
+        fold_type_id=11,
+        sim_type_id=21,
+        opt_job_id=88,
+        opt_condition_config_id=99,
+        condition_snapshot={},
+    )
+    db_session.add(condition)
+    db_session.commit()
+
+    items = results_service._build_external_round_items_from_job_summary(
+        condition,
+        {
+            'rounds': [
+                {
+                    'circleId': 5,
+                    'roundIndex': 1,
+                    'status': 2,
+                    'outputs': [
+                        {'respName': 'stress', 'conditionConfigId': 99, 'originValue': 1.5, 'hasAttachments': True},
+                        {'respName': 'disp', 'conditionConfigId': 99, 'originValue': 0.2, 'hasAttachments': False},
+                    ],
+                }
+            ]
+        },
+    )
+    assert 'outputAttachments' not in items[0]
+    assert items[0]['attachmentOutputs'] == ['stress']
+
+    calls = []
+
+    def fake_attachments(job_id, circle_id, condition_config_id=None):
+        calls.append((job_id, circle_id, condition_config_id))
+        return [
+            {'respName': 'stress', 'imagePaths': ['/a.png'], 'aviPaths': []},
+            {'respName': 'disp', 'imagePaths': [], 'aviPaths': ['/b.avi']},
+        ]
+
+    monkeypatch.setattr(
+        results_service_module.optimization_repository,
+        'get_round_output_attachments',
+        fake_attachments,
+    )
+    resp = client.get(
+        f'/api/v1/results/case-condition/{condition.id}/rounds/5/attachments?output=stress',
+        headers=auth_headers,
+    )
+    assert resp.status_code == 200
+    payload = resp.get_json()['data']
+    assert calls == [(88, 5, 99)]
+    assert [item['respName'] for item in payload['attachments']] == ['stress']
+
+    missing_resp = client.get('/api/v1/results/case-condition/999999/rounds/5/attachments', headers=auth_headers)
+    assert missing_resp.status_code == 404
+
+
+def test_round_schema_is_memoized_per_condition_version(app, monkeypatch):
+    from app.api.v1.results.service import _MockOrderCondition, results_service
+
+    condition = _MockOrderCondition({
+        'id': 1,
+        'updated_at': 100,
+        'algorithm_type': 'BAYESIAN',
+        'output_count': 1,
+        'condition_snapshot': {
+            'params': {'paramDetails': [{'paramName': '厚度'}]},
+            'output': {'respDetails': [{'respName': '位移'}]},
+        },
+    })
+    calls = []
+    original = results_service._parse_param_names
+
+    def counting_parse(item):
+        calls.append(item.id)
+        return original(item)
+
+    monkeypatch.setattr(results_service, '_parse_param_names', counting_parse)
+    schema = results_service._build_round_schema(condition)
+    assert results_service._extract_param_names(condition) == ['厚度']
+    assert results_service._extract_output_names(condition) == ['位移']
+    assert results_service._build_round_schema(condition)['columns'] == schema['columns']
+    assert len(calls) == 1
+
+    condition.updated_at = 101
+    condition.condition_snapshot = {'params': {'paramDetails': [{'paramName': '角度'}]}}
+    assert results_service._extract_param_names(condition) == ['角度']
+    assert len(calls) == 2
@@ -59,3 +59,107 @@ def test_results_endpoints(client, app, db_session):
         headers=headers,
     )
     assert update_resp.status_code == 200
+
+
+def test_rounds_keyset_pagination(client, app, db_session):
+    headers = _auth_headers(app)
+
+    project = Project(name='项目B', code='PROJ_B', valid=1, sort=1)
+    sim_type = SimType(name='结构', code='SIM_B', category='STRUCT', valid=1, sort=1)
+    db_session.add_all([project, sim_type])
+    db_session.commit()
+    order = Order(order_no='ORD_002', project_id=project.id, sim_type_ids=[sim_type.id])
+    db_session.add(order)
+    db_session.commit()
+    sim_result = SimTypeResult(order_id=order.id, sim_type_id=sim_type.id)
+    db_session.add(sim_result)
+    db_session.commit()
+    db_session.add_all([
+        Round(
+            sim_type_result_id=sim_result.id,
+            order_id=order.id,
+            sim_type_id=sim_type.id,
+            round_index=index,
+            status=2 if index % 2 else 1,
+        )
+        for index in range(1, 6)
+    ])
+    db_session.commit()
+
+    url = f'/api/v1/results/sim-type/{sim_result.id}/rounds'
+    first = client.get(f'{url}?pageSize=2', headers=headers).get_json()['data']
+    assert [item['roundIndex'] for item in first['items']] == [1, 2]
+    assert first['total'] == 5
+    assert first['hasMore'] is True
+
+    second = client.get(f"{url}?pageSize=2&cursor={first['nextCursor']}", headers=headers).get_json()['data']
+    assert [item['roundIndex'] for item in second['items']] == [3, 4]
+
+    completed = client.get(f'{url}?pageSize=2&status=2', headers=headers).get_json()['data']
+    assert [item['roundIndex'] for item in completed['items']] == [1, 3]
+    last = client.get(
+        f"{url}?pageSize=2&status=2&cursor={completed['nextCursor']}",
+        headers=headers,
+    ).get_json()['data']
+    assert [item['roundIndex'] for item in last['items']] == [5]
+    assert last['hasMore'] is False
+    assert last['nextCursor'] is None
+
+    bad = client.get(f'{url}?cursor=not-a-cursor', headers=headers)
+    assert bad.status_code == 400
+
+
+def test_round_status_batch_maintains_counters(client, app, db_session):
+    headers = _auth_headers(app)
+
+    project = Project(name='项目C', code='PROJ_C', valid=1, sort=1)
+    sim_type = SimType(name='结构', code='SIM_C', category='STRUCT', valid=1, sort=1)
+    db_session.add_all([project, sim_type])
+    db_session.commit()
+    order = Order(order_no='ORD_003', project_id=project.id, sim_type_ids=[sim_type.id])
+    db_session.add(order)
+    db_session.commit()
+    sim_result = SimTypeResult(order_id=order.id, sim_type_id=sim_type.id)
+    db_session.add(sim_result)
+    db_session.commit()
+    existing = Round(
+        sim_type_result_id=sim_result.id,
+        order_id=order.id,
+        sim_type_id=sim_type.id,
+        round_index=1,
+        status=1,
+    )
+    db_session.add(existing)
+    db_session.commit()
+
+    resp = client.patch(
+        f'/api/v1/results/sim-type/{sim_result.id}/rounds/status',
+        json={'items': [
+            {'roundId': existing.id, 'status': 2},
+            {'roundIndex': 2, 'status': 3, 'errorMsg': 'solver crashed'},
+            {'roundIndex': 3, 'status': 1},
+            {'roundId': 999999, 'status': 2},
+        ]},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    payload = resp.get_json()['data']
+    assert payload['updated'] == 1
+    assert payload['created'] == 2
+    assert payload['missing'] == [999999]
+    assert payload['statistics']['totalRounds'] == 3
+    assert payload['statistics']['completedRounds'] == 1
+    assert payload['statistics']['failedRounds'] == 1
+
+    client.patch(f'/api/v1/results/round/{existing.id}/status', json={'status': 3}, headers=headers)
+    detail = client.get(f'/api/v1/results/sim-type/{sim_result.id}', headers=headers).get_json()['data']
+    assert detail['statistics']['completedRounds'] == 0
+    assert detail['statistics']['failedRounds'] == 2
+    assert detail['statistics']['statusDistribution'] == {'1': 1, '3': 2}
+
+    bad = client.patch(
+        f'/api/v1/results/sim-type/{sim_result.id}/rounds/status',
+        json={'items': [{'status': 2}]},
+        headers=headers,
+    )
+    assert bad.status_code == 400
@@ -0,0 +1,271 @@
+import hashlib
+import io
+
+import pytest
+
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@pytest.fixture()
+def storage(tmp_path, monkeypatch):
+    from app.api.v1.upload import service as upload_service_module
+    from app.api.v1.upload.storage import StorageManager
+
+    manager = StorageManager(str(tmp_path))
+    monkeypatch.setattr(upload_service_module, 'storage_manager', manager)
+    return manager
+
+
+def _upload(client, auth_headers, content: bytes, chunk_order=None, file_hash=None):
+    init_resp = client.post('/api/v1/upload/init', json={
+        'fileHash': file_hash or hashlib.sha256(content).hexdigest(),
+        'fileName': 'model.stp',
+        'fileSize': len(content),
+        'chunkSize': CHUNK_SIZE,
+    }, headers=auth_headers)
+    data = init_resp.get_json()['data']
+    upload_id = data['uploadId']
+    chunks = [content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE)]
+    for index in range(len(chunks)) if chunk_order is None else chunk_order:
+        resp = _send_chunk(client, auth_headers, upload_id, index, chunks[index])
+        assert resp.status_code == 200
+    return upload_id, chunks
+
+
+def _send_chunk(client, auth_headers, upload_id, index, chunk):
+    return client.post('/api/v1/upload/chunk', data={
+        'upload_id': upload_id,
+        'chunk_index': str(index),
+        'chunk_hash': hashlib.sha256(chunk).hexdigest(),
+        'file': (io.BytesIO(chunk), 'blob'),
+    }, headers=auth_headers, content_type='multipart/form-data')
+
+
+def test_positional_upload_writes_chunks_in_place(app, client, auth_headers, storage):
+    content = bytes(range(256)) * (CHUNK_SIZE * 2 // 256) + b'tail'
+    upload_id, chunks = _upload(client, auth_headers, content, chunk_order=[2])
+    status = client.get(f'/api/v1/upload/status/{upload_id}', headers=auth_headers).get_json()['data']
+    assert (status['uploadedCount'], status['missingRanges']) == (1, [[0, 1]])
+    negative = _send_chunk(client, auth_headers, upload_id, -1, chunks[2]).get_json()
+    assert negative['code'] != 0 and '超出范围' in negative['msg']
+    assert _send_chunk(client, auth_headers, upload_id, 0, chunks[0]).get_json()['data']['progress'] == 0.6667
+    assert _send_chunk(client, auth_headers, upload_id, 1, chunks[1]).get_json()['data']['progress'] == 1
+    assert not any(storage.chunks_dir.iterdir())
+    assert storage.get_partial_path(upload_id).stat().st_size == len(content)
+
+    oversized = storage.write_chunk_at(
+        upload_id, 2, CHUNK_SIZE, len(chunks[2]), io.BytesIO(chunks[2] + b'overflow'),
+        hashlib.sha256(chunks[2]).hexdigest(),
+    )
+    assert oversized is False
+
+    merge_resp = client.post('/api/v1/upload/merge', json={'uploadId': upload_id}, headers=auth_headers)
+    storage_path = merge_resp.get_json()['data']['storagePath']
+    assert (storage.base_path / storage_path).read_bytes() == content
+    assert not storage.get_partial_path(upload_id).exists()
+
+
+def test_merge_verifies_in_background_without_local_hash_state(app, client, auth_headers, storage):
+    import time
+    from app.api.v1.upload.verifier import file_hash_verifier
+    from app.extensions import db
+
+    app.config['UPLOAD_INLINE_VERIFY_BYTES'] = 1024
+    content = b'v' * (CHUNK_SIZE + 10)
+    upload_id, _chunks = _upload(client, auth_headers, content)
+    # 分片由其他 worker 接收时本进程没有滚动哈希状态
+    file_hash_verifier.discard(upload_id)
+
+    body = client.post('/api/v1/upload/merge', json={'uploadId': upload_id}, headers=auth_headers).get_json()
+    assert body['data']['status'] == 'verifying'
+    deadline = time.time() + 10
+    while True:
+        db.session.expire_all()
+        status = client.get(f'/api/v1/upload/status/{upload_id}', headers=auth_headers).get_json()['data']
+        if status['status'] != 'verifying' or time.time() > deadline:
+            break
+        time.sleep(0.05)
+    assert status['status'] == 'completed' and status['fileId']
+    assert (storage.base_path / status['storagePath']).read_bytes() == content
+
+
+def test_chunked_upload_mode_still_merges(app, client, auth_headers, storage):
+    app.config['UPLOAD_POSITIONAL_WRITES'] = False
+    content = b'x' * (CHUNK_SIZE + 10)
+    upload_id, _chunks = _upload(client, auth_headers, content)
+    assert not storage.get_partial_path(upload_id).exists()
+
+    merge_resp = client.post('/api/v1/upload/merge', json={'uploadId': upload_id}, headers=auth_headers)
+    storage_path = merge_resp.get_json()['data']['storagePath']
+    assert (storage.base_path / storage_path).read_bytes() == content
+    assert not (storage.chunks_dir / upload_id).exists()
+
+
+@pytest.mark.parametrize('positional', [True, False])
+def test_merge_rejects_file_hash_mismatch(app, client, auth_headers, storage, positional):
+    app.config['UPLOAD_POSITIONAL_WRITES'] = positional
+    content = b'y' * (CHUNK_SIZE + 10)
+    upload_id, _chunks = _upload(client, auth_headers, content, file_hash='0' * 64)
+
+    body = client.post('/api/v1/upload/merge', json={'uploadId': upload_id}, headers=auth_headers).get_json()
+    assert body['code'] != 0 and '完整性' in body['msg']
+    status = client.get(f'/api/v1/upload/status/{upload_id}', headers=auth_headers).get_json()['data']
+    assert status['status'] == 'failed'
+    assert not any(storage.files_dir.rglob('*_model.stp'))
+    assert not storage.get_partial_path(upload_id).exists()
+
+
+def test_chunk_bitmap_ranges():
+    from app.api.v1.upload import chunk_bitmap
+
+    bitmap = chunk_bitmap.from_indexes([1, 2, 3], 20)
+    for index in range(8, 19):
+        bitmap = chunk_bitmap.set_bit(bitmap, index, 20)
+    assert chunk_bitmap.count_bits(bitmap) == 14
+    assert chunk_bitmap.missing_ranges(bitmap, 20) == [[0, 0], [4, 7], [19, 19]]
+    assert chunk_bitmap.merge(bitmap, chunk_bitmap.from_indexes([0, 19], 20)) == chunk_bitmap.set_bit(
+        chunk_bitmap.set_bit(bitmap, 0, 20), 19, 20
+    )
+    assert chunk_bitmap.missing_ranges(b'', 3) == [[0, 2]]
+    assert not chunk_bitmap.has_bit(b'\xff\xff\xff', -1)
+    for index in (-1, 20):
+        with pytest.raises(ValueError):
+            chunk_bitmap.set_bit(bitmap, index, 20)
+
+
+def test_identical_content_is_stored_once_across_users(app, client, auth_headers, storage):
+    from flask_jwt_extended import create_access_token
+    from app.extensions import db
+    from app.models.auth import User
+    from app.models.upload import UploadBlob, UploadFile
+
+    content = b'z' * (CHUNK_SIZE + 10)
+    file_hash = hashlib.sha256(content).hexdigest()
+    upload_id, _chunks = _upload(client, auth_headers, content)
+    first_path = client.post('/api/v1/upload/merge', json={'uploadId': upload_id}, headers=auth_headers) \
+        .get_json()['data']['storagePath']
+
+    other = User(domain_account='other', user_name='other', real_name='Other', email='o@example.com', valid=1)
+    db.session.add(other)
+    db.session.commit()
+    other_headers = {'Authorization': f'Bearer {create_access_token(identity=str(other.id))}'}
+    init_body = client.post('/api/v1/upload/init', json={
+        'fileHash': file_hash, 'fileName': 'copy.stp', 'fileSize': len(content), 'chunkSize': CHUNK_SIZE,
+    }, headers=other_headers).get_json()
+    assert init_body['data']['uploadId']
+    assert UploadFile.query.filter_by(user_id=str(other.id), status='completed').count() == 0
+    client.delete(f"/api/v1/upload/cancel/{init_body['data']['uploadId']}", headers=other_headers)
+
+    claim = {'fileHash': file_hash, 'fileName': 'copy.stp', 'fileSize': len(content)}
+    check = client.post('/api/v1/upload/check', json=claim, headers=other_headers).get_json()['data']
+    assert check['exists'] is False and 'fileId' not in check
+    challenge = check['challenge']
+    piece = content[challenge['offset']:challenge['offset'] + challenge['length']]
+    proof = hashlib.sha256(challenge['nonce'].encode() + piece).hexdigest()
+
+    forged = client.post('/api/v1/upload/check', json={
+        **claim, 'challengeToken': challenge['token'], 'proof': hashlib.sha256(piece).hexdigest(),
+    }, headers=other_headers).get_json()['data']
+    assert forged['exists'] is False
+    from app.api.v1.upload.service import upload_service
+    blob = db.session.get(UploadBlob, file_hash)
+    assert not upload_service._verify_ownership_proof(blob, 'someone-else', challenge['token'], proof)
+    assert UploadFile.query.filter_by(user_id=str(other.id), status='completed').count() == 0
+
+    check = client.post('/api/v1/upload/check', json={
+        **claim, 'challengeToken': challenge['token'], 'proof': proof,
+    }, headers=other_headers).get_json()['data']
+    assert check['exists'] is True
+    second_path = check['storagePath']
+
+    blob_path = storage.get_blob_path(file_hash)
+    assert (storage.base_path / second_path).read_bytes() == content
+    assert (storage.base_path / first_path).stat().st_ino == blob_path.stat().st_ino \
+        == (storage.base_path / second_path).stat().st_ino
+    assert db.session.get(UploadBlob, file_hash).ref_count == 2
+
+    (storage.files_dir / 'dup.stp').write_bytes(content)
+    assert storage.store_blob(file_hash, 'files/dup.stp') == 'files/dup.stp'
+    assert (storage.files_dir / 'dup.stp').stat().st_ino == blob_path.stat().st_ino
+    assert not list(storage.files_dir.glob('.*.tmp'))
+
+    client.delete(f'/api/v1/upload/cancel/{upload_id}', headers=auth_headers)
+    assert not (storage.base_path / first_path).exists() and blob_path.exists()
+    assert db.session.get(UploadBlob, file_hash).ref_count == 1
+
+    other_upload = UploadFile.query.filter_by(user_id=str(other.id)).one()
+    client.delete(f'/api/v1/upload/cancel/{other_upload.upload_id}', headers=other_headers)
+    assert not blob_path.exists() and db.session.get(UploadBlob, file_hash) is None
+
+
+def test_purge_expired_uploads(app, client, auth_headers, storage):
+    import os
+    import time
+    from app.api.v1.upload.service import upload_service
+    from app.models.upload import UploadFile
+    from app.models.upload_chunk import UploadChunk
+    from app.extensions import db
+
+    content = b'e' * (CHUNK_SIZE + 10)
+    expired_id, _chunks = _upload(client, auth_headers, content, chunk_order=[0])
+    active_id, _chunks = _upload(client, auth_headers, b'a' * 10, chunk_order=[])
+    verifying_id, _chunks = _upload(client, auth_headers, b'v' * 10, chunk_order=[])
+    UploadFile.query.filter_by(upload_id=expired_id).one().expires_at = int(time.time()) - 1
+    UploadFile.query.filter_by(upload_id=verifying_id).one().status = 'verifying'
+    db.session.add(UploadChunk(upload_id=expired_id, chunk_index=0, uploaded_at=0))
+    db.session.add(UploadChunk(upload_id='gone', chunk_index=0, uploaded_at=0))
+    db.session.commit()
+    orphan_dir = storage.chunks_dir / 'orphan-upload'
+    orphan_dir.mkdir()
+    (orphan_dir / 'chunk_0').write_bytes(b'o' * 4096)
+    os.utime(orphan_dir, (0, 0))
+    os.utime(storage.get_partial_path(active_id), (0, 0))
+    os.utime(storage.get_partial_path(verifying_id), (0, 0))
+
+    stats = upload_service.purge_expired(batch_size=1, orphan_grace_seconds=60)
+    assert (stats['expired_sessions'], stats['orphan_dirs'], stats['chunk_rows']) == (1, 1, 1)
+    assert stats['reclaimed_bytes'] >= 4096
+    assert UploadFile.query.filter_by(upload_id=expired_id).first() is None
+    assert UploadChunk.query.count() == 0
+    assert not storage.get_partial_path(expired_id).exists() and not orphan_dir.exists()
+    assert storage.get_partial_path(active_id).exists() and storage.get_partial_path(verifying_id).exists()
+
+
+def test_download_supports_ranges_and_etag(app, client, auth_headers, storage):
+    from app.models.upload import UploadFile
+
+    content = bytes(range(256)) * 8
+    upload_id, _chunks = _upload(client, auth_headers, content)
+    client.post('/api/v1/upload/merge', json={'uploadId': upload_id}, headers=auth_headers)
+    file_id = UploadFile.query.filter_by(upload_id=upload_id).one().id
+    url = f'/api/v1/upload/files/{file_id}/download'
+    etag = f'"{hashlib.sha256(content).hexdigest()}"'
+
+    full = client.get(url, headers=auth_headers)
+    assert full.status_code == 200 and full.data == content
+    assert full.headers['ETag'] == etag and full.headers['Accept-Ranges'] == 'bytes'
+
+    partial = client.get(url, headers={**auth_headers, 'Range': 'bytes=100-199', 'If-Range': etag})
+    assert partial.status_code == 206 and partial.data == content[100:200]
+    assert partial.headers['Content-Range'] == f'bytes 100-199/{len(content)}'
+
+    stale = client.get(url, headers={**auth_headers, 'Range': 'bytes=100-199', 'If-Range': '"stale"'})
+    assert stale.status_code == 200 and stale.data == content
+    assert client.get(url, headers={**auth_headers, 'If-None-Match': etag}).status_code == 304
+
+    from flask_jwt_extended import create_access_token
+    from app.extensions import db
+    from app.models.auth import User
+
+    other = User(domain_account='stranger', user_name='stranger', real_name='Stranger',
+                 email='s@example.com', valid=1)
+    db.session.add(other)
+    db.session.commit()
+    other_headers = {'Authorization': f'Bearer {create_access_token(identity=str(other.id))}'}
+    assert client.get(url, headers=other_headers).status_code == 404
+
+    app.config.update(DOWNLOAD_ACCEL_PREFIX='/_protected/', DOWNLOAD_ACCEL_ROOT=str(storage.base_path))
+    accel = client.get(url, headers=auth_headers)
+    assert accel.data == b'' and accel.headers['X-Accel-Redirect'].startswith('/_protected/files/')
+    assert 'model.stp' in accel.headers['Content-Disposition']
@@ -3,4 +3,4 @@ import os
 from app import create_app
 
 
-app = create_app(os.getenv('FLASK_ENV', 'production'))
+app = create_app(os.getenv('FLASK_ENV', 'production'), serving=True)